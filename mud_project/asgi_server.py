@@ -0,0 +1,170 @@
+# mud_project/asgi_server.py
+# asyncio-native server mode: a python-socketio AsyncServer mounted as an ASGI app, with the game simulation
+# running as a coroutine on the same event loop. Connections cost no OS thread, so one process can hold
+# thousands of mostly idle players. Start with `python asgi_server.py` (needs uvicorn), set
+# config.SOCKETIO_ASYNC_MODE = 'asgi' and start main.py, or point any ASGI server at `asgi_server:app`.
+import os
+import sys
+import time
+import json
+import asyncio
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import socketio as python_socketio
+except ImportError:
+    python_socketio = None
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+try:
+    import config
+    import main as game
+    from database import connection as db_connection
+    from database import data_loader
+    from database import async_player_handler
+    from game_logic import command_queue
+except ImportError as e:
+    print(f"ERROR: Critical module import failed: {e}")
+    traceback.print_exc()
+    sys.exit(1)
+
+if python_socketio is None:
+    print("ERROR: The ASGI server mode needs the 'python-socketio' package (pip install python-socketio uvicorn).")
+    sys.exit(1)
+
+sio = python_socketio.AsyncServer(async_mode='asgi', cors_allowed_origins=getattr(config, 'ASGI_CORS_ALLOWED_ORIGINS', []))
+OUTBOX = [] # emits (event_name, payload, room, skip_sid) and room channel moves (None, sid, leave_channel, join_channel)
+            # made by game code during a simulation step, in order; sent when the step yields
+
+def _buffer_emit(event_name, payload, room=None, skip_sid=None):
+    OUTBOX.append((event_name, payload, room, skip_sid))
+
+def _buffer_channel_move(sid, leave_channel, join_channel):
+    OUTBOX.append((None, sid, leave_channel, join_channel))
+
+async def flush_outbox():
+    while OUTBOX:
+        pending_emits = OUTBOX[:]; OUTBOX.clear()
+        for event_name, payload_or_sid, room_or_leave, skip_sid_or_join in pending_emits:
+            if event_name is None:
+                try:
+                    if room_or_leave: await sio.leave_room(payload_or_sid, room_or_leave)
+                    if skip_sid_or_join: await sio.enter_room(payload_or_sid, skip_sid_or_join)
+                except (KeyError, ValueError): pass # disconnected before the move went out: already out of every room
+                continue
+            try: await sio.emit(event_name, payload_or_sid, to=room_or_leave, skip_sid=skip_sid_or_join)
+            except Exception as e_emit: print(f"ERROR ASGI: emit '{event_name}' to {room_or_leave} failed: {e_emit}")
+
+# --- Socket.IO Event Handlers (mirror main.py: queue only, the simulation coroutine does the work) ---
+@sio.event
+async def connect(sid, environ, auth=None):
+    if config.DEBUG_MODE: print(f"DEBUG ASGI: Client connected: SID {sid}")
+    game.COMMAND_QUEUE.submit(sid, game.process_connect, sid, force=True)
+
+@sio.event
+async def disconnect(sid, *args):
+    game.COMMAND_QUEUE.submit(sid, game.process_disconnect, sid, force=True)
+
+@sio.on('player_command')
+async def player_command(sid, data):
+    command_input = (data or {}).get('command', '').strip()
+    if not command_input: return
+    if sid not in game.active_players: await async_player_handler.prefetch_for_command(command_input)
+    submit_result = game.COMMAND_QUEUE.submit(sid, game.process_player_command, sid, command_input, expire_callback=game.expire_player_command)
+    if submit_result != command_queue.SUBMIT_OK:
+        await sio.emit('game_messages', {'messages': [{"text": "You are acting faster than the world can keep up. Wait a moment and try again.", "type": "error_rt"}]}, to=sid)
+
+# --- Simulation coroutine ---
+async def simulation_coroutine():
+    """Same schedule as main.game_tick_loop: the tick on its deadline, queued commands and due entity attacks in between.
+    Every step is synchronous game code; the coroutine yields to the event loop between steps and while idle."""
+    wakeup = asyncio.Event()
+    game.COMMAND_QUEUE.wakeup_event = wakeup
+    game.timer_system.GAME_TIMERS.attach_wakeup(game.timer_system.LANE_ENTITY_COMBAT, wakeup)
+    tick_clock = game.make_tick_clock(); ticks_elapsed = 1; local_tz = game.get_log_timezone()
+    if config.DEBUG_MODE: print("ASGI simulation coroutine started.")
+    while game.game_loop_active:
+        try:
+            log_time_prefix, processing_time = game.run_game_tick(tick_clock, ticks_elapsed, local_tz)
+            sleep_time, ticks_elapsed = game.finish_game_tick(tick_clock, processing_time, log_time_prefix)
+        except Exception as e_tick:
+            print(f"!!! ERROR in ASGI simulation tick: {e_tick}"); traceback.print_exc(); sleep_time = tick_clock.interval
+        await flush_outbox()
+        next_tick_at = time.monotonic() + sleep_time
+        while game.game_loop_active:
+            wakeup.clear()
+            wait_seconds = game.run_simulation_pass(next_tick_at)
+            await flush_outbox()
+            if wait_seconds is None: break
+            if wait_seconds <= 0: await asyncio.sleep(0); continue
+            try: await asyncio.wait_for(wakeup.wait(), timeout=wait_seconds)
+            except asyncio.TimeoutError: pass
+    if config.DEBUG_MODE: print("ASGI simulation coroutine stopped.")
+
+# --- Plain HTTP routes (the client page and the admin profile dump) ---
+def _index_html_path():
+    for candidate in (os.path.join('templates', 'index.html'), os.path.join('..', 'client', 'index.html')):
+        if os.path.exists(candidate): return candidate
+    return None
+
+async def _send_http(send, status, body, content_type):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+    await send({"type": "http.response.body", "body": body})
+
+async def http_app(scope, receive, send):
+    if scope.get("type") != "http": return
+    path = scope.get("path", "/")
+    if path == "/":
+        index_path = _index_html_path()
+        if not index_path: return await _send_http(send, 200, getattr(config, 'FALLBACK_INDEX_HTML', "").encode("utf-8"), b"text/html; charset=utf-8")
+        with open(index_path, 'rb') as f: return await _send_http(send, 200, f.read(), b"text/html; charset=utf-8")
+    if path == "/admin/tick_profile":
+        admin_token = getattr(config, 'ADMIN_API_TOKEN', None)
+        if not admin_token: return await _send_http(send, 404, b"Not Found", b"text/plain")
+        query = dict(pair.split("=", 1) for pair in scope.get("query_string", b"").decode("utf-8").split("&") if "=" in pair)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        if headers.get("x-admin-token", query.get("token")) != admin_token: return await _send_http(send, 403, b"Forbidden", b"text/plain")
+        return await _send_http(send, 200, json.dumps(game.build_tick_profile_dump(), default=str).encode("utf-8"), b"application/json")
+    await _send_http(send, 404, b"Not Found", b"text/plain")
+
+# --- Lifespan ---
+_simulation_task = None
+
+async def on_startup():
+    global _simulation_task
+    mud_name = getattr(config, 'MUD_NAME', 'MUD Server'); print(f"Starting {mud_name} (ASGI mode)...")
+    game.CLIENT_EMITTER = _buffer_emit; game.CLIENT_CHANNEL_MOVER = _buffer_channel_move
+    game.player_handler = async_player_handler
+    db_connection.connect_to_mongo(); print("Initializing DB with defaults if needed..."); data_loader.initialize_database_with_defaults()
+    print("Loading game data into memory..."); game.load_game_world(data_loader.load_all_game_data())
+    game.game_loop_active = True
+    _simulation_task = asyncio.get_running_loop().create_task(simulation_coroutine())
+
+async def on_shutdown():
+    print("Attempting graceful shutdown (ASGI mode)..."); game.game_loop_active = False
+    if _simulation_task is not None:
+        game.COMMAND_QUEUE.wakeup_event.set()
+        try: await asyncio.wait_for(_simulation_task, timeout=float(getattr(config, 'TICK_INTERVAL_SECONDS', 6.0)) + 2.0)
+        except asyncio.TimeoutError: print("Warning: Simulation coroutine did not stop cleanly.")
+    game.save_all_active_players()
+    await asyncio.get_running_loop().run_in_executor(None, async_player_handler.shutdown)
+    if db_connection and hasattr(db_connection, 'close_mongo_connection'): db_connection.close_mongo_connection()
+    print(f"{getattr(config, 'MUD_NAME', 'MUD Server')} has shut down gracefully.")
+
+app = python_socketio.ASGIApp(sio, other_asgi_app=http_app, on_startup=on_startup, on_shutdown=on_shutdown)
+
+def run_server():
+    if uvicorn is None:
+        print("ERROR: 'uvicorn' is not installed. Install it (pip install uvicorn) or serve asgi_server:app with another ASGI server.")
+        sys.exit(1)
+    host_ip = getattr(config, 'HOST', '0.0.0.0'); port_num = int(getattr(config, 'PORT', 8024))
+    print(f"MUD server (ASGI) on http://{host_ip}:{port_num}")
+    uvicorn.run(app, host=host_ip, port=port_num, log_level="info" if config.DEBUG_MODE else "warning")
+
+if __name__ == '__main__':
+    run_server()
@@ -0,0 +1,67 @@
+# mud_project/classes/monster.py
+# Live monster instances. Every monster placed by a room's "monsters" template list gets an integer instance id and a
+# MonsterInstance holding its template, room, HP and defeat state for as long as the world is loaded. The instance id is
+# the monster's runtime id everywhere (combat, aggro, threat timers, respawn tracking, corpses), so nothing builds or
+# parses "<room>_<template>_<index>" strings any more. A respawn revives the same instance in place: ids and each
+# room's instance order never shift, which is what "goblin 2" counts along.
+import itertools
+
+try:
+    import config
+except ImportError:
+    class MockConfigMonster:
+        DEBUG_MODE = True
+    config = MockConfigMonster()
+
+class MonsterInstance:
+    __slots__ = ("instance_id", "template_key", "template", "room_id", "hp", "defeated")
+
+    def __init__(self, instance_id, template_key, template, room_id):
+        self.instance_id = instance_id; self.template_key = template_key; self.template = template; self.room_id = room_id
+        self.hp = None # None until first damaged: full HP from the template
+        self.defeated = False
+
+    @property
+    def name(self): return self.template.get("name", "a creature")
+
+    def current_hp(self):
+        return self.template.get("max_hp", self.template.get("hp", 25)) if self.hp is None else self.hp
+
+    def revive(self):
+        self.hp = None; self.defeated = False
+
+    def __repr__(self): return f"<MonsterInstance {self.instance_id} {self.template_key!r} in {self.room_id}{' (defeated)' if self.defeated else ''}>"
+
+# --- Module-level state ---
+MONSTER_INSTANCES = {} # instance_id -> MonsterInstance
+MONSTERS_BY_ROOM = {}  # room_id -> [MonsterInstance] in spawn order
+_instance_ids = itertools.count(1)
+# --- End Module-level state ---
+
+def spawn(room_id, template_key, template):
+    instance = MonsterInstance(next(_instance_ids), template_key, template, room_id)
+    MONSTER_INSTANCES[instance.instance_id] = instance; MONSTERS_BY_ROOM.setdefault(room_id, []).append(instance)
+    return instance
+
+def populate_room(room_id, room_data, game_monster_templates):
+    """(Re)creates one room's instances from its "monsters" template list, e.g. after that list was replaced wholesale."""
+    for instance in MONSTERS_BY_ROOM.pop(room_id, []): MONSTER_INSTANCES.pop(instance.instance_id, None)
+    for template_key in room_data.get("monsters", []):
+        template = game_monster_templates.get(template_key)
+        if template: spawn(room_id, template_key, template)
+        elif config.DEBUG_MODE: print(f"DEBUG MONSTERS: Room {room_id} lists unknown monster template '{template_key}'. Not spawned.")
+    return MONSTERS_BY_ROOM.get(room_id, [])
+
+def populate_rooms(game_rooms, game_monster_templates):
+    """Spawns every room's monsters after the world is (re)loaded. Ids restart at 1 so a given world always numbers them the same."""
+    global _instance_ids
+    MONSTER_INSTANCES.clear(); MONSTERS_BY_ROOM.clear(); _instance_ids = itertools.count(1)
+    for room_id, room_data in game_rooms.items():
+        if room_data.get("monsters"): populate_room(room_id, room_data, game_monster_templates)
+    if config.DEBUG_MODE: print(f"MONSTERS: Spawned {len(MONSTER_INSTANCES)} monster instances in {len(MONSTERS_BY_ROOM)} rooms.")
+
+def get(instance_id):
+    return MONSTER_INSTANCES.get(instance_id) if isinstance(instance_id, int) else None
+
+def room_monsters(room_id):
+    return MONSTERS_BY_ROOM.get(room_id, ())
@@ -6,6 +6,7 @@ import random
 
 try:
     import config # Will load from mud_project/config.py
+    from classes import templates
 except ImportError:
     # Fallback mock config if the primary config isn't found (e.g., during isolated testing)
     class MockConfigForPlayer:
@@ -29,8 +30,24 @@ except ImportError:
         XP_LEVEL_THRESHOLDS = {} # Add if needed for player.get_client_data
     config = MockConfigForPlayer()
 
+# Sorted once: get_current_mind_status walks them highest first on every stats update
+MIND_STATUS_THRESHOLDS_DESC = tuple(sorted(getattr(config, 'MIND_STATUS_THRESHOLDS', []), key=lambda x: x['threshold'], reverse=True))
+
+# Client stats payload (get_client_data) fields that go stale when a Player attribute is assigned. Assignments mark them
+# dirty in Player.__setattr__; in-place edits (stats/inventory/equipped_items) are marked by the methods that make them.
+CLIENT_FIELDS_BY_ATTRIBUTE = {
+    "name": ("name",), "race": ("race_key", "race_display_name", "mind_status"),
+    "hp": ("hp",), "max_hp": ("max_hp",), "mp": ("mp",), "max_mp": ("max_mp",), "sp": ("sp",), "max_sp": ("max_sp",),
+    "level": ("level", "xp_for_next_level"), "xp": ("xp", "xp_for_next_level"), "unabsorbed_xp": ("unabsorbed_xp", "mind_status"),
+    "stats": ("stats", "mind_status"), "inventory": ("inventory_count",), "equipped_items": ("equipped_items_display",),
+    "current_room_id": ("current_room_id",), "gold": ("gold",),
+}
+
 class Player:
     def __init__(self, sid, name="Unnamed Character"):
+        self.client_dirty = set(CLIENT_FIELD_BUILDERS) # stats_update fields changed since the last payload (all of them until the first)
+        self.client_stats_sent = None # field -> value as last sent to the client; None until the first (full) payload
+        self.client_stats_version = 0
         self.sid = sid
         self.name = name
         self._queued_messages = [] 
@@ -60,10 +77,21 @@ class Player:
         self.is_in_group = False   
         self.db_id = None          
         self.training_points = 0   
+        self.combat_version = 0     # bumped whenever stats, skills or gear change; combat's cached profile is keyed on it
+        self.combat_profile = None  # combat.CombatProfile built for combat_version
 
         if config.DEBUG_MODE:
             print(f"DEBUG PLAYER ({self.name}, SID: {self.sid}): Initialized with {len(self.equipped_items)} equipment slots.")
 
+    def __setattr__(self, attribute_name, value):
+        object.__setattr__(self, attribute_name, value)
+        client_fields = CLIENT_FIELDS_BY_ATTRIBUTE.get(attribute_name)
+        if client_fields is not None: self.client_dirty.update(client_fields)
+
+    def mark_client_dirty(self, *client_fields):
+        """For in-place edits __setattr__ cannot see, e.g. player.inventory.append(...) -> mark_client_dirty("inventory_count")."""
+        self.client_dirty.update(client_fields)
+
     def add_message(self, text_or_payload, message_type="info"):
         if not hasattr(self, '_queued_messages') or self._queued_messages is None:
             self._queued_messages = []
@@ -83,7 +111,12 @@ class Player:
         self._queued_messages.clear()          
         return messages
 
+    def invalidate_combat_profile(self):
+        """Called by equip_item / unequip_item and calculate_derived_stats (creation, load, level-up): the cached AS/DS are stale."""
+        self.combat_version += 1
+
     def calculate_derived_stats(self, game_races_data=None, game_items_data=None):
+        self.invalidate_combat_profile(); self.mark_client_dirty("stats", "mind_status", "equipped_items_display") # stats/gear may have changed in place
         effective_stats = self.stats.copy()
         if game_items_data:
             for slot_key, item_id_list in self.equipped_items.items():
@@ -182,8 +215,7 @@ class Player:
         if capacity <= 0: return "Clear as a bell" if current_unabsorbed_xp == 0 else "Muddled" 
         if current_unabsorbed_xp == 0: return "Clear as a bell"
         ratio = current_unabsorbed_xp / capacity
-        thresholds = sorted(getattr(config, 'MIND_STATUS_THRESHOLDS', []), key=lambda x: x['threshold'], reverse=True)
-        for status_info in thresholds:
+        for status_info in MIND_STATUS_THRESHOLDS_DESC:
             if status_info['phrase'] == "Clear as a bell": continue 
             if ratio >= status_info['threshold']: return status_info['phrase']
         return "Fresh and clear"
@@ -279,7 +311,7 @@ class Player:
         if is_two_handed_weapon:
              other_hand_slot_for_2h = "offhand" if target_slot_key == "mainhand" else "mainhand"
              self.equipped_items[other_hand_slot_for_2h] = item_id_to_equip
-        self.inventory.remove(item_id_to_equip)
+        self.inventory.remove(item_id_to_equip); self.invalidate_combat_profile(); self.mark_client_dirty("inventory_count", "equipped_items_display")
         self.add_message(f"You equip the {item_template.get('name', 'item')} to your {actual_slot_name_for_msg}.", "feedback_equip")
         self.calculate_derived_stats(game_races_data, game_items_data)
         return True
@@ -297,7 +329,7 @@ class Player:
             if not silent: self.add_message(f"Your inventory is full. Cannot unequip the {item_name_for_msg}.", "error")
             return False
         self.inventory.append(item_id_unequipped)
-        self.equipped_items[slot_key_to_unequip] = None
+        self.equipped_items[slot_key_to_unequip] = None; self.invalidate_combat_profile(); self.mark_client_dirty("inventory_count", "equipped_items_display")
         if item_template and ("twohand" in item_template.get("slot", []) or item_template.get("is_two_handed", False)):
             other_hand_slot = "offhand" if slot_key_to_unequip == "mainhand" else "mainhand"
             if self.equipped_items.get(other_hand_slot) == item_id_unequipped:
@@ -311,8 +343,7 @@ class Player:
         return game_items_data.get(item_id) if item_id else None
 
     def get_armor_type(self, game_items_data: dict) -> str:
-        torso_slot_key = next((key for key, val in config.EQUIPMENT_SLOTS.items() if "torso" in key.lower() or "chest" in key.lower()), "torso")
-        torso_item_data = self.get_equipped_item_data(torso_slot_key, game_items_data)
+        torso_item_data = self.get_equipped_item_data(templates.TORSO_SLOT_KEY, game_items_data)
         if torso_item_data and torso_item_data.get("type") == "armor":
             return torso_item_data.get("armor_type", config.DEFAULT_UNARMORED_TYPE)
         return config.DEFAULT_UNARMORED_TYPE
@@ -353,33 +384,65 @@ class Player:
         return player
 
     def get_client_data(self, game_races_data=None, game_items_data=None):
-        race_display_name = self.race.title().replace("_", " ") if self.race else "Unknown"
-        if game_races_data and self.race:
-            race_data_entry = game_races_data.get(self.race)
-            if race_data_entry: race_display_name = race_data_entry.get("name", self.race.title().replace("_", " "))
-        equipped_display = {}
-        if game_items_data:
-            for slot_key, item_id in self.equipped_items.items():
-                slot_display_name = config.EQUIPMENT_SLOTS.get(slot_key, slot_key).replace('_', ' ').title()
-                if item_id:
-                    item_data = game_items_data.get(item_id)
-                    equipped_display[slot_display_name] = item_data.get("name", item_id) if item_data else item_id
-                else: equipped_display[slot_display_name] = "---"
-        
-        xp_for_next = getattr(config, 'XP_LEVEL_THRESHOLDS', {}).get(self.level + 1, "Max")
-        # Ensure xp_for_next is a string if it's "Max" or if player is at max level and no next threshold exists
-        if not isinstance(xp_for_next, str) and self.xp >= xp_for_next:
-             xp_for_next = getattr(config, 'XP_LEVEL_THRESHOLDS', {}).get(self.level + 2, "Max") # Check next level or show Max
-
-        return {
-            "name": self.name, "race_key": self.race, "race_display_name": race_display_name,
-            "hp": self.hp, "max_hp": self.max_hp, "mp": self.mp, "max_mp": self.max_mp,
-            "sp": self.sp, "max_sp": self.max_sp, "level": self.level, "xp": self.xp,
-            "xp_for_next_level": xp_for_next, # Added for client display
-            "unabsorbed_xp": getattr(self, 'unabsorbed_xp', 0),
-            "stats": self.stats, "inventory_count": len(self.inventory),
-            "equipped_items_display": equipped_display,
-            "current_room_id": self.current_room_id,
-            "mind_status": self.get_current_mind_status(game_races_data),
-            "gold": getattr(self, 'gold', 0)
-        }
+        return {field_name: build(self, game_races_data, game_items_data) for field_name, build in CLIENT_FIELD_BUILDERS.items()}
+
+    def get_client_stats_update(self, game_races_data=None, game_items_data=None):
+        """The next stats_update payload for this player's client, or None if nothing it shows has changed. The first one is
+        the full get_client_data() ("full": True); after that only the dirty fields whose value differs from what was last sent.
+        Every payload carries a new "version"; the client ignores payloads older than the last it applied."""
+        if self.client_stats_sent is None:
+            changed = self.get_client_data(game_races_data, game_items_data); self.client_stats_sent = {}; is_full = True
+        else:
+            if not self.client_dirty: return None
+            changed = {}; is_full = False
+            for field_name in CLIENT_FIELD_BUILDERS:
+                if field_name not in self.client_dirty: continue
+                value = CLIENT_FIELD_BUILDERS[field_name](self, game_races_data, game_items_data)
+                if value != self.client_stats_sent.get(field_name): changed[field_name] = value
+        self.client_dirty.clear()
+        if not changed: return None
+        for field_name, value in changed.items(): self.client_stats_sent[field_name] = dict(value) if isinstance(value, dict) else value # copies: stats is edited in place
+        self.client_stats_version += 1
+        return {"version": self.client_stats_version, "full": is_full, "raw_stats": changed}
+
+def _client_race_display_name(player, game_races_data, game_items_data):
+    race_display_name = player.race.title().replace("_", " ") if player.race else "Unknown"
+    if game_races_data and player.race:
+        race_data_entry = game_races_data.get(player.race)
+        if race_data_entry: race_display_name = race_data_entry.get("name", player.race.title().replace("_", " "))
+    return race_display_name
+
+def _client_equipped_display(player, game_races_data, game_items_data):
+    equipped_display = {}
+    if game_items_data:
+        for slot_key, item_id in player.equipped_items.items():
+            slot_display_name = config.EQUIPMENT_SLOTS.get(slot_key, slot_key).replace('_', ' ').title()
+            if item_id:
+                item_data = game_items_data.get(item_id)
+                equipped_display[slot_display_name] = item_data.get("name", item_id) if item_data else item_id
+            else: equipped_display[slot_display_name] = "---"
+    return equipped_display
+
+def _client_xp_for_next_level(player, game_races_data, game_items_data):
+    xp_for_next = getattr(config, 'XP_LEVEL_THRESHOLDS', {}).get(player.level + 1, "Max")
+    # Ensure xp_for_next is a string if it's "Max" or if player is at max level and no next threshold exists
+    if not isinstance(xp_for_next, str) and player.xp >= xp_for_next:
+         xp_for_next = getattr(config, 'XP_LEVEL_THRESHOLDS', {}).get(player.level + 2, "Max") # Check next level or show Max
+    return xp_for_next
+
+# field -> builder(player, game_races_data, game_items_data), in get_client_data()'s field order
+CLIENT_FIELD_BUILDERS = {
+    "name": lambda player, races, items: player.name, "race_key": lambda player, races, items: player.race,
+    "race_display_name": _client_race_display_name,
+    "hp": lambda player, races, items: player.hp, "max_hp": lambda player, races, items: player.max_hp,
+    "mp": lambda player, races, items: player.mp, "max_mp": lambda player, races, items: player.max_mp,
+    "sp": lambda player, races, items: player.sp, "max_sp": lambda player, races, items: player.max_sp,
+    "level": lambda player, races, items: player.level, "xp": lambda player, races, items: player.xp,
+    "xp_for_next_level": _client_xp_for_next_level, # Added for client display
+    "unabsorbed_xp": lambda player, races, items: getattr(player, 'unabsorbed_xp', 0),
+    "stats": lambda player, races, items: player.stats, "inventory_count": lambda player, races, items: len(player.inventory),
+    "equipped_items_display": _client_equipped_display,
+    "current_room_id": lambda player, races, items: player.current_room_id,
+    "mind_status": lambda player, races, items: player.get_current_mind_status(races),
+    "gold": lambda player, races, items: getattr(player, 'gold', 0),
+}
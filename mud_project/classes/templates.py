@@ -0,0 +1,116 @@
+# mud_project/classes/templates.py
+# Immutable, typed views of the item, monster, NPC and race templates. data_loader compiles them once at load time
+# (next to the raw documents, which stay the source for persistence, corpses and client payloads) so combat and
+# targeting read attributes instead of walking .get() chains: keywords are pre-lowercased frozensets, numeric fields
+# have their defaults applied, and an entity's equipment is resolved to ItemTemplate objects.
+from types import MappingProxyType
+
+try:
+    import config
+except ImportError:
+    class MockConfigTemplates:
+        DEBUG_MODE = True; DEFAULT_UNARMORED_TYPE = "unarmored"
+        EQUIPMENT_SLOTS = {"torso": "Torso", "mainhand": "Main Hand", "offhand": "Off Hand"}
+    config = MockConfigTemplates()
+
+EMPTY_MAPPING = MappingProxyType({})
+# Slot keys resolved once instead of scanning config.EQUIPMENT_SLOTS on every swing (same rules the combat code used)
+TORSO_SLOT_KEY = next((key for key in config.EQUIPMENT_SLOTS if "torso" in key.lower() or "chest" in key.lower()), "torso")
+OFFHAND_SLOT_KEY = next((key for key in config.EQUIPMENT_SLOTS if "offhand" in key.lower()), "offhand")
+MAINHAND_SLOT_KEY = "mainhand"
+
+def match_tokens(name, keywords, key):
+    """Every lowercased word a player may type to mean this template: the full name, each name word, keywords and the key."""
+    name_lower = (name or "").lower()
+    tokens = {name_lower, str(key).lower()}; tokens.update(name_lower.split()); tokens.update(k.lower() for k in (keywords or []))
+    tokens.discard("")
+    return frozenset(tokens)
+
+def _frozen_mapping(value):
+    return MappingProxyType(dict(value)) if isinstance(value, dict) and value else EMPTY_MAPPING
+
+class FrozenTemplate:
+    """Base for compiled templates: attributes are set once in __init__ and cannot be reassigned."""
+    __slots__ = ()
+
+    def _init(self, **fields):
+        for field_name, value in fields.items(): object.__setattr__(self, field_name, value)
+
+    def __setattr__(self, name, value): raise AttributeError(f"{type(self).__name__} '{self.key}' is immutable.")
+    def __delattr__(self, name): raise AttributeError(f"{type(self).__name__} '{self.key}' is immutable.")
+    def __repr__(self): return f"<{type(self).__name__} {self.key!r}>"
+
+class ItemTemplate(FrozenTemplate):
+    __slots__ = ("key", "name", "item_type", "keywords", "tokens", "slots", "is_two_handed", "skill", "weapon_as_bonus",
+                 "enchantment_as_bonus", "avd_modifiers", "armor_type", "armor_ds_bonus", "shield_ds_bonus", "is_weapon", "is_armor", "is_shield")
+
+    def __init__(self, key, data):
+        slots = data.get("slot", []); slots = tuple(slots) if isinstance(slots, (list, tuple)) else (slots,)
+        item_type = data.get("type")
+        self._init(key=key, name=data.get("name"), item_type=item_type, keywords=frozenset(k.lower() for k in data.get("keywords", [])),
+                   tokens=match_tokens(data.get("name", ""), data.get("keywords", []), key), slots=slots,
+                   is_two_handed="twohand" in slots or bool(data.get("is_two_handed", False)), skill=data.get("skill"),
+                   weapon_as_bonus=data.get("weapon_as_bonus", 0), enchantment_as_bonus=data.get("enchantment_as_bonus", 0),
+                   avd_modifiers=_frozen_mapping(data.get("avd_modifiers")), armor_type=data.get("armor_type", config.DEFAULT_UNARMORED_TYPE),
+                   armor_ds_bonus=data.get("armor_ds_bonus", 0), shield_ds_bonus=data.get("shield_ds_bonus", 0),
+                   is_weapon=item_type == "weapon", is_armor=item_type == "armor", is_shield=item_type == "shield")
+
+class EntityTemplate(FrozenTemplate):
+    """A monster or NPC template with its equipment resolved (weapon/armor/shield are ItemTemplates or None)."""
+    __slots__ = ("key", "kind", "name", "keywords", "tokens", "stats", "skills", "max_hp", "innate_armor_type", "natural_attack_bonus_damage",
+                 "current_stance", "attack_delay", "equipped", "weapon", "armor", "shield", "armor_type")
+
+    def __init__(self, key, kind, data, item_templates):
+        equipped = {slot_key: item_templates.get(item_id) for slot_key, item_id in (data.get("equipped") or {}).items() if item_id and item_id in item_templates}
+        armor = equipped.get(TORSO_SLOT_KEY); innate_armor_type = data.get("innate_armor_type", config.DEFAULT_UNARMORED_TYPE)
+        self._init(key=key, kind=kind, name=data.get("name"), keywords=frozenset(k.lower() for k in data.get("keywords", [])),
+                   tokens=match_tokens(data.get("name", ""), data.get("keywords", []), key),
+                   stats=_frozen_mapping(data.get("stats")), skills=_frozen_mapping(data.get("skills")),
+                   max_hp=data.get("max_hp", data.get("hp", 25)), innate_armor_type=innate_armor_type,
+                   natural_attack_bonus_damage=data.get("natural_attack_bonus_damage", 0), current_stance=data.get("current_stance"),
+                   attack_delay=data.get("attack_delay", 3.0), equipped=MappingProxyType(equipped),
+                   weapon=equipped.get(MAINHAND_SLOT_KEY), armor=armor, shield=equipped.get(OFFHAND_SLOT_KEY),
+                   armor_type=armor.armor_type if armor is not None and armor.is_armor else innate_armor_type)
+
+class RaceTemplate(FrozenTemplate):
+    __slots__ = ("key", "name", "primary_bonus_mods", "stat_modifiers", "skill_bonuses", "bonus_training_points_at_creation")
+
+    def __init__(self, key, data):
+        suffix = "_primary_bonus_mod"
+        self._init(key=key, name=data.get("name"), primary_bonus_mods=MappingProxyType({field[:-len(suffix)]: value for field, value in data.items() if field.endswith(suffix)}),
+                   stat_modifiers=_frozen_mapping(data.get("stat_modifiers")), skill_bonuses=_frozen_mapping(data.get("skill_bonuses")),
+                   bonus_training_points_at_creation=data.get("bonus_training_points_at_creation", 0))
+
+class GameTemplates:
+    """The compiled registries: key -> ItemTemplate / EntityTemplate / RaceTemplate."""
+    __slots__ = ("items", "monsters", "npcs", "races")
+
+    def __init__(self, items=None, monsters=None, npcs=None, races=None):
+        self.items = items or {}; self.monsters = monsters or {}; self.npcs = npcs or {}; self.races = races or {}
+
+    def entity(self, kind, key):
+        return (self.npcs if kind == "npc" else self.monsters).get(key)
+
+def compile_game_templates(all_data):
+    """GameTemplates for the dict load_all_game_data() / build_game_data() return (their entity 'equipped' dicts already filled)."""
+    items = {key: ItemTemplate(key, data) for key, data in all_data.get("items", {}).items() if isinstance(data, dict)}
+    compiled = GameTemplates(items=items,
+                             monsters={key: EntityTemplate(key, "monster", data, items) for key, data in all_data.get("monster_templates", {}).items()},
+                             npcs={key: EntityTemplate(key, "npc", data, items) for key, data in all_data.get("npc_templates", {}).items()},
+                             races={key: RaceTemplate(key, data) for key, data in all_data.get("races", {}).items() if isinstance(data, dict)})
+    if config.DEBUG_MODE: print(f"TEMPLATES: Compiled {len(compiled.items)} items, {len(compiled.monsters)} monsters, {len(compiled.npcs)} NPCs, {len(compiled.races)} races.")
+    return compiled
+
+def as_item_template(item, item_templates=None):
+    """An ItemTemplate for an item template dict (looked up by its _id when a registry is given), or the object itself if already compiled."""
+    if item is None or isinstance(item, ItemTemplate): return item
+    key = item.get("_id")
+    compiled = item_templates.get(key) if item_templates is not None and key is not None else None
+    return compiled if compiled is not None else ItemTemplate(key, item)
+
+def as_entity_template(entity, kind, game_templates=None):
+    """The compiled EntityTemplate for a monster/NPC template dict (by its _id/key), compiling it on the spot if the registry lacks it."""
+    if entity is None or isinstance(entity, EntityTemplate): return entity
+    key = entity.get("_id", entity.get("key"))
+    compiled = game_templates.entity(kind, key) if game_templates is not None and key is not None else None
+    return compiled if compiled is not None else EntityTemplate(key, kind, entity, game_templates.items if game_templates is not None else {})
@@ -56,9 +56,13 @@ WELCOME_MESSAGE = "From the swirling mists of unbeing, a consciousness stirs..."
 HOST = '0.0.0.0'
 PORT = 8024
 SECRET_KEY = 'your_very_secret_key_here!' # IMPORTANT: Change this for production
-SOCKETIO_ASYNC_MODE = None # Let SocketIO choose, or specify 'threading', 'eventlet', 'gevent'
+SOCKETIO_ASYNC_MODE = None # None/'threading' = Flask-SocketIO with a simulation thread; 'asgi' = asyncio server (asgi_server.py, needs uvicorn); 'eventlet'/'gevent' also passed to Flask-SocketIO
+ASGI_CORS_ALLOWED_ORIGINS = [] # asgi mode only: extra origins allowed to open Socket.IO connections ('*' for any)
+ASYNC_DB_WORKERS = 4 # asgi mode only: threads that run the blocking pymongo calls for player loads/saves
+ASYNC_PREFETCH_CACHE_MAX_ENTRIES = 1024 # asgi mode only: player documents held for upcoming logins/creates (and saves still being written)
 
 # --- DATABASE CONFIGURATION ---
+DATABASE_BACKEND = "mongo" # "mongo" = MongoDB at MONGODB_URI; "memory" = in-process stand-in (database/memory_store.py), nothing persisted - for load tests
 MONGODB_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "whispers_game" # Use a new DB name for the refactored structure
 PLAYERS_COLLECTION = "players"
@@ -84,6 +88,31 @@ TICK_INTERVAL_SECONDS = 6  # Seconds per game tick
 MONSTER_ROAM_TICK_INTERVAL = 5 # How many game ticks before attempting monster roams
 MONSTER_RESPAWN_TICK_INTERVAL = 1 # How many game ticks before checking respawns
 AI_AGGRESSION_CHECK_INTERVAL_TICKS = 1 # How many game ticks before AI checks for new targets
+TICK_CATCHUP_POLICY = "budgeted" # When a tick overruns its deadline: "skip" missed ticks, "compress" (run them back-to-back) or "budgeted"
+TICK_CATCHUP_MAX_TICKS = 3 # "budgeted" only: most overdue ticks run back-to-back before the rest are skipped
+TICK_MAX_LAG_SECONDS = 60 # Further behind than this (e.g. host suspended) and the tick loop resyncs instead of catching up
+
+# --- ZONES ---
+ZONE_TAGS = ["oakhaven"] # Room tags that name a zone (a room's own "zone" key takes precedence); untagged rooms are grouped by connectivity
+ZONE_SHARD_COUNT = 1 # Zones are balanced by room count across this many shards; each shard's aggro pass is timed separately (all on the simulation thread)
+COMBAT_SCHEDULER_ENABLED = True # Entity attacks run between ticks at each next_attack_time instead of waiting for the game tick
+COMBAT_SCHEDULER_MAX_IDLE_SECONDS = 1.0 # Longest the simulation thread sleeps when nothing is due (queued commands and new attacks wake it early)
+COMBAT_BATCH_ENABLED = True # Many entity attacks due at once are resolved as one batch (d100s drawn together, hit/damage vectorized with NumPy if installed)
+COMBAT_BATCH_MIN_ATTACKS = 24 # Fewer due attacks than this run one at a time (same roll order as before batching)
+OUTBOX_ENABLED = True # A SID's game_messages and stats_update emits are merged into one frame per flush window
+OUTBOX_FLUSH_WINDOW_MS = 30 # How long the first queued emit may wait for others to join its frame (None: flush only at the end of each tick)
+ROOM_FANOUT_ENABLED = True # Room broadcasts go out once per room, to a Socket.IO room mirroring its occupants, instead of into each occupant's queue
+COMMAND_QUEUE_MAX_SIZE = 2048 # Player commands waiting for the simulation thread; more are rejected with a "slow down" message
+COMMAND_QUEUE_MAX_PER_SID = 20 # One connection may not have more than this many commands queued at once
+COMMAND_MAX_LATENCY_SECONDS = 5.0 # A command that waited longer than this is dropped (the player is told to retry) rather than run late
+COMMAND_DRAIN_BUDGET_SECONDS = 0.05 # Time spent running queued commands before due attacks and the tick deadline are checked again
+
+# --- TICK PROFILING ---
+TICK_PROFILER_ENABLED = True # Per-phase timing histograms and counters for the game tick and combat loops
+TICK_PROFILER_WINDOW = 200 # Samples kept per phase for the rolling p50/p95/p99
+COMMAND_STATS_WINDOW = 200 # Calls kept per command verb for the rolling latency percentiles shown by 'tickstats'
+ADMIN_PLAYER_NAMES = [] # Character names allowed to use admin commands such as 'tickstats'
+ADMIN_API_TOKEN = None # Set to enable GET /admin/tick_profile?token=... (JSON dump); None keeps the route disabled
 
 # --- CREATION & RESPAWN ---
 MIN_CHAR_NAME_LENGTH = 3
@@ -183,6 +212,9 @@ DISPOSITION_THREATENING = "threatening"
 DISPOSITION_AGGRESSIVE = "aggressive"
 DISPOSITION_HOSTILE_GENERAL = "hostile" # General hostility, may attack on sight or with triggers
 THREATENING_DELAY_TICKS = 3 # Number of game ticks a "threatening" entity waits before attacking
+ENTITY_STATE_HP_TTL_SECONDS = 600 # A wounded monster/NPC left out of combat this long is restored to full HP (its HP entry is evicted)
+ENTITY_STATE_MAX_WOUNDED = 5000 # Most wounded entities tracked at once; past this the longest-idle ones are evicted early
+ENTITY_STATE_EVICT_INTERVAL_TICKS = 10 # How many game ticks between stale-HP eviction passes
 
 FACTION_DISPLAY_NAMES = {
     "OakhavenCivilian": "Oakhaven Civilians",
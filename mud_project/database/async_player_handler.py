@@ -0,0 +1,112 @@
+# mud_project/database/async_player_handler.py
+# Drop-in replacement for player_handler (save_player / load_player / player_exists) used by the asyncio server mode.
+# pymongo is blocking, so the actual database calls run on a small thread pool and the event loop never waits on them:
+#   - save_player snapshots the player on the calling (simulation) thread and writes the snapshot in the background.
+#   - load_player / player_exists answer from documents fetched ahead of time by prefetch_player(), which the
+#     async Socket.IO handler awaits before it queues a 'login <name>' or 'create <name>' command.
+import copy
+import asyncio
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import config
+    from classes import player as player_class
+    from . import connection as db_connection
+    from . import player_handler
+except ImportError as e:
+    print(f"ERROR in async_player_handler.py: Critical module import failed: {e}")
+    class MockConfigAsyncPlayerHandler:
+        DEBUG_MODE = True
+        PLAYERS_COLLECTION = "players"
+        ASYNC_DB_WORKERS = 4; ASYNC_PREFETCH_CACHE_MAX_ENTRIES = 1024
+    if 'config' not in locals(): config = MockConfigAsyncPlayerHandler()
+    if 'player_class' not in locals(): player_class = None
+
+_DB_EXECUTOR = ThreadPoolExecutor(max_workers=getattr(config, 'ASYNC_DB_WORKERS', 4), thread_name_prefix="PlayerDB")
+_MISSING = object()
+PREFETCHED_PLAYER_DOCS = OrderedDict() # name_lower -> player document from the DB, or None if no such player; least recently stored first
+_PREFETCH_LOCK = threading.Lock() # DB pool threads drop entries once their write lands
+
+def _remember_doc(name_lower, player_doc):
+    """Stores a document, evicting the least recently stored ones past ASYNC_PREFETCH_CACHE_MAX_ENTRIES."""
+    with _PREFETCH_LOCK:
+        PREFETCHED_PLAYER_DOCS[name_lower] = player_doc; PREFETCHED_PLAYER_DOCS.move_to_end(name_lower)
+        while len(PREFETCHED_PLAYER_DOCS) > getattr(config, 'ASYNC_PREFETCH_CACHE_MAX_ENTRIES', 1024): PREFETCHED_PLAYER_DOCS.popitem(last=False)
+
+def _take_doc(name_lower):
+    with _PREFETCH_LOCK: return PREFETCHED_PLAYER_DOCS.pop(name_lower, _MISSING)
+
+class _PlayerSaveSnapshot:
+    """What player_handler.save_player needs from a Player, frozen at the moment the save was requested."""
+    __slots__ = ("name", "sid", "db_id", "_player_data")
+
+    def __init__(self, player_object):
+        self.name = player_object.name; self.sid = getattr(player_object, 'sid', None)
+        self.db_id = getattr(player_object, 'db_id', None)
+        self._player_data = copy.deepcopy(player_object.to_dict())
+
+    def to_dict(self):
+        return self._player_data
+
+def _find_player_doc(name_lower):
+    db = db_connection.get_db()
+    if db is None: return None
+    return db[config.PLAYERS_COLLECTION].find_one({"name_lower": name_lower})
+
+async def prefetch_player(player_name):
+    """Fetches a player's document on the DB thread pool so the following login/create command needs no blocking I/O."""
+    if not player_name: return
+    name_lower = player_name.strip().lower()
+    try: _remember_doc(name_lower, await asyncio.get_running_loop().run_in_executor(_DB_EXECUTOR, _find_player_doc, name_lower))
+    except Exception as e:
+        print(f"ERROR ASYNC_HANDLER: Prefetch failed for '{name_lower}': {e}"); _take_doc(name_lower)
+
+async def prefetch_for_command(command_input):
+    """Prefetches the character named by a 'login <name>' or 'create <name>' command, if that is what this is."""
+    parts = command_input.split(" ", 1)
+    if len(parts) == 2 and parts[0].lower() in ("login", "create"): await prefetch_player(parts[1])
+
+def save_player(player_object) -> bool:
+    """Queues a background write of the player's current state. Returns True once the write is queued."""
+    if not player_object or not getattr(player_object, 'name', None): return False
+    try: snapshot = _PlayerSaveSnapshot(player_object)
+    except Exception as e:
+        print(f"ERROR ASYNC_HANDLER: Could not snapshot '{player_object.name}' for saving: {e}"); traceback.print_exc(); return False
+    name_lower = player_object.name.lower(); saved_doc = dict(snapshot.to_dict(), name_lower=name_lower)
+    _remember_doc(name_lower, saved_doc) # lookups before the write lands see the new state
+
+    def _write_snapshot():
+        saved = player_handler.save_player(snapshot)
+        with _PREFETCH_LOCK: # the DB has it now; keep the entry only if a newer save or prefetch replaced it
+            if saved and PREFETCHED_PLAYER_DOCS.get(name_lower) is saved_doc: del PREFETCHED_PLAYER_DOCS[name_lower]
+        if saved and snapshot.db_id and not getattr(player_object, 'db_id', None): player_object.db_id = snapshot.db_id
+        if not saved: print(f"ERROR ASYNC_HANDLER: Background save failed for '{snapshot.name}'.")
+        return saved
+    _DB_EXECUTOR.submit(_write_snapshot)
+    return True
+
+def load_player(player_name_lower, sid_on_load, game_races_data=None, game_items_data=None):
+    player_doc = _take_doc(player_name_lower)
+    if player_doc is _MISSING:
+        if config.DEBUG_MODE: print(f"DEBUG ASYNC_HANDLER: '{player_name_lower}' was not prefetched; falling back to a blocking load.")
+        return player_handler.load_player(player_name_lower, sid_on_load, game_races_data, game_items_data)
+    if not player_doc: return None
+    try: return player_class.Player.from_dict(player_doc, sid_on_load, game_races_data, game_items_data)
+    except Exception as e:
+        print(f"ERROR ASYNC_HANDLER: Failed to instantiate player {player_name_lower} from prefetched data: {e}"); traceback.print_exc()
+        return None
+
+def player_exists(player_name: str) -> bool:
+    if not player_name: return False
+    player_doc = PREFETCHED_PLAYER_DOCS.get(player_name.lower(), _MISSING)
+    if player_doc is _MISSING: return player_handler.player_exists(player_name)
+    return bool(player_doc)
+
+def shutdown(wait=True):
+    """Waits for queued background saves to finish (call once the simulation has stopped)."""
+    _DB_EXECUTOR.shutdown(wait=wait)
+
+if config.DEBUG_MODE: print("database.async_player_handler loaded.")
@@ -24,6 +24,12 @@ def connect_to_mongo():
     mongo_uri = getattr(config, 'MONGO_URI', "mongodb://localhost:27017/")
     database_name = getattr(config, 'DATABASE_NAME', 'whispers_game')
 
+    if getattr(config, 'DATABASE_BACKEND', 'mongo') == 'memory':
+        from . import memory_store
+        db = memory_store.MemoryDatabase(database_name)
+        print(f"Using the in-memory database stand-in (nothing is persisted). Database: '{database_name}'")
+        return db
+
     try:
         if config.DEBUG_MODE: print(f"Attempting to connect to MongoDB at {mongo_uri}...")
         client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000) # Added timeout
@@ -59,6 +65,8 @@ def close_mongo_connection():
         if config.DEBUG_MODE: print("MongoDB connection closed.")
         client = None
         db = None
+    elif db is not None and getattr(config, 'DATABASE_BACKEND', 'mongo') == 'memory':
+        db = None
 
 if __name__ == '__main__':
     # Example usage/test
@@ -6,6 +6,7 @@ import copy # For deepcopying templates
 try:
     from . import connection # To get get_db()
     import config # Your main config file
+    from classes import templates # Compiled template objects for the hot paths
 
     # Import all default data modules
     from game_data import default_items, default_monsters, default_npcs, default_rooms
@@ -149,7 +150,7 @@ def load_all_game_data():
     db = connection.get_db()
     if db is None:
         print("DATA_LOADER: ERROR - Database connection not available.")
-        return {"items": {}, "monster_templates": {}, "npc_templates": {}, "rooms": {}, "loot_tables": {}, "races": {}, "equipment_tables": {}}
+        return {"items": {}, "monster_templates": {}, "npc_templates": {}, "rooms": {}, "loot_tables": {}, "races": {}, "equipment_tables": {}, "templates": templates.GameTemplates()}
 
     print("DATA_LOADER: Loading all game data from MongoDB...")
     all_data = {}
@@ -175,7 +176,47 @@ def load_all_game_data():
         try: all_data["rooms"][int(k)] = v
         except ValueError: all_data["rooms"][k] = v; print(f"DATA_LOADER: Room ID '{k}' kept as string key.") if config.DEBUG_MODE else None
 
+    all_data["templates"] = templates.compile_game_templates(all_data) # Immutable, typed views of items/monsters/NPCs/races for combat and targeting
     print("DATA_LOADER: Game data loading process complete.")
     return all_data
 
+_WORLD_COLLECTIONS = [("ITEMS_COLLECTION", 'DEFAULT_ITEM_TEMPLATES', "items"), ("MONSTERS_COLLECTION", 'DEFAULT_MONSTER_TEMPLATES', "monster templates"),
+                      ("NPCS_COLLECTION", 'DEFAULT_NPCS_TEMPLATES', "NPC templates"), ("ROOMS_COLLECTION", 'DEFAULT_ROOMS', "rooms"),
+                      ("LOOT_TABLES_COLLECTION", 'DEFAULT_LOOT_TABLES', "loot tables"), ("RACES_COLLECTION", 'DEFAULT_RACE_TEMPLATES', "race templates"),
+                      ("EQUIPMENT_TABLES_COLLECTION", 'DEFAULT_EQUIPMENT_TABLES', "equipment tables")]
+
+def initialize_database_with_world(world, replace=True):
+    """Seeds the game data collections from a generated world (game_data.world_generator) instead of the default modules.
+    With replace=True the collections are emptied first (player documents are left alone)."""
+    db = connection.get_db()
+    if db is None:
+        print("DATA_LOADER: ERROR - Database connection not available.")
+        return
+    print(f"DATA_LOADER: Initializing database with a generated world ({len(getattr(world, 'DEFAULT_ROOMS', {}))} rooms)...")
+    for collection_attr, data_key_name, data_desc in _WORLD_COLLECTIONS:
+        collection_name = getattr(config, collection_attr)
+        if replace: db[collection_name].delete_many({})
+        _initialize_collection(db, collection_name, world, data_key_name, data_desc)
+    print("DATA_LOADER: Generated world initialization complete.")
+
+
+def build_game_data(world):
+    """The dict load_all_game_data() would return after initialize_database_with_world(world), built without a database round trip."""
+    all_data = {"items": copy.deepcopy(getattr(world, 'DEFAULT_ITEM_TEMPLATES', {})), "loot_tables": copy.deepcopy(getattr(world, 'DEFAULT_LOOT_TABLES', {})),
+                "races": copy.deepcopy(getattr(world, 'DEFAULT_RACE_TEMPLATES', {})), "equipment_tables": {}}
+    for table_id, table_data in getattr(world, 'DEFAULT_EQUIPMENT_TABLES', {}).items():
+        all_data["equipment_tables"][table_id] = dict(copy.deepcopy(table_data), _id=table_id) if isinstance(table_data, dict) else table_data
+    for data_key, data_key_name in [("npc_templates", 'DEFAULT_NPCS_TEMPLATES'), ("monster_templates", 'DEFAULT_MONSTER_TEMPLATES')]:
+        all_data[data_key] = {}
+        for template_id, template in getattr(world, data_key_name, {}).items():
+            all_data[data_key][template_id] = _process_entity_equipment(dict(template, _id=template.get("_id", template_id)), all_data["equipment_tables"], all_data["items"])
+    all_data["rooms"] = {}
+    for k, v in getattr(world, 'DEFAULT_ROOMS', {}).items():
+        room = copy.deepcopy(v)
+        try: room["_id"] = int(k); all_data["rooms"][int(k)] = room
+        except ValueError: room["_id"] = k; all_data["rooms"][k] = room
+    all_data["templates"] = templates.compile_game_templates(all_data)
+    print(f"DATA_LOADER: Built game data for a generated world ({len(all_data['rooms'])} rooms) in memory.")
+    return all_data
+
 # ... (if __name__ == '__main__': block) ...
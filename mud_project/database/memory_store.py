@@ -0,0 +1,156 @@
+# mud_project/database/memory_store.py
+# In-process stand-in for the MongoDB database, selected with config.DATABASE_BACKEND = 'memory'.
+# It implements only the slice of the pymongo API that data_loader and player_handler use (find/find_one/count_documents,
+# insert_one/insert_many, update_one with $set/$unset and upsert, replace_one, delete_one), with equality-only filters.
+# Documents are deep-copied on the way in and out, like a real database, so callers never share state with the store.
+# Nothing is persisted: the store lives as long as the server process (meant for load tests and local capacity runs).
+import copy
+import threading
+
+try:
+    from bson import ObjectId
+except ImportError:
+    import itertools
+    _object_id_counter = itertools.count(1)
+    def ObjectId():
+        return f"mem{next(_object_id_counter):020d}"
+
+try:
+    import config
+except ImportError:
+    class MockConfigMemoryStore:
+        DEBUG_MODE = True
+    config = MockConfigMemoryStore()
+
+class InsertOneResult:
+    __slots__ = ("inserted_id",)
+    def __init__(self, inserted_id): self.inserted_id = inserted_id
+
+class InsertManyResult:
+    __slots__ = ("inserted_ids",)
+    def __init__(self, inserted_ids): self.inserted_ids = inserted_ids
+
+class UpdateResult:
+    __slots__ = ("matched_count", "modified_count", "upserted_id")
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count; self.modified_count = modified_count; self.upserted_id = upserted_id
+
+class DeleteResult:
+    __slots__ = ("deleted_count",)
+    def __init__(self, deleted_count): self.deleted_count = deleted_count
+
+def _matches(document, filter_dict):
+    if not filter_dict: return True
+    for key, expected in filter_dict.items():
+        if document.get(key) != expected: return False
+    return True
+
+def _project(document, projection):
+    """pymongo-style inclusion projection ({"field": 1}); _id is kept unless explicitly excluded."""
+    if not projection: return copy.deepcopy(document)
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    projected = {key: copy.deepcopy(value) for key, value in document.items() if key in included} if included else copy.deepcopy(document)
+    if projection.get("_id", 1) and "_id" in document: projected["_id"] = document["_id"]
+    else: projected.pop("_id", None)
+    return projected
+
+class MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self._documents = {} # _id -> document, in insertion order
+        self._lock = threading.Lock()
+
+    def _find_matching_ids(self, filter_dict, limit=None):
+        if filter_dict and set(filter_dict) == {"_id"}: # primary key lookup
+            return [filter_dict["_id"]] if filter_dict["_id"] in self._documents else []
+        matching_ids = []
+        for doc_id, document in self._documents.items():
+            if _matches(document, filter_dict):
+                matching_ids.append(doc_id)
+                if limit and len(matching_ids) >= limit: break
+        return matching_ids
+
+    def find(self, filter_dict=None, projection=None):
+        with self._lock: return [_project(self._documents[doc_id], projection) for doc_id in self._find_matching_ids(filter_dict)]
+
+    def find_one(self, filter_dict=None, projection=None):
+        with self._lock:
+            matching_ids = self._find_matching_ids(filter_dict, limit=1)
+            return _project(self._documents[matching_ids[0]], projection) if matching_ids else None
+
+    def count_documents(self, filter_dict):
+        with self._lock: return len(self._find_matching_ids(filter_dict))
+
+    def estimated_document_count(self):
+        return len(self._documents)
+
+    def _insert_locked(self, document):
+        stored = copy.deepcopy(document)
+        if stored.get("_id") is None: stored["_id"] = ObjectId()
+        if stored["_id"] in self._documents: raise ValueError(f"Duplicate _id {stored['_id']!r} in memory collection '{self.name}'.")
+        self._documents[stored["_id"]] = stored
+        return stored["_id"]
+
+    def insert_one(self, document):
+        with self._lock: return InsertOneResult(self._insert_locked(document))
+
+    def insert_many(self, documents):
+        with self._lock: return InsertManyResult([self._insert_locked(document) for document in documents])
+
+    def update_one(self, filter_dict, update, upsert=False):
+        with self._lock:
+            matching_ids = self._find_matching_ids(filter_dict, limit=1)
+            if not matching_ids:
+                if not upsert: return UpdateResult(0, 0)
+                new_document = {key: value for key, value in (filter_dict or {}).items()}
+                new_document.update(update.get("$set", {}))
+                return UpdateResult(0, 0, self._insert_locked(new_document))
+            document = self._documents[matching_ids[0]]; before = copy.deepcopy(document)
+            for key, value in update.get("$set", {}).items():
+                if key != "_id": document[key] = copy.deepcopy(value)
+            for key in update.get("$unset", {}): document.pop(key, None)
+            return UpdateResult(1, 1 if document != before else 0)
+
+    def replace_one(self, filter_dict, replacement, upsert=False):
+        with self._lock:
+            matching_ids = self._find_matching_ids(filter_dict, limit=1)
+            if not matching_ids:
+                return UpdateResult(0, 0, self._insert_locked(replacement)) if upsert else UpdateResult(0, 0)
+            stored = copy.deepcopy(replacement); stored["_id"] = matching_ids[0]
+            modified = stored != self._documents[matching_ids[0]]
+            self._documents[matching_ids[0]] = stored
+            return UpdateResult(1, 1 if modified else 0)
+
+    def delete_one(self, filter_dict):
+        with self._lock:
+            matching_ids = self._find_matching_ids(filter_dict, limit=1)
+            for doc_id in matching_ids: del self._documents[doc_id]
+            return DeleteResult(len(matching_ids))
+
+    def delete_many(self, filter_dict):
+        with self._lock:
+            matching_ids = self._find_matching_ids(filter_dict)
+            for doc_id in matching_ids: del self._documents[doc_id]
+            return DeleteResult(len(matching_ids))
+
+class MemoryDatabase:
+    """db[collection_name] returns (and creates on first use) a MemoryCollection, like a pymongo Database."""
+
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, collection_name):
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None: collection = self._collections[collection_name] = MemoryCollection(collection_name)
+            return collection
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def drop_collection(self, collection_name):
+        with self._lock: self._collections.pop(collection_name, None)
+
+if config.DEBUG_MODE: print("database.memory_store loaded.")
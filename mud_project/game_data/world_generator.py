@@ -0,0 +1,219 @@
+# mud_project/game_data/world_generator.py
+"""
+Builds synthetic worlds for scaling tests, shaped like the shipped data (DEFAULT_ROOMS, DEFAULT_MONSTER_TEMPLATES,
+DEFAULT_NPCS_TEMPLATES, DEFAULT_LOOT_TABLES), at 10k-100k rooms.
+
+The rooms sit on a grid: every room links to its west neighbour and the first column links north/south, so the world
+is always connected; extra north/south links are added until the average number of exits per room reaches
+`exit_density`. Monster and NPC templates are variations of the shipped ones, every placed NPC is its own template
+(NPC runtime ids are template keys), and loot tables draw from the shipped items. The shipped rooms are kept
+(players still start in Oakhaven) and linked to the generated grid.
+
+    world = world_generator.generate_world(room_count=50000, seed=7)
+    data_loader.initialize_database_with_world(world)   # into MongoDB / the memory store, then load_all_game_data()
+    game_data = data_loader.build_game_data(world)       # or straight into the dict load_all_game_data() returns
+
+    python -m game_data.world_generator --rooms 20000 --out world.json   (load with world_generator.load_world)
+"""
+import copy
+import json
+import math
+import random
+
+try:
+    import config
+    from game_data import default_items, default_monsters, default_npcs, default_rooms
+    from game_data import loot_tables as default_loot_data
+    from game_data import race_tables as default_race_data
+    from game_data import equipment_tables as default_equipment_data
+except ImportError as e:
+    print(f"ERROR (world_generator.py): Critical import failed. Error: {e}")
+    raise
+
+DEFAULT_NPC_FACTION_MIX = {"OakhavenCivilian": 0.6, "IndependentMerchants": 0.2, "GreenSkinMarauders": 0.1, "ScaleScourgeClan": 0.1}
+FIRST_GENERATED_ROOM_ID = 1000
+LINK_FROM_ROOM_ID = 3 # Oakhaven South Gate
+LINK_EXIT = "wilds"
+LINK_BACK_EXIT = "town"
+
+_GRID_EXITS = (("north", "south", 0, -1), ("south", "north", 0, 1), ("east", "west", 1, 0), ("west", "east", -1, 0))
+_TERRAINS = [
+    ("forest", True, "Tall pines crowd the trail, their needles muffling every step.", "Pine resin, damp moss and the cold smell of stone."),
+    ("hills", True, "Grassy hills roll away under a wide sky, cut by a narrow goat path.", "Wind-bent grass and the distant bleat of goats."),
+    ("marsh", True, "Black water pools between tussocks of reed; the ground sucks at your boots.", "Rot, stagnant water and clouds of midges."),
+    ("ruins", True, "Broken walls of an older settlement jut from the weeds like worn teeth.", "Lichen-crusted stone and the creak of a fallen beam."),
+    ("cavern", False, "The passage narrows into a low cavern, its walls slick with seeping water.", "Dripping water and a faint mineral tang."),
+    ("tunnel", False, "A rough-hewn tunnel runs on into darkness, old tool marks scoring the rock.", "Stale air, dust and old smoke."),
+]
+_ROOM_ADJECTIVES = ["Quiet", "Windswept", "Shadowed", "Overgrown", "Crumbling", "Misty", "Silent", "Twisting", "Sunken", "Forgotten"]
+_MONSTER_ADJECTIVES = ["Scarred", "Hungry", "Feral", "Old", "Young", "Pale", "Grizzled", "Wild", "Savage", "Sickly"]
+_NPC_FIRST_NAMES = ["Aldric", "Bryn", "Cora", "Dane", "Elsa", "Fenn", "Garet", "Hilde", "Ivo", "Jora", "Kell", "Lysa", "Mott", "Nessa", "Orin", "Pell"]
+_NPC_ROLES = ["Trapper", "Pilgrim", "Hermit", "Peddler", "Scout", "Warden", "Forager", "Tinker"]
+_OBJECT_KINDS = [("marker", "Weathered Trail Marker", "read marker"), ("cairn", "Moss-Covered Cairn", "search cairn"), ("log", "Hollow Log", "search log")]
+
+class SyntheticWorld:
+    """Generated data under the same names the game_data modules use, so data_loader helpers can read it like a module."""
+
+    def __init__(self, rooms, monster_templates, npc_templates, loot_tables, items, races, equipment_tables, parameters):
+        self.DEFAULT_ROOMS = rooms
+        self.DEFAULT_MONSTER_TEMPLATES = monster_templates
+        self.DEFAULT_NPCS_TEMPLATES = npc_templates
+        self.DEFAULT_LOOT_TABLES = loot_tables
+        self.DEFAULT_ITEM_TEMPLATES = items
+        self.DEFAULT_RACE_TEMPLATES = races
+        self.DEFAULT_EQUIPMENT_TABLES = equipment_tables
+        self.parameters = parameters
+
+    def summary(self):
+        exit_count = sum(len(room.get("exits", {})) for room in self.DEFAULT_ROOMS.values())
+        return {"rooms": len(self.DEFAULT_ROOMS), "exits": exit_count, "exits_per_room": round(exit_count / max(1, len(self.DEFAULT_ROOMS)), 3),
+                "monsters_placed": sum(len(room.get("monsters", [])) for room in self.DEFAULT_ROOMS.values()),
+                "npcs_placed": sum(len(room.get("npcs", [])) for room in self.DEFAULT_ROOMS.values()),
+                "monster_templates": len(self.DEFAULT_MONSTER_TEMPLATES), "npc_templates": len(self.DEFAULT_NPCS_TEMPLATES),
+                "loot_tables": len(self.DEFAULT_LOOT_TABLES)}
+
+def _count_for_density(rng, density):
+    """Whole part of the density plus one more with probability equal to the fraction (so the mean equals density)."""
+    whole = int(density)
+    return whole + (1 if rng.random() < density - whole else 0)
+
+def _weighted_choice(rng, weights_by_key):
+    keys = list(weights_by_key)
+    return rng.choices(keys, weights=[weights_by_key[key] for key in keys])[0]
+
+def generate_loot_tables(rng, item_ids, table_count, table_size):
+    min_size, max_size = table_size
+    tables = {}
+    for index in range(table_count):
+        entries = []
+        for item_id in rng.sample(item_ids, min(len(item_ids), rng.randint(min_size, max_size))):
+            quantity = 1 if rng.random() < 0.7 else [1, rng.randint(2, 4)]
+            entries.append({"item_id": item_id, "chance": round(rng.uniform(0.05, 0.8), 2), "quantity": quantity})
+        tables[f"synthetic_loot_{index:04d}"] = entries
+    return tables
+
+def generate_monster_templates(rng, template_count, loot_table_ids):
+    base_templates = [template for template in default_monsters.DEFAULT_MONSTER_TEMPLATES.values() if template.get("attack_delay", 0) < 100]
+    templates = {}
+    for index in range(template_count):
+        base = base_templates[index % len(base_templates)]; adjective = _MONSTER_ADJECTIVES[(index // len(base_templates)) % len(_MONSTER_ADJECTIVES)]
+        template_key = f"synthetic_{base['_id']}_{index:03d}"; scale = rng.uniform(0.8, 1.5)
+        template = copy.deepcopy(base)
+        template.update({"_id": template_key, "name": f"{adjective} {base['name']}",
+                         "hp": max(1, int(base["hp"] * scale)), "max_hp": max(1, int(base["max_hp"] * scale)),
+                         "stats": {stat: min(100, max(1, int(value * rng.uniform(0.85, 1.2)))) for stat, value in base.get("stats", {}).items()},
+                         "xp_value": int(base.get("xp_value", 0) * scale), "loot_table_id": rng.choice(loot_table_ids),
+                         "keywords": sorted(set(base.get("keywords", []) + [adjective.lower()]))})
+        templates[template_key] = template
+    return templates
+
+def generate_npc_template(rng, room_id, faction_mix, loot_table_ids):
+    base_templates = list(default_npcs.DEFAULT_NPCS_TEMPLATES.values())
+    base = rng.choice(base_templates); faction_id = _weighted_choice(rng, faction_mix)
+    first_name = rng.choice(_NPC_FIRST_NAMES); role = rng.choice(_NPC_ROLES)
+    template_key = f"synthetic_npc_{room_id}"
+    template = copy.deepcopy(base)
+    template.update({"_id": template_key, "name": f"{first_name} the {role}", "faction_id": faction_id,
+                     "faction_hits_on_kill": [{"faction_id": faction_id, "amount": -rng.randint(20, 200)}],
+                     "keywords": [first_name.lower(), role.lower()], "loot_table_id": rng.choice(loot_table_ids),
+                     "spawn_config": {"respawn_time_seconds": rng.randint(120, 600), "spawn_chance": 1.0, "max_instances": 1, "is_unique": True}})
+    aggression = dict(template.get("aggression_behavior", {}))
+    aggression["hostile_factions"] = [other for other in faction_mix if other != faction_id and rng.random() < 0.5]
+    template["aggression_behavior"] = aggression
+    return template_key, template
+
+def _room_description(rng, terrain):
+    terrain_name, _, sight, senses = terrain
+    return f"{sight} {senses} The {terrain_name} stretches on in every direction you can see."
+
+def generate_world(room_count=10000, exit_density=2.6, monster_density=0.3, npc_density=0.03, item_density=0.1, object_density=0.05,
+                   npc_faction_mix=None, monster_template_count=40, loot_table_count=60, loot_table_size=(2, 6), zone_size=400,
+                   include_default_rooms=True, seed=1):
+    """Returns a SyntheticWorld with `room_count` generated rooms (plus the shipped rooms when include_default_rooms).
+    exit_density is the average number of exits per generated room (2.0 = just connected, 4.0 = full grid);
+    monster/npc/item/object densities are averages per room; npc_faction_mix maps faction id -> weight."""
+    rng = random.Random(f"world:{seed}")
+    npc_faction_mix = npc_faction_mix or DEFAULT_NPC_FACTION_MIX
+    item_ids = sorted(default_items.DEFAULT_ITEM_TEMPLATES)
+    loot_tables = copy.deepcopy(default_loot_data.DEFAULT_LOOT_TABLES); generated_loot_tables = generate_loot_tables(rng, item_ids, loot_table_count, loot_table_size)
+    loot_tables.update(generated_loot_tables); generated_loot_table_ids = sorted(generated_loot_tables)
+    monster_templates = copy.deepcopy(default_monsters.DEFAULT_MONSTER_TEMPLATES); generated_monsters = generate_monster_templates(rng, monster_template_count, generated_loot_table_ids)
+    monster_templates.update(generated_monsters); generated_monster_keys = sorted(generated_monsters)
+    npc_templates = copy.deepcopy(default_npcs.DEFAULT_NPCS_TEMPLATES)
+    rooms = copy.deepcopy(default_rooms.DEFAULT_ROOMS) if include_default_rooms else {}
+
+    width = max(1, int(math.ceil(math.sqrt(room_count))))
+    extra_link_chance = min(1.0, max(0.0, (exit_density - 2.0) / 2.0))
+    room_ids = [FIRST_GENERATED_ROOM_ID + index for index in range(room_count)]
+    for index, room_id in enumerate(room_ids):
+        x, y = index % width, index // width
+        zone_index = (y // max(1, int(math.sqrt(zone_size)))) * (width // max(1, int(math.sqrt(zone_size))) + 1) + x // max(1, int(math.sqrt(zone_size)))
+        terrain = _TERRAINS[(zone_index * 7 + rng.randint(0, 1)) % len(_TERRAINS)]
+        room = {"id": room_id, "name": f"{rng.choice(_ROOM_ADJECTIVES)} {terrain[0].title()}", "occupancy": rng.choice([2, 4, 8, 30]),
+                "tags": [terrain[0], "synthetic"], "zone": f"synthetic_{zone_index}",
+                "searching": True, "hiding": True, "pvp": False, "shouting": True,
+                "is_outdoor": terrain[1], "is_underground": not terrain[1], "xp_modifier": 1.0, "is_node": False, "xp_absorbtion_modifier": 1.0,
+                "description": _room_description(rng, terrain), "ambient_sounds": [], "ambient_smells": [], "touch_textures": [],
+                "exits": {}, "items": [], "npcs": [], "monsters": [], "objects": {},
+                "passive_perception_required": False, "active_perception_required": False,
+                "hidden_items": [], "hidden_npcs": [], "hidden_monsters": [], "hidden_objects": [], "monster_spawns": [], "visited": False,
+                "on_enter_script": None, "on_linger_script": None, "on_exit_script": None, "trap_script": None}
+        if terrain[1] and rng.random() < 0.5: room["description_night"] = f"Night has settled over the {terrain[0]}. {terrain[3]}"
+        for _ in range(_count_for_density(rng, monster_density)): room["monsters"].append(rng.choice(generated_monster_keys))
+        if rng.random() < npc_density:
+            npc_key, npc_template = generate_npc_template(rng, room_id, npc_faction_mix, generated_loot_table_ids)
+            npc_templates[npc_key] = npc_template; room["npcs"].append(npc_key)
+        for _ in range(_count_for_density(rng, item_density)): room["items"].append(rng.choice(item_ids))
+        if rng.random() < object_density:
+            object_key, object_name, action_phrase = rng.choice(_OBJECT_KINDS)
+            room["objects"][object_key] = {"name": object_name, "description": f"A {object_name.lower()} stands here.", "interactable": True,
+                                           "actions": {action_phrase: "synthetic_flavour_text"}, "keywords": [object_key, object_name.lower()]}
+        rooms[room_id] = room
+
+    def link(from_index, to_index, exit_key, back_exit_key):
+        rooms[room_ids[from_index]]["exits"][exit_key] = room_ids[to_index]; rooms[room_ids[to_index]]["exits"][back_exit_key] = room_ids[from_index]
+    for index in range(room_count):
+        x, y = index % width, index // width
+        if x > 0: link(index, index - 1, "west", "east") # rows are chains...
+        if y > 0 and (x == 0 or rng.random() < extra_link_chance): link(index, index - width, "north", "south") # ...joined by the first column
+    if include_default_rooms and room_ids and LINK_FROM_ROOM_ID in rooms:
+        rooms[LINK_FROM_ROOM_ID]["exits"][LINK_EXIT] = room_ids[0]; rooms[room_ids[0]]["exits"][LINK_BACK_EXIT] = LINK_FROM_ROOM_ID
+
+    parameters = {"room_count": room_count, "exit_density": exit_density, "monster_density": monster_density, "npc_density": npc_density,
+                  "item_density": item_density, "object_density": object_density, "npc_faction_mix": npc_faction_mix,
+                  "monster_template_count": monster_template_count, "loot_table_count": loot_table_count, "loot_table_size": list(loot_table_size),
+                  "zone_size": zone_size, "include_default_rooms": include_default_rooms, "seed": seed}
+    world = SyntheticWorld(rooms, monster_templates, npc_templates, loot_tables, copy.deepcopy(default_items.DEFAULT_ITEM_TEMPLATES),
+                           copy.deepcopy(default_race_data.DEFAULT_RACE_TEMPLATES), copy.deepcopy(default_equipment_data.DEFAULT_EQUIPMENT_TABLES), parameters)
+    if config.DEBUG_MODE: print(f"WORLD_GENERATOR: {world.summary()}")
+    return world
+
+_WORLD_FIELDS = ["DEFAULT_ROOMS", "DEFAULT_MONSTER_TEMPLATES", "DEFAULT_NPCS_TEMPLATES", "DEFAULT_LOOT_TABLES", "DEFAULT_ITEM_TEMPLATES", "DEFAULT_RACE_TEMPLATES", "DEFAULT_EQUIPMENT_TABLES"]
+
+def save_world(world, path):
+    with open(path, "w") as f:
+        json.dump(dict({field: getattr(world, field) for field in _WORLD_FIELDS}, parameters=world.parameters), f)
+
+def load_world(path):
+    with open(path) as f: data = json.load(f)
+    rooms = {}
+    for room_key, room in data["DEFAULT_ROOMS"].items(): # JSON object keys are strings; room ids are ints
+        rooms[int(room_key) if room_key.lstrip("-").isdigit() else room_key] = room
+        room["exits"] = {exit_key: int(destination) if isinstance(destination, str) and destination.isdigit() else destination for exit_key, destination in room.get("exits", {}).items()}
+    return SyntheticWorld(rooms, data["DEFAULT_MONSTER_TEMPLATES"], data["DEFAULT_NPCS_TEMPLATES"], data["DEFAULT_LOOT_TABLES"],
+                          data["DEFAULT_ITEM_TEMPLATES"], data["DEFAULT_RACE_TEMPLATES"], data["DEFAULT_EQUIPMENT_TABLES"], data.get("parameters", {}))
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic world for scaling tests.")
+    parser.add_argument("--rooms", type=int, default=10000); parser.add_argument("--exit-density", type=float, default=2.6)
+    parser.add_argument("--monster-density", type=float, default=0.3); parser.add_argument("--npc-density", type=float, default=0.03)
+    parser.add_argument("--monster-templates", type=int, default=40); parser.add_argument("--loot-tables", type=int, default=60)
+    parser.add_argument("--loot-table-size", type=int, nargs=2, default=[2, 6]); parser.add_argument("--zone-size", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1); parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    generated_world = generate_world(room_count=args.rooms, exit_density=args.exit_density, monster_density=args.monster_density, npc_density=args.npc_density,
+                                     monster_template_count=args.monster_templates, loot_table_count=args.loot_tables, loot_table_size=tuple(args.loot_table_size),
+                                     zone_size=args.zone_size, seed=args.seed)
+    save_world(generated_world, args.out)
+    print(f"Wrote {args.out}: {generated_world.summary()}")
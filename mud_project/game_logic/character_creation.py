@@ -1,5 +1,4 @@
 # mud_project/game_logic/character_creation.py
-import random
 import time 
 
 try:
@@ -104,17 +103,19 @@ except ImportError:
         DEBUG_MODE = True
     config = MockConfig()
 
+from . import determinism
+
 
 # ... (generate_stat_pool, start_character_creation are fine from your uploaded file) ...
 def generate_stat_pool(quick_creation=False):
     if quick_creation:
         return [60] * len(config.ALL_STATS_ORDERED) # All stats at 60 for quick
     # Your existing stat rolling logic
-    pool = [random.randint(20, 90)] 
-    for _ in range(3): pool.append(random.randint(60, 80)) 
-    for _ in range(4): pool.append(random.randint(49, 73))
-    for _ in range(4): pool.append(random.randint(35, 70))
-    random.shuffle(pool)
+    pool = [determinism.rng(determinism.STREAM_CHARACTER_CREATION).randint(20, 90)] 
+    for _ in range(3): pool.append(determinism.rng(determinism.STREAM_CHARACTER_CREATION).randint(60, 80)) 
+    for _ in range(4): pool.append(determinism.rng(determinism.STREAM_CHARACTER_CREATION).randint(49, 73))
+    for _ in range(4): pool.append(determinism.rng(determinism.STREAM_CHARACTER_CREATION).randint(35, 70))
+    determinism.rng(determinism.STREAM_CHARACTER_CREATION).shuffle(pool)
     return pool[:len(config.ALL_STATS_ORDERED)]
 
 
@@ -7,6 +7,11 @@ import math
 try:
     import config
     from classes import player as player_class 
+    from classes import templates
+    from classes import monster as monster_registry
+    from . import room_state
+    from . import determinism
+    from . import entity_state
 except ImportError:
     class MockConfigCombat:
         DEBUG_MODE = True; STAT_BONUS_BASELINE = 50; MELEE_AS_STAT_BONUS_DIVISOR = 20
@@ -28,8 +33,45 @@ except ImportError:
             def get_armor_type(self, items): return config.DEFAULT_UNARMORED_TYPE
         player_class = MockPlayer
 
-RUNTIME_ENTITY_HP = {} 
-RECENTLY_DEFEATED_TARGETS_IN_ROOM = {} 
+try:
+    import numpy
+except ImportError:
+    numpy = None # Optional: resolve_entity_attack_batch falls back to plain Python arithmetic
+
+RUNTIME_ENTITY_HP = entity_state.ENTITY_STATE.hp # NPC runtime id -> HP; monsters keep theirs on their MonsterInstance
+RECENTLY_DEFEATED_TARGETS_IN_ROOM = entity_state.ENTITY_STATE.defeated # NPC runtime id -> True while down; monsters use MonsterInstance.defeated
+GAME_TEMPLATES = templates.GameTemplates() # Compiled item/entity templates, bound by main.load_game_world
+ENTITY_COMBAT_PROFILES = {} # (kind, template key) -> CombatProfile; templates are immutable, so these live until clear_combat_profiles()
+
+# --- Runtime entity state: integer ids are monster instances (classes.monster), anything else an NPC key ---
+def is_entity_defeated(runtime_id) -> bool:
+    instance = monster_registry.get(runtime_id)
+    return instance.defeated if instance is not None else bool(RECENTLY_DEFEATED_TARGETS_IN_ROOM.get(runtime_id))
+
+def get_entity_hp(runtime_id, max_hp: int) -> int:
+    instance = monster_registry.get(runtime_id)
+    if instance is not None: return max_hp if instance.hp is None else instance.hp
+    return RUNTIME_ENTITY_HP.get(runtime_id, max_hp) # no entry until first hit: untouched NPCs cost nothing
+
+def set_entity_hp(runtime_id, hp: int):
+    instance = monster_registry.get(runtime_id)
+    if instance is not None: instance.hp = hp
+    else: RUNTIME_ENTITY_HP[runtime_id] = hp
+    entity_state.ENTITY_STATE.touch_hp(runtime_id)
+
+def mark_entity_defeated(runtime_id, room_id=None):
+    """room_id: where an NPC went down (a monster instance knows its own room), so that room's render goes stale."""
+    instance = monster_registry.get(runtime_id)
+    if instance is not None: instance.defeated = True; room_id = instance.room_id
+    else: RECENTLY_DEFEATED_TARGETS_IN_ROOM[runtime_id] = True
+    if room_id is not None: room_state.bump_room_version(room_id)
+
+def revive_entity(runtime_id, room_id=None):
+    """Full HP and no longer defeated (respawn)."""
+    instance = monster_registry.get(runtime_id)
+    if instance is not None: instance.revive(); room_id = instance.room_id
+    entity_state.ENTITY_STATE.forget_hp(runtime_id)
+    if room_id is not None: room_state.bump_room_version(room_id)
 
 def parse_and_roll_dice(dice_string: str) -> int:
     if not isinstance(dice_string, str): return 0
@@ -40,7 +82,7 @@ def parse_and_roll_dice(dice_string: str) -> int:
     num_dice, dice_sides = int(match.group(1)), int(match.group(2))
     modifier = int(match.group(3)) if match.group(3) else 0
     if num_dice <= 0 or dice_sides <= 0: return modifier
-    return sum(random.randint(1, dice_sides) for _ in range(num_dice)) + modifier
+    return sum(determinism.rng(determinism.STREAM_COMBAT).randint(1, dice_sides) for _ in range(num_dice)) + modifier
 
 def get_stat_bonus(stat_value: int, baseline: int, divisor: int) -> int:
     if divisor == 0: return 0
@@ -50,27 +92,74 @@ def get_skill_bonus(skill_value: int, divisor: int) -> int:
     if divisor == 0: return 0
     return skill_value // divisor 
 
+def get_item_template(item_id, game_items_global: dict | None = None):
+    """The compiled ItemTemplate for an item id (compiled from game_items_global if the registry lacks it), else None."""
+    if not item_id: return None
+    compiled = GAME_TEMPLATES.items.get(item_id)
+    if compiled is None and game_items_global:
+        item_data = game_items_global.get(item_id)
+        if item_data: compiled = templates.ItemTemplate(item_id, item_data)
+    return compiled
+
+def get_player_armor(player, game_items_global: dict | None = None):
+    """(armor_type, torso ItemTemplate or None, offhand ItemTemplate or None) for a player's current equipment."""
+    armor = get_item_template(player.equipped_items.get(templates.TORSO_SLOT_KEY), game_items_global)
+    shield = get_item_template(player.equipped_items.get(templates.OFFHAND_SLOT_KEY), game_items_global)
+    return (armor.armor_type if armor is not None and armor.is_armor else config.DEFAULT_UNARMORED_TYPE), armor, shield
+
 def get_entity_armor_type(entity_data_runtime, game_items_global: dict) -> str:
-    equipped_items_dict = {}
-    if isinstance(entity_data_runtime, player_class.Player): 
-        equipped_items_dict = entity_data_runtime.equipped_items
-    elif isinstance(entity_data_runtime, dict):
-        equipped_items_dict = entity_data_runtime.get("equipped", {})
-    torso_slot_key = next((key for key, val in config.EQUIPMENT_SLOTS.items() if "torso" in key.lower() or "chest" in key.lower()), "torso")
-    chest_item_id = equipped_items_dict.get(torso_slot_key)
-    if chest_item_id and game_items_global:
-        chest_item_data = game_items_global.get(chest_item_id)
-        if chest_item_data and chest_item_data.get("type") == "armor":
-            return chest_item_data.get("armor_type", config.DEFAULT_UNARMORED_TYPE)
+    if isinstance(entity_data_runtime, player_class.Player): return get_player_armor(entity_data_runtime, game_items_global)[0]
+    if isinstance(entity_data_runtime, templates.EntityTemplate): return entity_data_runtime.armor_type
     if isinstance(entity_data_runtime, dict):
+        chest_item = get_item_template(entity_data_runtime.get("equipped", {}).get(templates.TORSO_SLOT_KEY), game_items_global)
+        if chest_item is not None and chest_item.is_armor: return chest_item.armor_type
         return entity_data_runtime.get("innate_armor_type", config.DEFAULT_UNARMORED_TYPE)
     return config.DEFAULT_UNARMORED_TYPE
 
+class CombatProfile:
+    """The gear- and stat-derived half of a swing, computed once per combat_version: the weapon, armor and shield in use,
+    the defender's DS and the attacker's AS per target armor type (filled in as armor types are met)."""
+    __slots__ = ("version", "name", "stats", "skills", "weapon", "armor_type", "armor", "shield", "defense_strength", "attack_strength_by_armor")
+
+    def __init__(self, version, name, stats, skills, weapon, armor_type, armor, shield, stance=None):
+        self.version = version; self.name = name; self.stats = stats; self.skills = skills
+        self.weapon = weapon; self.armor_type = armor_type; self.armor = armor; self.shield = shield
+        self.defense_strength = calculate_defense_strength(name, stats, skills, armor, shield, stance)
+        self.attack_strength_by_armor = {}
+
+    def attack_strength(self, target_armor_type):
+        attack_strength = self.attack_strength_by_armor.get(target_armor_type)
+        if attack_strength is None:
+            attack_strength = self.attack_strength_by_armor[target_armor_type] = calculate_attack_strength(self.name, self.stats, self.skills, self.weapon, target_armor_type)
+        return attack_strength
+
+def get_player_combat_profile(player, game_items_global: dict | None = None) -> CombatProfile:
+    """The player's cached profile, rebuilt when player.combat_version has moved on (equip, unequip, derived stat recalculation)."""
+    profile = getattr(player, 'combat_profile', None); version = getattr(player, 'combat_version', 0)
+    if profile is None or profile.version != version:
+        armor_type, armor, shield = get_player_armor(player, game_items_global)
+        profile = CombatProfile(version, player.name, player.stats, player.skills, get_item_template(player.equipped_items.get(templates.MAINHAND_SLOT_KEY), game_items_global), armor_type, armor, shield)
+        player.combat_profile = profile
+    return profile
+
+def get_entity_combat_profile(entity_template) -> CombatProfile:
+    profile_key = (entity_template.kind, entity_template.key); profile = ENTITY_COMBAT_PROFILES.get(profile_key)
+    if profile is None:
+        profile = ENTITY_COMBAT_PROFILES[profile_key] = CombatProfile(0, entity_template.name or "entity", entity_template.stats, entity_template.skills, entity_template.weapon,
+                                                                      entity_template.armor_type, entity_template.armor, entity_template.shield, entity_template.current_stance)
+    return profile
+
+def clear_combat_profiles():
+    """Drops the entity profiles (after the templates are reloaded); player profiles follow their combat_version."""
+    ENTITY_COMBAT_PROFILES.clear()
+
 def calculate_attack_strength(attacker_name: str, attacker_stats: dict, attacker_skills: dict, 
-                              weapon_item_data: dict | None, target_armor_type: str) -> int:
+                              weapon_item_data, target_armor_type: str) -> int:
+    """weapon_item_data: a compiled ItemTemplate (or a raw item template dict, compiled on the way in), or None."""
     as_val = 0; as_components_log = [] 
     weapon_name_display = "Barehanded"
-    if not weapon_item_data or weapon_item_data.get("type") != "weapon":
+    weapon = templates.as_item_template(weapon_item_data, GAME_TEMPLATES.items)
+    if weapon is None or not weapon.is_weapon:
         strength_barehanded = attacker_stats.get("strength", config.STAT_BONUS_BASELINE)
         str_bonus_barehanded = get_stat_bonus(strength_barehanded, config.STAT_BONUS_BASELINE, config.MELEE_AS_STAT_BONUS_DIVISOR)
         as_val += str_bonus_barehanded; as_components_log.append(f"Str({str_bonus_barehanded})")
@@ -81,21 +170,21 @@ def calculate_attack_strength(attacker_name: str, attacker_stats: dict, attacker
         as_val += base_barehanded_as
         if base_barehanded_as != 0: as_components_log.append(f"BaseAS({base_barehanded_as})")
     else:
-        weapon_name_display = weapon_item_data.get("name", "Unknown Weapon")
+        weapon_name_display = weapon.name or "Unknown Weapon"
         strength = attacker_stats.get("strength", config.STAT_BONUS_BASELINE)
         str_bonus = get_stat_bonus(strength, config.STAT_BONUS_BASELINE, config.MELEE_AS_STAT_BONUS_DIVISOR)
         as_val += str_bonus; as_components_log.append(f"Str({str_bonus})")
-        weapon_skill_name = weapon_item_data.get("skill"); skill_bonus_val = 0
+        weapon_skill_name = weapon.skill; skill_bonus_val = 0
         if weapon_skill_name:
             skill_rank = attacker_skills.get(weapon_skill_name, 0) # Will use 0 if skill not in dict
             skill_bonus_val = get_skill_bonus(skill_rank, config.WEAPON_SKILL_AS_BONUS_DIVISOR)
             as_val += skill_bonus_val; as_components_log.append(f"Skill({skill_bonus_val})")
-        weapon_base_as = weapon_item_data.get("weapon_as_bonus", 0) 
+        weapon_base_as = weapon.weapon_as_bonus
         as_val += weapon_base_as; as_components_log.append(f"WpnAS({weapon_base_as})")
-        enchant_as = weapon_item_data.get("enchantment_as_bonus", 0)
+        enchant_as = weapon.enchantment_as_bonus
         as_val += enchant_as
         if enchant_as != 0: as_components_log.append(f"EnchAS({enchant_as})")
-        avd_mods = weapon_item_data.get("avd_modifiers", {})
+        avd_mods = weapon.avd_modifiers
         avd_bonus = avd_mods.get(target_armor_type, avd_mods.get(config.DEFAULT_UNARMORED_TYPE, 0))
         as_val += avd_bonus 
         if avd_bonus != 0: as_components_log.append(f"ItemAvD({avd_bonus})")
@@ -104,27 +193,29 @@ def calculate_attack_strength(attacker_name: str, attacker_stats: dict, attacker
     return as_val
 
 def calculate_defense_strength(defender_name: str, defender_stats: dict, defender_skills: dict, 
-                               armor_item_data: dict | None, shield_item_data: dict | None, 
+                               armor_item_data, shield_item_data, 
                                defender_stance=None) -> int:
+    """armor_item_data / shield_item_data: compiled ItemTemplates (or raw item template dicts), or None."""
     ds_val = 0; ds_components_log = []
+    armor = templates.as_item_template(armor_item_data, GAME_TEMPLATES.items); shield = templates.as_item_template(shield_item_data, GAME_TEMPLATES.items)
     armor_name_display = "Unarmored"; shield_name_display = "No Shield"
     agility_stat = defender_stats.get("agility", config.STAT_BONUS_BASELINE)
     ds_stat_divisor = getattr(config, 'MELEE_DS_STAT_BONUS_DIVISOR', 10) 
     agi_bonus = get_stat_bonus(agility_stat, config.STAT_BONUS_BASELINE, ds_stat_divisor)
     ds_val += agi_bonus; ds_components_log.append(f"Agi({agi_bonus})")
     armor_ds_bonus = 0
-    if armor_item_data and armor_item_data.get("type") == "armor":
-        armor_ds_bonus = armor_item_data.get("armor_ds_bonus", 0)
-        armor_name_display = armor_item_data.get("name", "Unknown Armor")
+    if armor is not None and armor.is_armor:
+        armor_ds_bonus = armor.armor_ds_bonus
+        armor_name_display = armor.name or "Unknown Armor"
         ds_val += armor_ds_bonus; ds_components_log.append(f"Armor({armor_ds_bonus})")
     else:
         unarmored_ds = getattr(config, 'UNARMORED_BASE_DS', 0)
         ds_val += unarmored_ds
         if unarmored_ds !=0: ds_components_log.append(f"BaseDS({unarmored_ds})")
     shield_base_bonus = 0
-    if shield_item_data and shield_item_data.get("type") == "shield":
-        shield_base_bonus = shield_item_data.get("shield_ds_bonus", 0)
-        shield_name_display = shield_item_data.get("name", "Unknown Shield")
+    if shield is not None and shield.is_shield:
+        shield_base_bonus = shield.shield_ds_bonus
+        shield_name_display = shield.name or "Unknown Shield"
         ds_val += shield_base_bonus; ds_components_log.append(f"Shield({shield_base_bonus})")
         shield_skill_rank = defender_skills.get("shield_use", 0)
         shield_skill_divisor = getattr(config, 'SHIELD_SKILL_DS_BONUS_DIVISOR', 10)
@@ -137,41 +228,31 @@ def calculate_defense_strength(defender_name: str, defender_stats: dict, defende
 
 def handle_player_attack(player: player_class.Player, target_data: dict, target_type: str,
                          target_name_raw_from_player: str, game_items_global: dict,
-                         monster_runtime_id: str | None = None, monster_instance_index: int | None = None):
+                         monster_runtime_id: int | None = None):
     GAME_ITEMS = game_items_global
     template_key = target_data.get("_id", target_data.get("key", "unknown_key"))
     target_display_name = target_data.get("name", "the creature")
-    entity_runtime_id = monster_runtime_id
-    if not entity_runtime_id:
-        if target_type == "npc": entity_runtime_id = template_key 
-        elif target_type == "monster": entity_runtime_id = f"{player.current_room_id}_{template_key}_{monster_instance_index if monster_instance_index is not None else 0}"
+    entity_runtime_id = monster_runtime_id if monster_runtime_id is not None else template_key # monsters are always targeted by instance id
     if config.DEBUG_MODE: print(f"DEBUG COMBAT: {player.name} attacking {target_display_name} (Type: {target_type}, TplKey: {template_key}). RuntimeID: {entity_runtime_id}.")
 
-    if RECENTLY_DEFEATED_TARGETS_IN_ROOM.get(entity_runtime_id):
+    if is_entity_defeated(entity_runtime_id):
         player.add_message(f"The {target_display_name} is already defeated!", "feedback")
         return {'hit': False, 'damage': 0, 'defeated': True, 'already_defeated': True, 'target_name': target_display_name, 'target_key': template_key, 'target_runtime_id': entity_runtime_id, 'broadcast_message': ""}
-    max_hp_from_template = target_data.get("max_hp", target_data.get("hp", 25))
-    if entity_runtime_id not in RUNTIME_ENTITY_HP: RUNTIME_ENTITY_HP[entity_runtime_id] = max_hp_from_template
-    current_hp = RUNTIME_ENTITY_HP[entity_runtime_id]
+    target_template = templates.as_entity_template(target_data, target_type, GAME_TEMPLATES)
+    max_hp_from_template = target_template.max_hp
+    current_hp = get_entity_hp(entity_runtime_id, max_hp_from_template)
     if current_hp <= 0: 
         player.add_message(f"The {target_display_name} is already incapacitated!", "feedback")
-        RECENTLY_DEFEATED_TARGETS_IN_ROOM[entity_runtime_id] = True 
+        mark_entity_defeated(entity_runtime_id, player.current_room_id)
         return {'hit': False, 'damage': 0, 'defeated': True, 'already_defeated': True, 'target_name': target_display_name, 'target_key': template_key, 'target_runtime_id': entity_runtime_id, 'broadcast_message': ""}
 
-    attacker_weapon_data = player.get_equipped_item_data("mainhand", GAME_ITEMS)
-    weapon_name_for_msg = attacker_weapon_data.get("name", "your fist") if attacker_weapon_data else "your fist"
+    attacker_profile = get_player_combat_profile(player, GAME_ITEMS); attacker_weapon = attacker_profile.weapon
+    weapon_name_for_msg = (attacker_weapon.name or "your fist") if attacker_weapon else "your fist"
     player.add_message(f"You swing your {weapon_name_for_msg} at the {target_display_name}!", "combat_action_player")
 
-    target_armor_type_str = get_entity_armor_type(target_data, GAME_ITEMS)
-    torso_slot_key = next((k for k,v in config.EQUIPMENT_SLOTS.items() if "torso" in k.lower()), "torso")
-    offhand_slot_key = next((k for k,v in config.EQUIPMENT_SLOTS.items() if "offhand" in k.lower()), "offhand")
-    target_armor_item_id = target_data.get("equipped", {}).get(torso_slot_key)
-    target_armor_data = GAME_ITEMS.get(target_armor_item_id) if target_armor_item_id else None
-    target_shield_item_id = target_data.get("equipped", {}).get(offhand_slot_key)
-    target_shield_data = GAME_ITEMS.get(target_shield_item_id) if target_shield_item_id else None
-    attacker_as = calculate_attack_strength(player.name, player.stats, player.skills, attacker_weapon_data, target_armor_type_str)
-    defender_ds = calculate_defense_strength(target_display_name, target_data.get("stats", {}), target_data.get("skills", {}), target_armor_data, target_shield_data, target_data.get("current_stance"))
-    d100_roll = random.randint(1, 100)
+    attacker_as = attacker_profile.attack_strength(target_template.armor_type)
+    defender_ds = get_entity_combat_profile(target_template).defense_strength
+    d100_roll = determinism.rng(determinism.STREAM_COMBAT).randint(1, 100)
     combat_roll_result = (attacker_as - defender_ds) + config.COMBAT_ADVANTAGE_FACTOR + d100_roll
     
     roll_string = f"  AS: {attacker_as:+} vs DS: {defender_ds:+} with AvD: {config.COMBAT_ADVANTAGE_FACTOR:+} + d100 roll: {d100_roll:+} = {combat_roll_result:+}"
@@ -183,7 +264,7 @@ def handle_player_attack(player: player_class.Player, target_data: dict, target_
     if combat_roll_result > config.COMBAT_HIT_THRESHOLD:
         combat_results_dict['hit'] = True
         flat_base_damage_component = 0
-        if attacker_weapon_data: flat_base_damage_component = attacker_weapon_data.get("weapon_as_bonus", 0) + attacker_weapon_data.get("enchantment_as_bonus", 0)
+        if attacker_weapon: flat_base_damage_component = attacker_weapon.weapon_as_bonus + attacker_weapon.enchantment_as_bonus
         else: flat_base_damage_component = getattr(config, 'BAREHANDED_FLAT_DAMAGE', 1)
         if config.DEBUG_MODE and getattr(config, 'DEBUG_COMBAT_ROLLS', False): print(f"DEBUG DMG (Player): Base Dmg Comp: {flat_base_damage_component}")
         
@@ -192,11 +273,11 @@ def handle_player_attack(player: player_class.Player, target_data: dict, target_
         combat_results_dict['damage'] = total_damage
         player.add_message(f"  ...and HIT the {target_display_name} for {total_damage} damage!", "combat_hit_player")
         broadcast_msg_base += f" and HITS for {total_damage} damage!"
-        current_hp -= total_damage; RUNTIME_ENTITY_HP[entity_runtime_id] = current_hp
+        current_hp -= total_damage; set_entity_hp(entity_runtime_id, current_hp)
         if current_hp <= 0:
             player.add_message(f"  The {target_display_name} collapses, defeated!", "combat_defeat_player")
             broadcast_msg_base += f" The {target_display_name} is DEFEATED!"
-            combat_results_dict['defeated'] = True; RECENTLY_DEFEATED_TARGETS_IN_ROOM[entity_runtime_id] = True 
+            combat_results_dict['defeated'] = True; mark_entity_defeated(entity_runtime_id, player.current_room_id)
             if config.DEBUG_MODE: print(f"DEBUG COMBAT: {target_display_name} (RuntimeID: {entity_runtime_id}) DEFEATED by {player.name}. HP: {current_hp}/{max_hp_from_template}")
         else:
             player.add_message(f"  The {target_display_name} looks wounded. (Est. HP: {current_hp}/{max_hp_from_template})", "combat_status_target")
@@ -206,31 +287,52 @@ def handle_player_attack(player: player_class.Player, target_data: dict, target_
         broadcast_msg_base += " and MISSES!"
         
     combat_results_dict['broadcast_message'] = broadcast_msg_base
-    player.next_action_time = time.time() + config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0)
+    player.next_action_time = determinism.now() + config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0)
     player.add_message(f"Roundtime: {config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0):.1f} sec.", "system_info")
     return combat_results_dict
 
-def handle_entity_attack(attacker_entity_data: dict, attacker_entity_type: str, attacker_runtime_id: str, 
-                         defender_player: player_class.Player, game_items_global: dict):
-    GAME_ITEMS = game_items_global
-    attacker_display_name = attacker_entity_data.get("name", "A creature")
-    if defender_player.hp <= 0: 
-        return {'hit': False, 'damage': 0, 'defender_defeated': True, 'already_defeated': True, 'attacker_message':"", 'defender_message':None, 'broadcast_message':""}
+class EntityAttack:
+    """One monster/NPC swing at a player, with everything but the d100 roll worked out (see prepare_entity_attack)."""
+    __slots__ = ("attacker_runtime_id", "attacker_name", "defender", "room_id", "weapon_name", "attack_strength", "defense_strength", "flat_damage")
 
-    attacker_weapon_data = None
-    mainhand_item_id = attacker_entity_data.get("equipped", {}).get("mainhand")
-    if mainhand_item_id: attacker_weapon_data = GAME_ITEMS.get(mainhand_item_id)
-    weapon_name_for_msg = attacker_weapon_data.get("name", "its natural weapons") if attacker_weapon_data else "its natural weapons"
-    
-    defender_player.add_message(f"The {attacker_display_name} swings its {weapon_name_for_msg} at you!", "combat_action_opponent")
+    def __init__(self, attacker_runtime_id, attacker_name, defender, weapon_name, attack_strength, defense_strength, flat_damage):
+        self.attacker_runtime_id = attacker_runtime_id; self.attacker_name = attacker_name; self.defender = defender; self.room_id = defender.current_room_id
+        self.weapon_name = weapon_name; self.attack_strength = attack_strength; self.defense_strength = defense_strength; self.flat_damage = flat_damage
 
-    defender_armor_type_str = defender_player.get_armor_type(GAME_ITEMS)
-    defender_armor_data = defender_player.get_equipped_item_data("torso", GAME_ITEMS)
-    defender_shield_data = defender_player.get_equipped_item_data("offhand", GAME_ITEMS)
-    attacker_as = calculate_attack_strength(attacker_display_name, attacker_entity_data.get("stats", {}), attacker_entity_data.get("skills", {}), attacker_weapon_data, defender_armor_type_str)
-    defender_ds = calculate_defense_strength(defender_player.name, defender_player.stats, defender_player.skills, defender_armor_data, defender_shield_data, None)
-    d100_roll = random.randint(1, 100)
-    combat_roll_result = (attacker_as - defender_ds) + config.COMBAT_ADVANTAGE_FACTOR + d100_roll
+def prepare_entity_attack(attacker_entity_data, attacker_entity_type: str, attacker_runtime_id: int | str,
+                          defender_player: player_class.Player, game_items_global: dict) -> EntityAttack:
+    attacker_template = templates.as_entity_template(attacker_entity_data, attacker_entity_type, GAME_TEMPLATES)
+    attacker_weapon = attacker_template.weapon; defender_profile = get_player_combat_profile(defender_player, game_items_global)
+    weapon_name_for_msg = (attacker_weapon.name or "its natural weapons") if attacker_weapon else "its natural weapons"
+    if attacker_weapon and attacker_weapon.is_weapon: flat_base_damage_component = attacker_weapon.weapon_as_bonus + attacker_weapon.enchantment_as_bonus
+    else: flat_base_damage_component = getattr(config, 'BAREHANDED_FLAT_DAMAGE', 1) + attacker_template.natural_attack_bonus_damage
+    return EntityAttack(attacker_runtime_id, attacker_entity_data.get("name", "A creature"), defender_player, weapon_name_for_msg,
+                        get_entity_combat_profile(attacker_template).attack_strength(defender_profile.armor_type), defender_profile.defense_strength, flat_base_damage_component)
+
+def entity_attack_outcome(attack_strength, defense_strength, flat_damage, d100_roll):
+    """(combat roll result, hit, damage) for one swing."""
+    combat_roll_result = (attack_strength - defense_strength) + config.COMBAT_ADVANTAGE_FACTOR + d100_roll
+    if combat_roll_result <= config.COMBAT_HIT_THRESHOLD: return combat_roll_result, False, 0
+    return combat_roll_result, True, max(1, flat_damage + max(0, (combat_roll_result - config.COMBAT_HIT_THRESHOLD) // config.COMBAT_DAMAGE_MODIFIER_DIVISOR))
+
+def entity_attack_outcomes(attacks, d100_rolls):
+    """entity_attack_outcome for many swings at once: ([roll results], [hits], [damages]). Vectorized with NumPy when it is installed."""
+    if numpy is None:
+        outcomes = [entity_attack_outcome(attack.attack_strength, attack.defense_strength, attack.flat_damage, d100_roll) for attack, d100_roll in zip(attacks, d100_rolls)]
+        return [outcome[0] for outcome in outcomes], [outcome[1] for outcome in outcomes], [outcome[2] for outcome in outcomes]
+    attack_strengths = numpy.fromiter((attack.attack_strength for attack in attacks), dtype=numpy.int64, count=len(attacks))
+    defense_strengths = numpy.fromiter((attack.defense_strength for attack in attacks), dtype=numpy.int64, count=len(attacks))
+    flat_damages = numpy.fromiter((attack.flat_damage for attack in attacks), dtype=numpy.int64, count=len(attacks))
+    roll_results = attack_strengths - defense_strengths + config.COMBAT_ADVANTAGE_FACTOR + numpy.asarray(d100_rolls, dtype=numpy.int64)
+    hits = roll_results > config.COMBAT_HIT_THRESHOLD
+    damages = numpy.where(hits, numpy.maximum(1, flat_damages + numpy.maximum(0, (roll_results - config.COMBAT_HIT_THRESHOLD) // config.COMBAT_DAMAGE_MODIFIER_DIVISOR)), 0)
+    return roll_results.tolist(), hits.tolist(), damages.tolist()
+
+def apply_entity_attack(attack: EntityAttack, d100_roll, combat_roll_result, hit, total_damage):
+    """Writes one resolved swing back: the defender's messages and HP (and defeat), and the results dict main acts on."""
+    attacker_display_name = attack.attacker_name; defender_player = attack.defender; weapon_name_for_msg = attack.weapon_name
+    attacker_as = attack.attack_strength; defender_ds = attack.defense_strength
+    defender_player.add_message(f"The {attacker_display_name} swings its {weapon_name_for_msg} at you!", "combat_action_opponent")
     
     entity_roll_log_string = f"ENTITY_ATTACK_ROLL: {attacker_display_name} (AS:{attacker_as}) vs {defender_player.name} (DS:{defender_ds}) + AvD:{config.COMBAT_ADVANTAGE_FACTOR} + d100:{d100_roll} = {combat_roll_result}"
     if config.DEBUG_MODE and getattr(config, 'DEBUG_COMBAT_ROLLS', False): print(entity_roll_log_string)
@@ -244,18 +346,9 @@ def handle_entity_attack(attacker_entity_data: dict, attacker_entity_type: str,
                'attacker_message': {"text": entity_roll_log_string, "type": "internal_combat_roll"}, 
                'defender_message': None, 'broadcast_message': ""}
 
-    if combat_roll_result > config.COMBAT_HIT_THRESHOLD:
+    if hit:
         results['hit'] = True
-        flat_base_damage_component = 0
-        if attacker_weapon_data and attacker_weapon_data.get("type") == "weapon":
-            flat_base_damage_component = attacker_weapon_data.get("weapon_as_bonus", 0) + attacker_weapon_data.get("enchantment_as_bonus", 0)
-        else:
-            flat_base_damage_component = getattr(config, 'BAREHANDED_FLAT_DAMAGE', 1) 
-            flat_base_damage_component += attacker_entity_data.get("natural_attack_bonus_damage", 0)
-        if config.DEBUG_MODE and getattr(config, 'DEBUG_COMBAT_ROLLS', False): print(f"DEBUG DMG (Entity): Base Dmg Comp: {flat_base_damage_component}")
-
-        damage_bonus_from_roll = max(0, (combat_roll_result - config.COMBAT_HIT_THRESHOLD) // config.COMBAT_DAMAGE_MODIFIER_DIVISOR)
-        total_damage = max(1, flat_base_damage_component + damage_bonus_from_roll)
+        if config.DEBUG_MODE and getattr(config, 'DEBUG_COMBAT_ROLLS', False): print(f"DEBUG DMG (Entity): Base Dmg Comp: {attack.flat_damage}")
         results['damage'] = total_damage
 
         defender_player.hp -= total_damage
@@ -266,7 +359,7 @@ def handle_entity_attack(attacker_entity_data: dict, attacker_entity_type: str,
             results['defender_defeated'] = True; defender_player.hp = 0
             results['defender_message'] = {"text": f"  The {attacker_display_name}'s blow lands true! You have been DEFEATED!", "type": "event_defeat_major"}
             results['broadcast_message'] = {"text": f"{defender_player.name} has been struck down by the {attacker_display_name}!", "type": "ambient_defeat"}
-            defender_player.current_room_id = getattr(config, 'PLAYER_DEATH_ROOM_ID', 1)
+            room_state.move_player(defender_player, getattr(config, 'PLAYER_DEATH_ROOM_ID', 1))
             defender_player.hp = 1 
     else:
         results['defender_message'] = {"text": f"  The {attacker_display_name} MISSES you!", "type": "combat_miss_by_opponent"}
@@ -274,23 +367,48 @@ def handle_entity_attack(attacker_entity_data: dict, attacker_entity_type: str,
     
     return results
 
+def handle_entity_attack(attacker_entity_data: dict, attacker_entity_type: str, attacker_runtime_id: int | str, 
+                         defender_player: player_class.Player, game_items_global: dict):
+    if defender_player.hp <= 0: 
+        return {'hit': False, 'damage': 0, 'defender_defeated': True, 'already_defeated': True, 'attacker_message':"", 'defender_message':None, 'broadcast_message':""}
+    attack = prepare_entity_attack(attacker_entity_data, attacker_entity_type, attacker_runtime_id, defender_player, game_items_global)
+    d100_roll = determinism.rng(determinism.STREAM_COMBAT).randint(1, 100)
+    return apply_entity_attack(attack, d100_roll, *entity_attack_outcome(attack.attack_strength, attack.defense_strength, attack.flat_damage, d100_roll))
+
+def resolve_entity_attack_batch(attacks):
+    """Resolves many prepared swings together: all d100s are drawn up front, hits and damage are computed in one
+    vectorized pass, then each swing is written back in order. A swing whose defender has since left the room it was
+    prepared in (e.g. struck down by an earlier swing in the batch) or is down gets None instead of a results dict, as
+    does a swing whose write-back raised (logged), so the rest of the batch still lands."""
+    if not attacks: return []
+    combat_rng = determinism.rng(determinism.STREAM_COMBAT)
+    d100_rolls = [combat_rng.randint(1, 100) for _ in attacks] # drawn from the seeded stream either way, so NumPy does not change outcomes
+    roll_results, hits, damages = entity_attack_outcomes(attacks, d100_rolls)
+    batch_results = []
+    for attack, d100_roll, combat_roll_result, hit, total_damage in zip(attacks, d100_rolls, roll_results, hits, damages):
+        if attack.defender.hp <= 0 or attack.defender.current_room_id != attack.room_id: batch_results.append(None); continue
+        try: batch_results.append(apply_entity_attack(attack, d100_roll, combat_roll_result, hit, total_damage))
+        except Exception as e_swing:
+            print(f"!!! ERROR applying batched swing by {attack.attacker_name} on {attack.defender.name}: {e_swing}"); batch_results.append(None)
+            if config.DEBUG_MODE:
+                import traceback; traceback.print_exc()
+    return batch_results
+
 def handle_player_attack_pvp(attacker_player: player_class.Player, defender_player: player_class.Player, game_items_global: dict):
     GAME_ITEMS = game_items_global
     if defender_player.hp <= 0:
         attacker_player.add_message(f"{defender_player.name} is already defeated.", "feedback")
         return {"attacker_message": None, "defender_message": None, "broadcast_message": "", "defender_defeated": True, "already_defeated": True}
 
-    attacker_weapon_data = attacker_player.get_equipped_item_data("mainhand", GAME_ITEMS)
-    weapon_name_for_broadcast = attacker_weapon_data.get("name", "their fist") if attacker_weapon_data else "their fist"
-    attacker_weapon_name_for_self = attacker_weapon_data.get("name", "your fist") if attacker_weapon_data else "your fist"
+    attacker_profile = get_player_combat_profile(attacker_player, GAME_ITEMS); defender_profile = get_player_combat_profile(defender_player, GAME_ITEMS)
+    attacker_weapon = attacker_profile.weapon
+    weapon_name_for_broadcast = (attacker_weapon.name or "their fist") if attacker_weapon else "their fist"
+    attacker_weapon_name_for_self = (attacker_weapon.name or "your fist") if attacker_weapon else "your fist"
     attacker_player.add_message(f"You swing your {attacker_weapon_name_for_self} at {defender_player.name}!", "combat_action_player")
 
-    defender_armor_type_str = defender_player.get_armor_type(GAME_ITEMS)
-    defender_armor_data = defender_player.get_equipped_item_data("torso", GAME_ITEMS)
-    defender_shield_data = defender_player.get_equipped_item_data("offhand", GAME_ITEMS)
-    attacker_as = calculate_attack_strength(attacker_player.name, attacker_player.stats, attacker_player.skills, attacker_weapon_data, defender_armor_type_str)
-    defender_ds = calculate_defense_strength(defender_player.name, defender_player.stats, defender_player.skills, defender_armor_data, defender_shield_data, None)
-    d100_roll = random.randint(1, 100)
+    attacker_as = attacker_profile.attack_strength(defender_profile.armor_type)
+    defender_ds = defender_profile.defense_strength
+    d100_roll = determinism.rng(determinism.STREAM_COMBAT).randint(1, 100)
     combat_roll_result = (attacker_as - defender_ds) + config.COMBAT_ADVANTAGE_FACTOR + d100_roll
     
     roll_string = f"  AS: {attacker_as:+} vs DS: {defender_ds:+} with AvD: {config.COMBAT_ADVANTAGE_FACTOR:+} + d100 roll: {d100_roll:+} = {combat_roll_result:+}"
@@ -304,7 +422,7 @@ def handle_player_attack_pvp(attacker_player: player_class.Player, defender_play
 
     if combat_roll_result > config.COMBAT_HIT_THRESHOLD:
         results['hit'] = True; flat_base_damage_component = 0
-        if attacker_weapon_data: flat_base_damage_component = attacker_weapon_data.get("weapon_as_bonus", 0) + attacker_weapon_data.get("enchantment_as_bonus", 0)
+        if attacker_weapon: flat_base_damage_component = attacker_weapon.weapon_as_bonus + attacker_weapon.enchantment_as_bonus
         else: flat_base_damage_component = getattr(config, 'BAREHANDED_FLAT_DAMAGE', 1)
         if config.DEBUG_MODE and getattr(config, 'DEBUG_COMBAT_ROLLS', False): print(f"DEBUG DMG (PvP Attacker): Base Dmg Comp: {flat_base_damage_component}")
         
@@ -321,7 +439,7 @@ def handle_player_attack_pvp(attacker_player: player_class.Player, defender_play
             attacker_player.add_message(f"  You have DEFEATED {defender_player.name} in combat!", "event_pvp_victory")
             defender_player.add_message(f"You have been DEFEATED by {attacker_player.name}!", "event_pvp_defeat_major")
             broadcast_msg_text += f" {defender_player.name} has been defeated!"
-            defender_player.current_room_id = getattr(config, 'PLAYER_DEATH_ROOM_ID', 1)
+            room_state.move_player(defender_player, getattr(config, 'PLAYER_DEATH_ROOM_ID', 1))
             defender_player.hp = 1
         else:
             attacker_player.add_message(f"  {defender_player.name} looks wounded. (Est. HP: {defender_player.hp}/{defender_player.max_hp})", "combat_status_target")
@@ -332,7 +450,7 @@ def handle_player_attack_pvp(attacker_player: player_class.Player, defender_play
         broadcast_msg_text += " and MISSES!"
     
     results['broadcast_message'] = broadcast_msg_text
-    attacker_player.next_action_time = time.time() + config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0)
+    attacker_player.next_action_time = determinism.now() + config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0)
     attacker_player.add_message(f"Roundtime: {config.ROUNDTIME_DEFAULTS.get('roundtime_attack', 3.0):.1f} sec.", "system_info")
     return results
 
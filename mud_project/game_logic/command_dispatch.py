@@ -0,0 +1,115 @@
+# mud_project/game_logic/command_dispatch.py
+# Verb registry for player commands: verbs and their aliases resolve through one dict lookup, each registered
+# handler is timed into a per-command RollingHistogram, and interactable object phrases ("pull lever") are
+# indexed per room instead of being scanned on every command.
+import time
+import threading
+
+try:
+    import config
+except ImportError:
+    class MockConfigCommandDispatch:
+        DEBUG_MODE = True
+        TICK_PROFILER_WINDOW = 200
+    config = MockConfigCommandDispatch()
+
+from . import tick_profiler
+
+# --- Metric names for command paths that are not registered verbs ---
+METRIC_MOVE = "<move>"                   # the verb was an exit of the current room
+METRIC_OBJECT_ACTION = "<object_action>" # the whole command matched an interactable object's action phrase
+METRIC_UNKNOWN = "<unknown>"             # nothing matched
+
+# --- Module-level state ---
+ROOM_ACTION_INDEX = {} # room_id -> (objects signature, {action phrase lowercased: (obj_id, action_phrase, action_result)})
+# --- End Module-level state ---
+
+class CommandContext:
+    """What a command handler gets: the player, the parsed command and the room it was typed in."""
+    __slots__ = ("player", "sid", "verb", "target_arg", "command_input", "room_id", "room_data")
+
+    def __init__(self, player, sid, verb, target_arg, command_input, room_id, room_data):
+        self.player = player; self.sid = sid; self.verb = verb; self.target_arg = target_arg
+        self.command_input = command_input; self.room_id = room_id; self.room_data = room_data
+
+class CommandSpec:
+    __slots__ = ("name", "handler", "aliases", "admin_only", "strip_at_prefix")
+
+    def __init__(self, name, handler, aliases, admin_only, strip_at_prefix):
+        self.name = name; self.handler = handler; self.aliases = aliases
+        self.admin_only = admin_only; self.strip_at_prefix = strip_at_prefix
+
+class CommandRegistry:
+    """Verb/alias -> CommandSpec, plus call counts and latency histograms per command (and per METRIC_* path)."""
+
+    def __init__(self, window=None):
+        self.window = window if window is not None else getattr(config, 'COMMAND_STATS_WINDOW', getattr(config, 'TICK_PROFILER_WINDOW', 200))
+        self.commands = {}; self.latency = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def register(self, name, handler, aliases=(), admin_only=False, strip_at_prefix=False):
+        """strip_at_prefix: 'look at goblin' targets 'goblin'."""
+        spec = CommandSpec(name, handler, tuple(aliases), admin_only, strip_at_prefix)
+        for verb in (name,) + spec.aliases:
+            if verb in self.commands and config.DEBUG_MODE: print(f"DEBUG COMMAND_DISPATCH: '{verb}' re-registered (was '{self.commands[verb].name}', now '{name}').")
+            self.commands[verb] = spec
+        return spec
+
+    def resolve(self, verb):
+        return self.commands.get(verb)
+
+    def parse_target(self, raw_target_arg, spec):
+        if raw_target_arg and spec and spec.strip_at_prefix and raw_target_arg.lower().startswith("at ") and len(raw_target_arg) > 3: return raw_target_arg[3:].strip()
+        return raw_target_arg
+
+    def record(self, metric_name, seconds):
+        with self._lock:
+            histogram = self.latency.get(metric_name)
+            if histogram is None: histogram = self.latency[metric_name] = tick_profiler.RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def reset(self):
+        with self._lock: self.latency.clear(); self.started_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {"uptime_seconds": round(time.time() - self.started_at, 3), "window": self.window,
+                    "commands": {name: self.latency[name].summary() for name in sorted(self.latency, key=lambda name: -self.latency[name].total)}}
+
+    def format_report(self):
+        data = self.snapshot()
+        lines = [f"Command latency over the last {data['window']} calls per command (uptime {data['uptime_seconds']:.0f}s):",
+                 f"{'command':<16}{'calls':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}"]
+        for name, stats in data["commands"].items():
+            lines.append(f"{name:<16}{stats['count']:>9}{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}{stats['max_ms']:>9.3f}")
+        if not data["commands"]: lines.append("(no commands yet)")
+        return lines
+
+def _objects_signature(objects):
+    # Corpses and ground items come and go without actions; the interactable fixtures that have them are part of the
+    # room definition, so a changed objects dict (identity or size) is enough to know the index may be stale.
+    return (id(objects), len(objects))
+
+def build_room_action_index(room_data):
+    phrase_index = {}
+    for obj_id, obj_data in room_data.get("objects", {}).items():
+        if obj_data.get("interactable") and isinstance(obj_data.get("actions"), dict):
+            for action_phrase, action_result in obj_data["actions"].items(): phrase_index.setdefault(action_phrase.lower(), (obj_id, action_phrase, action_result))
+    return phrase_index
+
+def find_object_action(room_id, room_data, command_lower):
+    """(obj_id, action_phrase, action_result) for the interactable object action matching the whole command, else None."""
+    objects = room_data.get("objects")
+    if not objects: return None
+    signature = _objects_signature(objects); cached = ROOM_ACTION_INDEX.get(room_id)
+    if cached is None or cached[0] != signature:
+        cached = ROOM_ACTION_INDEX[room_id] = (signature, build_room_action_index(room_data))
+    return cached[1].get(command_lower)
+
+def invalidate_room_actions(room_id=None):
+    """Drops one room's phrase index (after editing an object's actions in place), or all of them."""
+    if room_id is None: ROOM_ACTION_INDEX.clear()
+    else: ROOM_ACTION_INDEX.pop(room_id, None)
+
+if config.DEBUG_MODE: print("game_logic.command_dispatch loaded.")
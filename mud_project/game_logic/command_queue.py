@@ -0,0 +1,103 @@
+# mud_project/game_logic/command_queue.py
+import time
+import threading
+from collections import deque
+
+try:
+    import config
+except ImportError:
+    class MockConfigCommandQueue:
+        DEBUG_MODE = True
+        COMMAND_QUEUE_MAX_SIZE = 2048
+        COMMAND_QUEUE_MAX_PER_SID = 20
+        COMMAND_MAX_LATENCY_SECONDS = 5.0
+    config = MockConfigCommandQueue()
+
+from . import tick_profiler
+
+METRIC_COMMAND_WAIT = "command_wait" # time a command sat in the queue before the simulation thread ran it
+METRIC_COMMAND_RUN = "command_run"   # time spent running it
+COUNTER_COMMANDS_RUN = "commands_run"
+COUNTER_COMMANDS_REJECTED = "commands_rejected"
+COUNTER_COMMANDS_EXPIRED = "commands_expired"
+
+SUBMIT_OK = "ok"
+SUBMIT_QUEUE_FULL = "queue_full"
+SUBMIT_SID_LIMIT = "sid_limit"
+
+class QueuedCommand:
+    __slots__ = ("sid", "callback", "args", "enqueued_at", "expire_callback")
+
+    def __init__(self, sid, callback, args, enqueued_at, expire_callback):
+        self.sid = sid; self.callback = callback; self.args = args
+        self.enqueued_at = enqueued_at; self.expire_callback = expire_callback
+
+class CommandQueue:
+    """Bounded FIFO between the Socket.IO handler threads (producers) and the simulation thread (the only consumer).
+    Handlers only enqueue; every mutation of game state happens when the simulation thread drains the queue."""
+
+    def __init__(self, max_size=None, max_per_sid=None, max_latency_seconds=None, wakeup_event=None):
+        self.max_size = max_size if max_size is not None else getattr(config, 'COMMAND_QUEUE_MAX_SIZE', 2048)
+        self.max_per_sid = max_per_sid if max_per_sid is not None else getattr(config, 'COMMAND_QUEUE_MAX_PER_SID', 20)
+        self.max_latency_seconds = max_latency_seconds if max_latency_seconds is not None else getattr(config, 'COMMAND_MAX_LATENCY_SECONDS', 5.0)
+        self.wakeup_event = wakeup_event # set on every submit so a sleeping simulation loop picks the command up at once
+        self._entries = deque(); self._per_sid = {}
+        self._lock = threading.Lock()
+
+    def submit(self, sid, callback, *args, expire_callback=None, force=False):
+        """Queues callback(*args) for the simulation thread. `force` bypasses the size limits (used for disconnects, which must not be lost).
+        expire_callback(*args), if given, runs instead of callback when the command waited longer than max_latency_seconds."""
+        with self._lock:
+            if not force:
+                if len(self._entries) >= self.max_size: reason = SUBMIT_QUEUE_FULL
+                elif self._per_sid.get(sid, 0) >= self.max_per_sid: reason = SUBMIT_SID_LIMIT
+                else: reason = SUBMIT_OK
+                if reason != SUBMIT_OK:
+                    tick_profiler.TICK_PROFILER.increment(COUNTER_COMMANDS_REJECTED)
+                    return reason
+            self._entries.append(QueuedCommand(sid, callback, args, time.monotonic(), expire_callback))
+            self._per_sid[sid] = self._per_sid.get(sid, 0) + 1
+        if self.wakeup_event is not None: self.wakeup_event.set()
+        return SUBMIT_OK
+
+    def pending(self):
+        return len(self._entries)
+
+    def _pop(self):
+        with self._lock:
+            if not self._entries: return None
+            entry = self._entries.popleft()
+            remaining = self._per_sid.get(entry.sid, 0) - 1
+            if remaining > 0: self._per_sid[entry.sid] = remaining
+            else: self._per_sid.pop(entry.sid, None)
+            return entry
+
+    def drain(self, budget_seconds=None):
+        """Runs queued commands in arrival order. Stops once budget_seconds have been spent (None = until empty) so the
+        tick and due attacks are not starved; whatever is left runs on the next pass. Returns how many commands ran."""
+        started_at = time.monotonic(); commands_run = 0
+        while True:
+            if budget_seconds is not None and commands_run and time.monotonic() - started_at >= budget_seconds: break
+            entry = self._pop()
+            if entry is None: break
+            run_started_at = time.monotonic(); waited = run_started_at - entry.enqueued_at
+            tick_profiler.TICK_PROFILER.record(METRIC_COMMAND_WAIT, waited)
+            expired = entry.expire_callback is not None and self.max_latency_seconds and waited > self.max_latency_seconds
+            try:
+                if expired:
+                    tick_profiler.TICK_PROFILER.increment(COUNTER_COMMANDS_EXPIRED)
+                    entry.expire_callback(*entry.args)
+                else: entry.callback(*entry.args)
+            except Exception as e_command:
+                print(f"!!! ERROR running queued command {getattr(entry.callback, '__name__', entry.callback)} for SID {entry.sid}: {e_command}")
+                if config.DEBUG_MODE:
+                    import traceback; traceback.print_exc()
+            tick_profiler.TICK_PROFILER.record(METRIC_COMMAND_RUN, time.monotonic() - run_started_at)
+            commands_run += 1
+        if commands_run: tick_profiler.TICK_PROFILER.increment(COUNTER_COMMANDS_RUN, commands_run)
+        return commands_run
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self._per_sid.clear()
+
+if config.DEBUG_MODE: print("game_logic.command_queue loaded.")
@@ -0,0 +1,72 @@
+# mud_project/game_logic/determinism.py
+# Per-subsystem random streams and the game's wall clock, both swappable so a headless run (tools/sim_harness.py)
+# can replay the exact same workload. Live servers never touch the setters: every stream is the global `random`
+# module and now() is time.time(), exactly as before.
+import time
+import random
+
+try:
+    import config
+except ImportError:
+    class MockConfigDeterminism:
+        DEBUG_MODE = True
+    config = MockConfigDeterminism()
+
+# --- Stream names (one per subsystem, so extra rolls in one never shift another's sequence) ---
+STREAM_COMBAT = "combat"           # combat.parse_and_roll_dice, hit rolls, entity attack pacing
+STREAM_LOOT = "loot"               # loot_handler drop rolls and quantities
+STREAM_ENVIRONMENT = "environment" # weather changes
+STREAM_RESPAWN = "respawn"         # monster_respawn respawn chance
+STREAM_AI = "ai"                   # aggro target picks
+STREAM_WORLD = "world"             # ground item instance ids
+STREAM_CHARACTER_CREATION = "character_creation" # stat rolls
+ALL_STREAMS = [STREAM_COMBAT, STREAM_LOOT, STREAM_ENVIRONMENT, STREAM_RESPAWN, STREAM_AI, STREAM_WORLD, STREAM_CHARACTER_CREATION]
+
+# --- Module-level state ---
+RNG_STREAMS = {}      # stream name -> random.Random; a stream missing here uses the global random module
+VIRTUAL_CLOCK = None  # [seconds] while a virtual clock is installed, else None (real time)
+SEED = None
+# --- End Module-level state ---
+
+def rng(stream_name):
+    """The random source for one subsystem: a seeded random.Random in a deterministic run, the `random` module otherwise."""
+    return RNG_STREAMS.get(stream_name, random)
+
+def seed_streams(seed, stream_names=None):
+    """Gives every stream its own random.Random derived from `seed` and the stream's name (stable across processes)."""
+    global SEED
+    SEED = seed; RNG_STREAMS.clear()
+    for stream_name in (stream_names or ALL_STREAMS): RNG_STREAMS[stream_name] = random.Random(f"{seed}:{stream_name}")
+    if config.DEBUG_MODE: print(f"DETERMINISM: Seeded {len(RNG_STREAMS)} RNG streams with seed {seed}.")
+
+def reset_streams():
+    global SEED
+    SEED = None; RNG_STREAMS.clear()
+
+def now():
+    """Game wall-clock seconds (roundtimes, corpse decay, respawn eligibility, entity attack times)."""
+    return VIRTUAL_CLOCK[0] if VIRTUAL_CLOCK is not None else time.time()
+
+def use_virtual_clock(start_at):
+    """From now on now() only moves when advance_clock()/set_clock() says so."""
+    global VIRTUAL_CLOCK
+    VIRTUAL_CLOCK = [float(start_at)]
+
+def advance_clock(seconds):
+    if VIRTUAL_CLOCK is None: raise RuntimeError("advance_clock() needs a virtual clock (use_virtual_clock first).")
+    VIRTUAL_CLOCK[0] += seconds
+    return VIRTUAL_CLOCK[0]
+
+def set_clock(at_seconds):
+    if VIRTUAL_CLOCK is None: raise RuntimeError("set_clock() needs a virtual clock (use_virtual_clock first).")
+    if at_seconds > VIRTUAL_CLOCK[0]: VIRTUAL_CLOCK[0] = float(at_seconds)
+    return VIRTUAL_CLOCK[0]
+
+def use_real_clock():
+    global VIRTUAL_CLOCK
+    VIRTUAL_CLOCK = None
+
+def is_deterministic():
+    return VIRTUAL_CLOCK is not None and bool(RNG_STREAMS)
+
+if config.DEBUG_MODE: print("game_logic.determinism loaded.")
@@ -0,0 +1,131 @@
+# mud_project/game_logic/entity_state.py
+# One store for the runtime state of monsters and NPCs: NPC HP and defeat flags (monsters keep theirs on their
+# classes.monster.MonsterInstance), who each entity is fighting, and pending threat timers. The store keeps reverse
+# indexes (target SID -> entities, room -> entities) next to the forward maps so a disconnect clears exactly the
+# entities aimed at that SID, and it evicts the HP of wounded entities that have been left alone for
+# ENTITY_STATE_HP_TTL_SECONDS (they are back at full health, as if they had healed), capped at ENTITY_STATE_MAX_WOUNDED.
+# The forward maps are the same dict objects main and combat expose as ENTITY_COMBAT_PARTICIPANTS,
+# THREATENING_ENTITIES_TIMERS, RUNTIME_ENTITY_HP and RECENTLY_DEFEATED_TARGETS_IN_ROOM; read them freely, but change
+# them only through the store so the indexes stay right.
+from collections import OrderedDict
+
+try:
+    import config
+except ImportError:
+    class MockConfigEntityState:
+        DEBUG_MODE = True; ENTITY_STATE_HP_TTL_SECONDS = 600; ENTITY_STATE_MAX_WOUNDED = 5000
+    config = MockConfigEntityState()
+
+from classes import monster as monster_registry
+from . import determinism
+
+class EntityStateStore:
+    def __init__(self, hp_ttl_seconds=None, max_wounded=None):
+        self.hp_ttl_seconds = hp_ttl_seconds if hp_ttl_seconds is not None else getattr(config, 'ENTITY_STATE_HP_TTL_SECONDS', 600)
+        self.max_wounded = max_wounded if max_wounded is not None else getattr(config, 'ENTITY_STATE_MAX_WOUNDED', 5000)
+        self.hp = {}       # NPC runtime id -> HP
+        self.defeated = {} # NPC runtime id -> True while down
+        self.combat = {}   # runtime id -> {"target_sid", "next_attack_time", "timer"}
+        self.threats = {}  # runtime id -> {"target_sid", "engage_at_tick", "timer"}
+        self.wounded = OrderedDict() # runtime id -> virtual time of its last HP change, oldest first (monsters and NPCs)
+        self.by_target_sid = {} # sid -> {runtime id} engaged with or threatening that player
+        self.by_room = {}       # room_id -> {runtime id} with combat or threat state there
+        self.entity_rooms = {}  # runtime id -> room_id it was indexed under
+        self.evicted_total = 0
+
+    # --- Reverse indexes ---
+    def _index(self, runtime_id, target_sid, room_id):
+        if target_sid is not None: self.by_target_sid.setdefault(target_sid, set()).add(runtime_id)
+        if room_id is not None:
+            previous_room_id = self.entity_rooms.get(runtime_id)
+            if previous_room_id is not None and previous_room_id != room_id: self._unindex_room(runtime_id, previous_room_id)
+            self.entity_rooms[runtime_id] = room_id; self.by_room.setdefault(room_id, set()).add(runtime_id)
+
+    def _unindex_room(self, runtime_id, room_id):
+        entities = self.by_room.get(room_id)
+        if entities is not None:
+            entities.discard(runtime_id)
+            if not entities: del self.by_room[room_id]
+
+    def _unindex(self, runtime_id, target_sid):
+        """Drops runtime_id from target_sid's set, and from its room once it has neither combat nor threat state left."""
+        if target_sid is not None and not any(state.get("target_sid") == target_sid for state in (self.combat.get(runtime_id), self.threats.get(runtime_id)) if state):
+            entities = self.by_target_sid.get(target_sid)
+            if entities is not None:
+                entities.discard(runtime_id)
+                if not entities: del self.by_target_sid[target_sid]
+        if runtime_id not in self.combat and runtime_id not in self.threats:
+            room_id = self.entity_rooms.pop(runtime_id, None)
+            if room_id is not None: self._unindex_room(runtime_id, room_id)
+
+    # --- Combat and threat state ---
+    def set_combat(self, runtime_id, combat_state, room_id=None):
+        self.pop_combat(runtime_id)
+        self.combat[runtime_id] = combat_state; self._index(runtime_id, combat_state.get("target_sid"), room_id)
+
+    def pop_combat(self, runtime_id):
+        combat_state = self.combat.pop(runtime_id, None)
+        if combat_state is not None: self._unindex(runtime_id, combat_state.get("target_sid"))
+        return combat_state
+
+    def set_threat(self, runtime_id, threat_data, room_id=None):
+        self.pop_threat(runtime_id)
+        self.threats[runtime_id] = threat_data; self._index(runtime_id, threat_data.get("target_sid"), room_id)
+
+    def pop_threat(self, runtime_id):
+        threat_data = self.threats.pop(runtime_id, None)
+        if threat_data is not None: self._unindex(runtime_id, threat_data.get("target_sid"))
+        return threat_data
+
+    def entities_targeting(self, sid):
+        """Runtime ids engaged with or threatening this SID (a copy: callers disengage while iterating)."""
+        return sorted(self.by_target_sid.get(sid, ()), key=str)
+
+    def entities_in_room(self, room_id):
+        return sorted(self.by_room.get(room_id, ()), key=str)
+
+    # --- HP and defeat ---
+    def touch_hp(self, runtime_id):
+        """Records that an entity's HP just changed (it is wounded), renewing its eviction deadline."""
+        self.wounded[runtime_id] = determinism.now(); self.wounded.move_to_end(runtime_id)
+
+    def forget_hp(self, runtime_id):
+        self.hp.pop(runtime_id, None); self.defeated.pop(runtime_id, None); self.wounded.pop(runtime_id, None)
+
+    def _is_pinned(self, runtime_id):
+        instance = monster_registry.get(runtime_id)
+        defeated = instance.defeated if instance is not None else runtime_id in self.defeated
+        return defeated or runtime_id in self.combat or runtime_id in self.threats
+
+    def evict_stale_hp(self, now=None):
+        """Restores full HP to wounded entities untouched for hp_ttl_seconds (or the oldest, past max_wounded) that are not fighting,
+        threatening or defeated. Returns how many were evicted."""
+        now = determinism.now() if now is None else now
+        expires_before = now - self.hp_ttl_seconds; evicted = 0; pinned = []
+        while self.wounded:
+            runtime_id, touched_at = next(iter(self.wounded.items()))
+            if touched_at > expires_before and len(self.wounded) + len(pinned) <= self.max_wounded: break
+            self.wounded.popitem(last=False)
+            if self._is_pinned(runtime_id): pinned.append((runtime_id, touched_at)); continue
+            instance = monster_registry.get(runtime_id)
+            if instance is not None: instance.hp = None
+            else: self.hp.pop(runtime_id, None)
+            evicted += 1
+        for runtime_id, touched_at in reversed(pinned): # keep their place: they are looked at again next pass
+            self.wounded[runtime_id] = touched_at; self.wounded.move_to_end(runtime_id, last=False)
+        self.evicted_total += evicted
+        if evicted and config.DEBUG_MODE: print(f"DEBUG ENTITY_STATE: Evicted stale HP for {evicted} idle entities ({len(self.wounded)} still wounded).")
+        return evicted
+
+    # --- Reporting ---
+    def size_report(self):
+        return {"npc_hp": len(self.hp), "npc_defeated": len(self.defeated), "combat": len(self.combat), "threats": len(self.threats),
+                "wounded": len(self.wounded), "target_sids": len(self.by_target_sid), "rooms": len(self.by_room),
+                "monster_instances": len(monster_registry.MONSTER_INSTANCES), "evicted_total": self.evicted_total}
+
+    def format_report(self):
+        return ["Entity state: " + ", ".join(f"{name}={count}" for name, count in self.size_report().items())]
+
+ENTITY_STATE = EntityStateStore()
+
+if config.DEBUG_MODE: print("game_logic.entity_state loaded.")
@@ -1,5 +1,4 @@
 # mud_project/game_logic/environment.py
-import random
 import datetime
 import pytz 
 
@@ -22,6 +21,9 @@ except ImportError as e:
         WEATHER_STAY_SAME_BAD_CHANCE = 0.40
     config = MockConfig()
 
+from .scheduler import interval_elapsed
+from . import determinism
+
 # --- Module-level state for environment ---
 current_time_of_day = "day"
 current_weather = getattr(config, 'WEATHER_SEVERITY_ORDER', ["clear"])[0] # Start with the best weather
@@ -37,66 +39,93 @@ def is_room_exposed(room_data):
     is_underground = room_data.get("is_underground", False)
     return is_outdoor and not is_underground
 
-def get_description_for_room(room_data):
-    global current_time_of_day, current_weather
+# Pre-written descriptions a room can carry, by weather and by time of day. A weather one wins over a time one.
+WEATHER_DESCRIPTION_KEYS = {"storm": "description_storm", "blizzard": "description_blizzard", "heavy rain": "description_heavy_rain",
+                            "heavy snow": "description_heavy_snow", "rain": "description_rain", "snow": "description_snow",
+                            "light rain": "description_light_rain", "light snow": "description_light_snow", "fog": "description_fog",
+                            "overcast": "description_overcast", "light clouds": "description_light_clouds"}
+TIME_DESCRIPTION_KEYS = {"night": "description_night", "dusk": "description_dusk", "dawn": "description_dawn"}
+
+def _descriptive_additions(time_of_day, weather):
+    """Generic text appended to an exposed room's base description when it has no pre-written one for the conditions."""
+    descriptive_additions = []
+
+    # Time of day text
+    if time_of_day == "night":
+        descriptive_additions.append("It is dark.")
+        if weather == "clear": descriptive_additions.append("The stars are brilliant above.")
+    elif time_of_day == "dusk":
+        descriptive_additions.append("The sun dips low, painting the sky in fading colors.")
+    elif time_of_day == "dawn":
+        descriptive_additions.append("The first light of dawn touches the land.")
+    elif time_of_day == "day" and weather == "clear":
+         descriptive_additions.append("The sun shines brightly.")
+
+    # Weather text (only if not "clear" or if clear but no time text was specific enough)
+    if weather == "light clouds": descriptive_additions.append("A few fluffy clouds drift lazily across the sky.")
+    elif weather == "overcast": descriptive_additions.append("The sky is grey and overcast.")
+    elif weather == "fog": descriptive_additions.append("A thick fog clings to everything, muffling sounds.")
+    elif weather == "light rain": descriptive_additions.append("A light drizzle falls.")
+    elif weather == "rain": descriptive_additions.append("Rain falls steadily.")
+    elif weather == "heavy rain": descriptive_additions.append("Heavy rain pours down, soaking everything.")
+    elif weather == "light snow": descriptive_additions.append("Light snowflakes dance in the air.")
+    elif weather == "snow": descriptive_additions.append("Snow falls, blanketing the ground.")
+    elif weather == "heavy snow": descriptive_additions.append("Heavy snow falls, quickly accumulating.")
+    elif weather == "storm": descriptive_additions.append("A fierce storm rages, with lashing rain and howling winds!")
+    elif weather == "blizzard": descriptive_additions.append("A blinding blizzard howls, whipping snow into a frenzy!")
+    return descriptive_additions
+
+def _state_description_parts(time_of_day, weather):
+    """(room keys to try in order, suffix for the base description) under these conditions."""
+    room_keys = tuple(key for key in (WEATHER_DESCRIPTION_KEYS.get(weather), TIME_DESCRIPTION_KEYS.get(time_of_day)) if key)
+    descriptive_additions = _descriptive_additions(time_of_day, weather)
+    return room_keys, (" " + " ".join(descriptive_additions) if descriptive_additions else "")
+
+# --- Precomputed description variants ---
+# An exposed room's description depends only on the room, the time of day and the weather. Every (time, weather) pair
+# the cycles can produce is an environment state with an index, and what a state adds (the keys it tries, the generic
+# suffix) is worked out once here. Each room gets one slot per state, filled the first time it is described in that
+# state; update_environment_state moves current_state_index, so describing a room is a list index from then on.
+ENVIRONMENT_STATES = [(time_of_day, weather) for time_of_day in TIME_CYCLE for weather in WEATHER_ORDER]
+ENVIRONMENT_STATE_INDEXES = {state: index for index, state in enumerate(ENVIRONMENT_STATES)}
+ENVIRONMENT_STATE_PARTS = [_state_description_parts(time_of_day, weather) for time_of_day, weather in ENVIRONMENT_STATES]
+current_state_index = ENVIRONMENT_STATE_INDEXES.get((current_time_of_day, current_weather)) # None: conditions outside the cycles
+ROOM_DESCRIPTION_VARIANTS = {} # room id -> RoomDescriptionVariants
+# --- End precomputed description variants ---
+
+def _describe_exposed_room(room_data, state_parts):
+    room_keys, suffix = state_parts
+    for room_key in room_keys:
+        if room_key in room_data: return room_data[room_key]
+    return room_data.get("description", "No description available.") + suffix
+
+class RoomDescriptionVariants:
+    __slots__ = ("room_data", "base_description", "variants")
+
+    def __init__(self, room_data):
+        self.room_data = room_data; self.base_description = room_data.get("description", "No description available.")
+        self.variants = [None] * len(ENVIRONMENT_STATES) if is_room_exposed(room_data) else None # None: indoors, always the base text
+
+    def describe(self, state_index):
+        if self.variants is None: return self.base_description
+        if state_index is None: return _describe_exposed_room(self.room_data, _state_description_parts(current_time_of_day, current_weather))
+        description = self.variants[state_index]
+        if description is None: description = self.variants[state_index] = _describe_exposed_room(self.room_data, ENVIRONMENT_STATE_PARTS[state_index])
+        return description
 
+def get_description_for_room(room_data):
     if not room_data: return "A featureless void."
-    base_description = room_data.get("description", "No description available.")
-
-    if is_room_exposed(room_data):
-        # Check for specific, pre-written descriptions based on current weather first
-        if current_weather == "storm" and "description_storm" in room_data: return room_data["description_storm"]
-        if current_weather == "blizzard" and "description_blizzard" in room_data: return room_data["description_blizzard"] # Example
-        if current_weather == "heavy rain" and "description_heavy_rain" in room_data: return room_data["description_heavy_rain"]
-        if current_weather == "heavy snow" and "description_heavy_snow" in room_data: return room_data["description_heavy_snow"]
-        if current_weather == "rain" and "description_rain" in room_data: return room_data["description_rain"]
-        if current_weather == "snow" and "description_snow" in room_data: return room_data["description_snow"]
-        if current_weather == "light rain" and "description_light_rain" in room_data: return room_data["description_light_rain"]
-        if current_weather == "light snow" and "description_light_snow" in room_data: return room_data["description_light_snow"]
-        if current_weather == "fog" and "description_fog" in room_data: return room_data["description_fog"]
-        if current_weather == "overcast" and "description_overcast" in room_data: return room_data["description_overcast"]
-        if current_weather == "light clouds" and "description_light_clouds" in room_data: return room_data["description_light_clouds"]
-        
-        # Then check for time-specific descriptions if no weather-specific one matched
-        if current_time_of_day == "night" and "description_night" in room_data: return room_data["description_night"]
-        if current_time_of_day == "dusk" and "description_dusk" in room_data: return room_data["description_dusk"]
-        if current_time_of_day == "dawn" and "description_dawn" in room_data: return room_data["description_dawn"]
-        
-        # Fallback to appending generic descriptive text
-        descriptive_additions = []
-        
-        # Time of day text
-        if current_time_of_day == "night":
-            descriptive_additions.append("It is dark.")
-            if current_weather == "clear": descriptive_additions.append("The stars are brilliant above.")
-        elif current_time_of_day == "dusk":
-            descriptive_additions.append("The sun dips low, painting the sky in fading colors.")
-        elif current_time_of_day == "dawn":
-            descriptive_additions.append("The first light of dawn touches the land.")
-        elif current_time_of_day == "day" and current_weather == "clear":
-             descriptive_additions.append("The sun shines brightly.")
-        
-        # Weather text (only if not "clear" or if clear but no time text was specific enough)
-        if current_weather == "light clouds": descriptive_additions.append("A few fluffy clouds drift lazily across the sky.")
-        elif current_weather == "overcast": descriptive_additions.append("The sky is grey and overcast.")
-        elif current_weather == "fog": descriptive_additions.append("A thick fog clings to everything, muffling sounds.")
-        elif current_weather == "light rain": descriptive_additions.append("A light drizzle falls.")
-        elif current_weather == "rain": descriptive_additions.append("Rain falls steadily.")
-        elif current_weather == "heavy rain": descriptive_additions.append("Heavy rain pours down, soaking everything.")
-        elif current_weather == "light snow": descriptive_additions.append("Light snowflakes dance in the air.")
-        elif current_weather == "snow": descriptive_additions.append("Snow falls, blanketing the ground.")
-        elif current_weather == "heavy snow": descriptive_additions.append("Heavy snow falls, quickly accumulating.")
-        elif current_weather == "storm": descriptive_additions.append("A fierce storm rages, with lashing rain and howling winds!")
-        elif current_weather == "blizzard": descriptive_additions.append("A blinding blizzard howls, whipping snow into a frenzy!")
-        
-        if descriptive_additions:
-            return base_description + " " + " ".join(descriptive_additions)
-        return base_description 
-    else: # Indoors or shielded underground
-        return base_description
+    room_key = room_data.get("id", id(room_data))
+    variants = ROOM_DESCRIPTION_VARIANTS.get(room_key)
+    if variants is None or variants.room_data is not room_data: variants = ROOM_DESCRIPTION_VARIANTS[room_key] = RoomDescriptionVariants(room_data)
+    return variants.describe(current_state_index)
+
+def reset_room_descriptions():
+    """Drops every room's variants (world reload: the room dicts they were built from are gone)."""
+    ROOM_DESCRIPTION_VARIANTS.clear()
 
-def update_environment_state(game_tick_counter, active_players_dict, game_rooms_dict, log_time_prefix, broadcast_callback):
-    global current_time_of_day, current_weather, consecutive_clear_checks
+def update_environment_state(game_tick_counter, active_players_dict, game_rooms_dict, log_time_prefix, broadcast_callback, ticks_elapsed=1):
+    global current_time_of_day, current_weather, consecutive_clear_checks, current_state_index
 
     time_change_interval = getattr(config, 'TIME_CHANGE_INTERVAL_TICKS', 20) 
     weather_change_interval = getattr(config, 'WEATHER_CHANGE_INTERVAL_TICKS', 15)
@@ -107,7 +136,7 @@ def update_environment_state(game_tick_counter, active_players_dict, game_rooms_
     old_weather = current_weather
 
     # --- Update Time of Day ---
-    if game_tick_counter > 0 and game_tick_counter % time_change_interval == 0:
+    if game_tick_counter > 0 and interval_elapsed(game_tick_counter, time_change_interval, ticks_elapsed):
         current_time_index = TIME_CYCLE.index(current_time_of_day)
         current_time_of_day = TIME_CYCLE[(current_time_index + 1) % len(TIME_CYCLE)]
         time_changed_this_tick = True
@@ -115,7 +144,7 @@ def update_environment_state(game_tick_counter, active_players_dict, game_rooms_
             print(f"{log_time_prefix} - ENV_SYSTEM: Time shifted from {old_time} to {current_time_of_day}")
 
     # --- Update Weather ---
-    if game_tick_counter > 0 and game_tick_counter % weather_change_interval == 0:
+    if game_tick_counter > 0 and interval_elapsed(game_tick_counter, weather_change_interval, ticks_elapsed):
         stay_clear_base = getattr(config, 'WEATHER_STAY_CLEAR_BASE_CHANCE', 0.65)
         worsen_from_clear_start = getattr(config, 'WEATHER_WORSEN_FROM_CLEAR_START_CHANCE', 0.10)
         worsen_escalation = getattr(config, 'WEATHER_WORSEN_ESCALATION', 0.03)
@@ -123,7 +152,7 @@ def update_environment_state(game_tick_counter, active_players_dict, game_rooms_
         improve_base = getattr(config, 'WEATHER_IMPROVE_BASE_CHANCE', 0.50)
         stay_same_bad = getattr(config, 'WEATHER_STAY_SAME_BAD_CHANCE', 0.40)
 
-        roll = random.random()
+        roll = determinism.rng(determinism.STREAM_ENVIRONMENT).random()
         new_weather_candidate = old_weather # Default to no change
 
         current_weather_idx = WEATHER_ORDER.index(old_weather)
@@ -136,7 +165,7 @@ def update_environment_state(game_tick_counter, active_players_dict, game_rooms_
                 if len(WEATHER_ORDER) > 1:
                     # Pick from the next 1 or 2 worse states
                     worsen_options = WEATHER_ORDER[1:min(3, len(WEATHER_ORDER))] 
-                    new_weather_candidate = random.choice(worsen_options) if worsen_options else WEATHER_ORDER[1]
+                    new_weather_candidate = determinism.rng(determinism.STREAM_ENVIRONMENT).choice(worsen_options) if worsen_options else WEATHER_ORDER[1]
                 consecutive_clear_checks = 0 
             else: # Stays clear
                 new_weather_candidate = old_weather
@@ -161,6 +190,7 @@ def update_environment_state(game_tick_counter, active_players_dict, game_rooms_
                 worsen_info = f" (Worsen chance was {current_worsen_chance:.2f}, {consecutive_clear_checks} clear checks prior)" if old_weather == WEATHER_ORDER[0] else ""
                 print(f"{log_time_prefix} - ENV_SYSTEM: Weather changed from {old_weather} to {current_weather}.{worsen_info}")
 
+    if time_changed_this_tick or weather_changed_this_tick: current_state_index = ENVIRONMENT_STATE_INDEXES.get((current_time_of_day, current_weather))
 
     # --- Broadcast Ambient Messages ---
     time_message_str = ""
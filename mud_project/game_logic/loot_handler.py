@@ -1,5 +1,4 @@
 # mud_project/game_logic/loot_handler.py
-import random
 import time
 
 try:
@@ -11,6 +10,10 @@ except ImportError:
         DEFAULT_DROP_EQUIPPED_CHANCE = 1.0; DEFAULT_DROP_CARRIED_CHANCE = 1.0
     config = MockConfig()
 
+from classes import monster as monster_registry
+from . import determinism
+from . import room_index
+
 GAME_LOOT_TABLES = {} 
 
 def generate_loot_from_table(loot_table_id, game_items_data):
@@ -32,12 +35,12 @@ def generate_loot_from_table(loot_table_id, game_items_data):
         if requires_skinning:
             if config.DEBUG_MODE: print(f"DEBUG LOOT_HANDLER: Item '{item_id}' requires skinning. Skipping for general loot.")
             continue
-        roll_value = random.random()
+        roll_value = determinism.rng(determinism.STREAM_LOOT).random()
         if roll_value < chance:
             quantity_to_drop = 0
             if isinstance(quantity_data, int): quantity_to_drop = quantity_data
             elif isinstance(quantity_data, list) and len(quantity_data) == 2:
-                try: quantity_to_drop = random.randint(int(quantity_data[0]), int(quantity_data[1]))
+                try: quantity_to_drop = determinism.rng(determinism.STREAM_LOOT).randint(int(quantity_data[0]), int(quantity_data[1]))
                 except ValueError: 
                     quantity_to_drop = 1;                         
                     if config.DEBUG_MODE: print(f"DEBUG LOOT_HANDLER: Invalid quantity format for '{item_id}'. Defaulting to 1.")
@@ -76,25 +79,22 @@ def create_corpse_object_data(defeated_entity_template, defeated_entity_runtime_
     # The defeated_entity_template passed to this function *is* the template from GAME_NPCS or GAME_MONSTER_TEMPLATES
     original_template_key = defeated_entity_template.get("_id") 
     if not original_template_key:
-        # This fallback is less ideal and depends on consistent runtime ID naming.
+        # Monsters know their template through their instance; an NPC's runtime id is its template key.
         # It's better if the `_id` (which is the template key) is always present on the `defeated_entity_template`.
-        parts = defeated_entity_runtime_id.split('_')
-        if len(parts) > 1 and parts[0].isdigit(): 
-            original_template_key = parts[1] 
-        else: 
-            original_template_key = defeated_entity_runtime_id # Fallback to runtime_id if parsing fails
+        defeated_instance = monster_registry.get(defeated_entity_runtime_id)
+        original_template_key = defeated_instance.template_key if defeated_instance is not None else str(defeated_entity_runtime_id)
         if config.DEBUG_MODE:
             print(f"DEBUG LOOT_HANDLER: original_template_key derived as '{original_template_key}' from runtime_id '{defeated_entity_runtime_id}' because _id was missing on template.")
     # --- END REFINED ---
 
-    corpse_id = f"corpse_{defeated_entity_runtime_id}_{int(time.time())}"
+    corpse_id = f"corpse_{defeated_entity_runtime_id}_{int(determinism.now())}"
 
     loot_items_for_corpse_inventory = []
     # ... (rest of loot generation: carried, equipped, loot table - remains the same) ...
     drop_carried_chance = getattr(config, 'NPC_DROP_CARRIED_CHANCE', getattr(config, 'DEFAULT_DROP_CARRIED_CHANCE', 1.0))
     for item_key in defeated_entity_template.get("items", []): 
         if item_key in game_items_data:
-            if random.random() < drop_carried_chance:
+            if determinism.rng(determinism.STREAM_LOOT).random() < drop_carried_chance:
                 loot_items_for_corpse_inventory.append(item_key)
                 if config.DEBUG_MODE: print(f"DEBUG LOOT_HANDLER: Carried item '{item_key}' added to loot for {corpse_name}.")
         elif config.DEBUG_MODE: print(f"DEBUG LOOT_HANDLER: Carried item_key '{item_key}' not found in GAME_ITEMS. Skipping.")
@@ -114,7 +114,7 @@ def create_corpse_object_data(defeated_entity_template, defeated_entity_runtime_
             item_should_drop = False
             if equipped_item_id in always_drop_list: item_should_drop = True;                 
             if config.DEBUG_MODE and item_should_drop: print(f"DEBUG LOOT_HANDLER: Equipped item '{equipped_item_id}' (slot: {slot}) is in always_drop list.")
-            elif random.random() < chance_drop_others: item_should_drop = True;                
+            elif determinism.rng(determinism.STREAM_LOOT).random() < chance_drop_others: item_should_drop = True;                
             if config.DEBUG_MODE and item_should_drop and not (equipped_item_id in always_drop_list): print(f"DEBUG LOOT_HANDLER: Equipped item '{equipped_item_id}' (slot: {slot}) dropped by chance ({chance_drop_others*100}%).")
             
             if item_should_drop: loot_items_for_corpse_inventory.append(equipped_item_id);                
@@ -140,26 +140,21 @@ def create_corpse_object_data(defeated_entity_template, defeated_entity_runtime_
         "is_corpse": True, 
         "skinnable": defeated_entity_template.get("skinnable", False), 
         "skinned": False, "searched_and_emptied": False, 
-        "created_at": time.time(),
-        "decay_at": time.time() + getattr(config, 'CORPSE_DECAY_TIME_SECONDS', 300)
+        "created_at": determinism.now(),
+        "decay_at": determinism.now() + getattr(config, 'CORPSE_DECAY_TIME_SECONDS', 300)
     }
     if final_loot_on_corpse: corpse_data["description"] += " It looks like it might have something of value."
     else: corpse_data["description"] += " It appears to have nothing of value on it."; corpse_data["searched_and_emptied"] = True 
     if config.DEBUG_MODE: print(f"DEBUG LOOT_HANDLER: Created corpse data for '{corpse_name}' (ID: {corpse_id}) with inventory: {final_loot_on_corpse}, skinnable: {corpse_data['skinnable']}, template_key: {original_template_key}")
     return corpse_data
 
-def process_corpse_decay(game_rooms_dict, log_time_prefix):
-    # ... (function remains the same) ...
-    current_time = time.time(); decayed_corpse_messages = {} 
-    for room_id, room_data in game_rooms_dict.items():
-        objects_in_room = room_data.get("objects", {}); 
-        if not objects_in_room: continue
-        corpse_ids_to_remove = [obj_id for obj_id, obj_data in objects_in_room.items() if obj_data.get("is_corpse") and obj_data.get("decay_at", 0) < current_time]
-        for corpse_id_to_remove in corpse_ids_to_remove:
-            obj_data = objects_in_room.pop(corpse_id_to_remove, None)
-            if obj_data and config.DEBUG_MODE: print(f"{log_time_prefix} - CORPSE_DECAY: Corpse '{obj_data.get('name', corpse_id_to_remove)}' in room {room_id} decayed.")
-            decay_message = f"The {obj_data.get('name', 'corpse') if obj_data else 'corpse'} decays and disappears."
-            decayed_corpse_messages.setdefault(room_id, []).append(decay_message)
-    return decayed_corpse_messages
+def decay_corpse(room_id, room_data, corpse_id, log_time_prefix):
+    """Removes one corpse from its room. Returns the decay message, or None if the corpse is already gone."""
+    objects_in_room = room_data.get("objects", {}) if room_data else {}
+    obj_data = objects_in_room.get(corpse_id)
+    if not obj_data or not obj_data.get("is_corpse"): return None
+    objects_in_room.pop(corpse_id, None); room_index.remove_object(room_data, corpse_id)
+    if config.DEBUG_MODE: print(f"{log_time_prefix} - CORPSE_DECAY: Corpse '{obj_data.get('name', corpse_id)}' in room {room_id} decayed.")
+    return f"The {obj_data.get('name', 'corpse')} decays and disappears."
 
 if config.DEBUG_MODE: print("game_logic.loot_handler loaded.")
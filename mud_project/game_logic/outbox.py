@@ -0,0 +1,117 @@
+# mud_project/game_logic/outbox.py
+# Per-SID coalescing of client emits. A command, the entity attacks that follow it and the room broadcasts it causes
+# used to reach a player as several 'game_messages' emits plus a 'stats_update' each; main.emit_to_client now queues
+# them here instead, and every SID's queue goes out as ONE 'game_messages' frame: all its messages in order, plus its
+# stats_update deltas merged into one payload under "stats_update". Frames are flushed OUTBOX_FLUSH_WINDOW_MS after the first emit queued
+# since the last flush (None: only at the end of each game tick, with everything else the tick sends).
+# Room broadcasts (main.emit_to_room) queue here too, as one emit to the room's Socket.IO channel that the transport fans
+# out, and so do the channel joins/leaves that follow players around: both go out in the order they were queued, so a
+# broadcast reaches exactly the players who were in the room when it was made. A broadcast or channel move closes every
+# SID's open frame: what a SID is sent after it starts a new frame behind it, so no client sees its own messages jump
+# ahead of a broadcast queued before them. Back-to-back broadcasts to the same channel with the same exclusions ride in one emit.
+import threading
+
+try:
+    import config
+except ImportError:
+    class MockConfigOutbox:
+        DEBUG_MODE = True; OUTBOX_ENABLED = True; OUTBOX_FLUSH_WINDOW_MS = 30
+    config = MockConfigOutbox()
+
+from . import tick_profiler
+from . import determinism
+
+EVENT_GAME_MESSAGES = "game_messages"
+EVENT_STATS_UPDATE = "stats_update"
+FRAME_STATS_KEY = "stats_update" # a frame's stats_update payload: every delta queued for its SID, merged
+COUNTER_FRAMES_SENT = "outbox_frames_sent"
+COUNTER_EMITS_COALESCED = "outbox_emits_coalesced" # emits that rode along in a frame instead of going out on their own
+COUNTER_ROOM_BROADCASTS = "outbox_room_broadcasts" # fan-out emits to room channels
+ENTRY_SID = "sid"; ENTRY_BROADCAST = "broadcast"; ENTRY_CHANNEL_MOVE = "channel_move" # entry keys: (kind, sequence number)
+
+def merge_stats_updates(earlier, later):
+    """One stats_update payload equivalent to applying `earlier` then `later` (both {"version", "full", "raw_stats"})."""
+    if earlier is None or later.get("full"): return later
+    return {"version": later.get("version"), "full": earlier.get("full", False), "raw_stats": {**earlier.get("raw_stats", {}), **later.get("raw_stats", {})}}
+
+class ClientOutbox:
+    """Frames being built, one open frame per SID. Emits arrive from the simulation thread and (rarely) Socket.IO handler threads."""
+
+    def __init__(self, window_seconds=None):
+        window_ms = getattr(config, 'OUTBOX_FLUSH_WINDOW_MS', 30)
+        self.window_seconds = window_seconds if window_seconds is not None else (None if window_ms is None else window_ms / 1000.0)
+        self._frames = {} # (kind, seq) -> (sid, {"messages": [...], FRAME_STATS_KEY: payload}) / broadcast / channel move, in queue order
+        self._open_frames = {} # sid -> its frame that later emits still join (none past a broadcast or channel move)
+        self._queued_emits = 0; self._first_queued_at = None; self._sequence = 0
+        self._last_broadcast = None # the broadcast entry at the end of the queue, if the last entry is one (back-to-back merging)
+        self._lock = threading.Lock()
+
+    def queue(self, event_name, payload, sid):
+        """Adds an emit to its SID's frame. Returns False (caller emits it directly) for events that are not coalesced."""
+        if sid is None or event_name not in (EVENT_GAME_MESSAGES, EVENT_STATS_UPDATE): return False
+        with self._lock:
+            frame = self._open_frames.get(sid)
+            if frame is None:
+                self._sequence += 1; frame = self._open_frames[sid] = {"messages": []}
+                self._frames[(ENTRY_SID, self._sequence)] = (sid, frame); self._last_broadcast = None
+            if event_name == EVENT_GAME_MESSAGES: frame["messages"].extend(payload.get("messages", []))
+            else: frame[FRAME_STATS_KEY] = merge_stats_updates(frame.get(FRAME_STATS_KEY), payload)
+            self._queued_emits += 1
+            if self._first_queued_at is None: self._first_queued_at = determinism.now()
+        return True
+
+    def queue_broadcast(self, channel, messages, skip_sids=()):
+        """Queues messages for everyone in a room channel except skip_sids, as one fan-out emit."""
+        skip_sids = tuple(skip_sids) if len(skip_sids) < 2 else tuple(sorted(set(skip_sids)))
+        with self._lock:
+            last_entry = self._last_broadcast
+            if last_entry is not None and last_entry["channel"] == channel and last_entry["skip_sids"] == skip_sids: last_entry["messages"].extend(messages)
+            else:
+                self._sequence += 1
+                self._last_broadcast = self._frames[(ENTRY_BROADCAST, self._sequence)] = {"channel": channel, "skip_sids": skip_sids, "messages": list(messages)}
+            self._open_frames.clear(); self._queued_emits += 1
+            if self._first_queued_at is None: self._first_queued_at = determinism.now()
+
+    def queue_channel_move(self, sid, leave_channel, join_channel):
+        """Queues a SID's move between room channels, applied in order with the broadcasts around it."""
+        with self._lock:
+            self._sequence += 1; self._frames[(ENTRY_CHANNEL_MOVE, self._sequence)] = (sid, leave_channel, join_channel)
+            self._open_frames.clear(); self._last_broadcast = None
+
+    def discard(self, sid):
+        """Drops every frame queued for a SID (disconnect); its channel moves stay, in order."""
+        with self._lock:
+            self._open_frames.pop(sid, None)
+            for key in [key for key, entry in self._frames.items() if key[0] == ENTRY_SID and entry[0] == sid]: del self._frames[key]
+
+    def pending(self):
+        return len(self._frames)
+
+    def due_at(self):
+        """When the queued frames must go out between ticks (None: nothing queued, or flushing only at tick end)."""
+        first_queued_at = self._first_queued_at
+        if first_queued_at is None or self.window_seconds is None: return None
+        return first_queued_at + self.window_seconds
+
+    def flush(self, emit, move_channel=None):
+        """Sends every queued entry in order: SID frames and broadcasts through emit(event_name, payload, room, skip_sid=...),
+        channel moves through move_channel(sid, leave_channel, join_channel). Returns the number of emits made."""
+        with self._lock:
+            frames = self._frames; queued_emits = self._queued_emits
+            self._frames = {}; self._open_frames = {}; self._queued_emits = 0; self._first_queued_at = None; self._last_broadcast = None
+        frames_sent = broadcasts_sent = 0
+        for key, entry in frames.items():
+            if key[0] == ENTRY_SID: emit(EVENT_GAME_MESSAGES, entry[1], entry[0]); frames_sent += 1
+            elif key[0] == ENTRY_BROADCAST:
+                emit(EVENT_GAME_MESSAGES, {"messages": entry["messages"]}, entry["channel"], skip_sid=list(entry["skip_sids"]) or None); broadcasts_sent += 1
+            elif move_channel is not None: move_channel(*entry)
+        tick_profiler.TICK_PROFILER.increment(COUNTER_FRAMES_SENT, frames_sent); tick_profiler.TICK_PROFILER.increment(COUNTER_ROOM_BROADCASTS, broadcasts_sent)
+        tick_profiler.TICK_PROFILER.increment(COUNTER_EMITS_COALESCED, queued_emits - frames_sent - broadcasts_sent)
+        return frames_sent + broadcasts_sent
+
+    def flush_if_due(self, emit, move_channel=None, now=None):
+        due_at = self.due_at()
+        if due_at is None or (determinism.now() if now is None else now) < due_at: return 0
+        return self.flush(emit, move_channel)
+
+if config.DEBUG_MODE: print("game_logic.outbox loaded.")
@@ -0,0 +1,179 @@
+# mud_project/game_logic/room_index.py
+# Per-room inverted keyword indexes for targeting ('attack goblin 2', 'look at well', 'get sword').
+# Each room's index maps a lowercased name, name word, keyword or key to the NPCs, monsters, objects and static items
+# it can mean (static items answer to their full name, keywords and id only), in room order, so
+# main.find_combat_target_in_room / find_object_in_room become dictionary hits instead of lowercasing every template on
+# every command. Indexes are built lazily per room and kept current by the code that
+# changes a room: add_object / remove_object (ground items, corpses, pickups, decay), remove_static_item (pickups)
+# and add_npc (respawns); the same hooks bump the room's room_state versions so room_render's cached renders go stale.
+# Monsters are indexed as their MonsterInstance objects, which respawn in place, so a monster's entries never change
+# once built. Player names are indexed per room from room_state's occupancy listener.
+try:
+    import config
+except ImportError:
+    class MockConfigRoomIndex:
+        DEBUG_MODE = True
+    config = MockConfigRoomIndex()
+
+from classes import templates
+from classes import monster as monster_registry
+from . import room_state
+
+OBJECT_TIER_NAME = 0      # object name/keywords, corpse words, ground item template id (find_object_in_room's first pass)
+OBJECT_TIER_FIXTURE_ID = 2 # a fixture's object id (its third pass); static items are the second pass
+
+# --- Module-level state (GAME_TEMPLATES is bound by main.load_game_world) ---
+GAME_TEMPLATES = templates.GameTemplates() # compiled templates: their pre-lowercased match tokens are what gets indexed
+ROOM_INDEXES = {}      # room_id -> RoomKeywordIndex
+ROOM_PLAYER_NAMES = {} # room_id -> {player name lowercased: sid}
+PLAYER_INDEXED_NAMES = {} # sid -> player name lowercased, for removal after the player object is gone
+PLAYER_LOOKUP = {}     # sid -> Player (main binds active_players here)
+# --- End Module-level state ---
+
+def object_tokens(obj_id, obj_data):
+    """[(token, tier)] an object answers to, mirroring find_object_in_room's match rules."""
+    tokens = {(obj_data.get("name", "").lower(), OBJECT_TIER_NAME)}
+    tokens.update((k.lower(), OBJECT_TIER_NAME) for k in obj_data.get("keywords", []))
+    if obj_data.get("is_corpse"):
+        original_name = obj_data.get("original_name", "").lower()
+        tokens.update([("corpse", OBJECT_TIER_NAME), (original_name, OBJECT_TIER_NAME)]); tokens.update((part, OBJECT_TIER_NAME) for part in original_name.split())
+    if obj_data.get("is_ground_item"): tokens.add((obj_data.get("item_template_id", "").lower(), OBJECT_TIER_NAME))
+    if not obj_data.get("is_corpse") and not obj_data.get("is_ground_item"): tokens.add((str(obj_id).lower(), OBJECT_TIER_FIXTURE_ID))
+    return [(token, tier) for token, tier in tokens if token]
+
+def static_item_tokens(item_id, template):
+    """Tokens a static item answers to: its full name, keywords and id, as find_object_in_room matched them (no name words)."""
+    tokens = {(template.name or "").lower(), str(item_id).lower()}; tokens.update(template.keywords)
+    tokens.discard("")
+    return tokens
+
+class RoomKeywordIndex:
+    __slots__ = ("npcs", "monsters", "objects", "object_tokens", "items", "next_object_seq")
+
+    def __init__(self):
+        self.npcs = {}     # token -> [npc_key] in room order
+        self.monsters = {} # token -> [MonsterInstance] in room order (defeated ones included; callers skip them)
+        self.objects = {}  # token -> {obj_id: (tier, insertion seq)}
+        self.object_tokens = {} # obj_id -> [(token, tier)] it was indexed under
+        self.items = {}    # token -> [static item_id] in room order (duplicates kept, like the room's item list)
+        self.next_object_seq = 0
+
+    def add_npc(self, npc_key):
+        template = GAME_TEMPLATES.npcs.get(npc_key)
+        if template is None: return
+        for token in template.tokens: self.npcs.setdefault(token, []).append(npc_key)
+
+    def add_monster(self, instance):
+        template = GAME_TEMPLATES.monsters.get(instance.template_key)
+        if template is None: return
+        for token in template.tokens: self.monsters.setdefault(token, []).append(instance)
+
+    def add_object(self, obj_id, obj_data):
+        seq = None
+        if obj_id in self.object_tokens: # replaced in place: the dict keeps its position, so keep its seq
+            indexed_tokens = self.object_tokens[obj_id]
+            if indexed_tokens: seq = self.objects[indexed_tokens[0][0]][obj_id][1]
+            self.remove_object(obj_id)
+        if seq is None: seq = self.next_object_seq; self.next_object_seq += 1
+        tokens = object_tokens(obj_id, obj_data); self.object_tokens[obj_id] = tokens
+        for token, tier in tokens: self.objects.setdefault(token, {})[obj_id] = (tier, seq)
+
+    def remove_object(self, obj_id):
+        for token, _ in self.object_tokens.pop(obj_id, []):
+            candidates = self.objects.get(token)
+            if candidates is None: continue
+            candidates.pop(obj_id, None)
+            if not candidates: del self.objects[token]
+
+    def add_static_item(self, item_id):
+        template = GAME_TEMPLATES.items.get(item_id)
+        if template is None: return
+        for token in static_item_tokens(item_id, template): self.items.setdefault(token, []).append(item_id)
+
+    def remove_static_item(self, item_id):
+        """One copy (the first, as list.remove takes) of a static item left the room."""
+        template = GAME_TEMPLATES.items.get(item_id)
+        if template is None: return
+        for token in static_item_tokens(item_id, template):
+            candidates = self.items.get(token)
+            if candidates and item_id in candidates:
+                candidates.remove(item_id)
+                if not candidates: del self.items[token]
+
+def build_room_index(room_data):
+    index = RoomKeywordIndex()
+    for npc_key in room_data.get("npcs", []): index.add_npc(npc_key)
+    for instance in monster_registry.room_monsters(_room_key(room_data)): index.add_monster(instance)
+    for obj_id, obj_data in room_data.get("objects", {}).items(): index.add_object(obj_id, obj_data)
+    for item_id in room_data.get("items", []): index.add_static_item(item_id)
+    return index
+
+def _room_key(room_data):
+    return room_state.normalize_room_id(room_data["id"]) if "id" in room_data else id(room_data)
+
+def get_room_index(room_data):
+    room_key = _room_key(room_data); index = ROOM_INDEXES.get(room_key)
+    if index is None: index = ROOM_INDEXES[room_key] = build_room_index(room_data)
+    return index
+
+# --- Mutation hooks (index updates are no-ops for rooms whose index has not been built yet: it will be built from the
+# room data; the room's room_state version is bumped either way so cached renders of it go stale) ---
+def add_object(room_data, obj_id, obj_data):
+    room_key = _room_key(room_data); room_state.bump_object_version(room_key); index = ROOM_INDEXES.get(room_key)
+    if index is not None: index.add_object(obj_id, obj_data)
+
+def remove_object(room_data, obj_id):
+    room_key = _room_key(room_data); room_state.bump_object_version(room_key); index = ROOM_INDEXES.get(room_key)
+    if index is not None: index.remove_object(obj_id)
+
+def remove_static_item(room_data, item_id):
+    room_key = _room_key(room_data); room_state.bump_object_version(room_key); index = ROOM_INDEXES.get(room_key)
+    if index is not None: index.remove_static_item(item_id)
+
+def add_npc(room_data, npc_key):
+    room_key = _room_key(room_data); room_state.bump_room_version(room_key); index = ROOM_INDEXES.get(room_key)
+    if index is not None: index.add_npc(npc_key)
+
+def invalidate_room(room_data=None):
+    """Drops one room's index (after editing its lists wholesale), or every room's."""
+    if room_data is None: ROOM_INDEXES.clear(); return
+    room_key = _room_key(room_data); ROOM_INDEXES.pop(room_key, None)
+    room_state.bump_room_version(room_key); room_state.bump_object_version(room_key)
+
+# --- Lookups ---
+def find_object_candidate(room_data, target_lower):
+    """('object', obj_id) or ('item', item_id) for find_object_in_room's first match, else None."""
+    index = get_room_index(room_data)
+    best = None
+    for obj_id, tier_seq in index.objects.get(target_lower, {}).items():
+        if best is None or tier_seq < best[0]: best = (tier_seq, obj_id)
+    if best is not None and best[0][0] == OBJECT_TIER_NAME: return "object", best[1]
+    static_items = index.items.get(target_lower)
+    if static_items: return "item", static_items[0]
+    return ("object", best[1]) if best is not None else None
+
+def npc_candidates(room_data, target_lower):
+    return get_room_index(room_data).npcs.get(target_lower, ())
+
+def monster_candidates(room_data, target_lower):
+    return get_room_index(room_data).monsters.get(target_lower, ())
+
+def find_player_sid(room_id, target_lower):
+    return ROOM_PLAYER_NAMES.get(room_id, {}).get(target_lower)
+
+def _on_occupancy_change(sid, old_room_id, new_room_id):
+    name_lower = PLAYER_INDEXED_NAMES.get(sid)
+    if name_lower is None:
+        player_object = PLAYER_LOOKUP.get(sid)
+        name_lower = getattr(player_object, 'name', "").lower() if player_object else None
+    if old_room_id is not None and name_lower is not None:
+        names = ROOM_PLAYER_NAMES.get(old_room_id)
+        if names is not None and names.get(name_lower) == sid:
+            del names[name_lower]
+            if not names: del ROOM_PLAYER_NAMES[old_room_id]
+    if new_room_id is None: PLAYER_INDEXED_NAMES.pop(sid, None); return
+    if name_lower: ROOM_PLAYER_NAMES.setdefault(new_room_id, {})[name_lower] = sid; PLAYER_INDEXED_NAMES[sid] = name_lower
+
+room_state.OCCUPANCY_LISTENERS.append(_on_occupancy_change)
+
+if config.DEBUG_MODE: print("game_logic.room_index loaded.")
@@ -0,0 +1,107 @@
+# mud_project/game_logic/room_render.py
+# Cached renders of what main.send_room_description shows for a room. Each room keeps one RoomRender whose three parts
+# are rebuilt only when what they depend on changes:
+#   description, name, exits - the room's data, time of day and weather (room_state.ROOM_VERSIONS + environment state)
+#   presence list            - its NPCs/monsters and who of them is up, and its players (ROOM_VERSIONS + OCCUPANCY_VERSIONS)
+#   items summary            - its static items, ground items and corpses (room_state.OBJECT_VERSIONS)
+# The presence list is cached with every player in the room; presence_summary() takes the viewer out of it per call,
+# so a look or move into a crowded room costs a list copy and a join instead of a rebuild and sort.
+from bisect import bisect_left
+
+try:
+    import config
+except ImportError:
+    class MockConfigRoomRender:
+        DEBUG_MODE = True
+    config = MockConfigRoomRender()
+
+from classes import monster as monster_registry
+from . import room_state
+from . import combat
+from . import environment as environment_system
+from . import tick_profiler
+
+COUNTER_RENDERS_CACHED = "room_renders_cached"  # send_room_description calls served entirely from the cache
+COUNTER_RENDER_REBUILDS = "room_render_rebuilds" # cached parts rebuilt because a version they depend on moved
+
+# --- Module-level state ---
+RENDER_CACHE = {} # room_id -> RoomRender
+# --- End Module-level state ---
+
+class RoomRender:
+    __slots__ = ("room_data", "description_key", "name", "description", "exits",
+                 "presence_key", "present_names", "present_sids", "objects_key", "items_summary")
+
+    def __init__(self, room_data):
+        self.room_data = room_data
+        self.description_key = self.presence_key = self.objects_key = None # None: never built
+        self.name = self.description = self.exits = self.items_summary = ""
+        self.present_names = []; self.present_sids = frozenset()
+
+def _present_names(room_id, room_data, active_players_dict, game_npcs):
+    """Sorted names of everyone in the room (its players included), and the SIDs of the players counted."""
+    players = room_state.get_players_in_room(room_id, active_players_dict)
+    all_present_names = [p_other.name for p_other in players]
+    for npc_key in room_data.get("npcs", []):
+        npc_template = game_npcs.get(npc_key)
+        if npc_template and not combat.is_entity_defeated(npc_key): all_present_names.append(npc_template.get("name", npc_key))
+    all_present_names.extend(instance.name for instance in monster_registry.room_monsters(room_id) if not instance.defeated)
+    all_present_names.sort()
+    return all_present_names, frozenset(p_other.sid for p_other in players)
+
+def _items_summary(room_data, game_items):
+    visible_item_names_with_counts = {}
+    # Static items from room definition (less likely to have multiples of same ID here)
+    for item_id_static in room_data.get("items", []):
+        item_tpl_static = game_items.get(item_id_static)
+        if item_tpl_static:
+            name = item_tpl_static.get("name", item_id_static)
+            visible_item_names_with_counts[name] = visible_item_names_with_counts.get(name, 0) + 1
+    # Dynamic items (corpses, dropped items) from room's "objects"
+    for obj_data_dynamic in room_data.get("objects", {}).values():
+        if obj_data_dynamic.get("is_corpse") or obj_data_dynamic.get("is_ground_item"):
+            name = obj_data_dynamic.get("name", "an object")
+            visible_item_names_with_counts[name] = visible_item_names_with_counts.get(name, 0) + 1
+    items_on_ground_str_parts = [f"{name}{f' (x{count})' if count > 1 else ''}" for name, count in sorted(visible_item_names_with_counts.items())]
+    return "YOU ALSO SEE: " + (", ".join(items_on_ground_str_parts) + "." if items_on_ground_str_parts else "(nothing)")
+
+def render_room(room_id, room_data, active_players_dict, game_npcs, game_items):
+    """The room's RoomRender, with any part whose versions moved rebuilt first."""
+    room_id = room_state.normalize_room_id(room_id)
+    render = RENDER_CACHE.get(room_id)
+    if render is None or render.room_data is not room_data: render = RENDER_CACHE[room_id] = RoomRender(room_data)
+    room_version = room_state.ROOM_VERSIONS.get(room_id, 0); rebuilt = 0
+
+    description_key = (room_version, environment_system.current_time_of_day, environment_system.current_weather)
+    if render.description_key != description_key:
+        render.name = room_data.get("name", "Nowhere Special"); render.description = environment_system.get_description_for_room(room_data)
+        render.exits = ", ".join(k.upper() for k in room_data.get("exits", {}).keys()) or "None"
+        render.description_key = description_key; rebuilt += 1
+
+    presence_key = (room_version, room_state.OCCUPANCY_VERSIONS.get(room_id, 0))
+    if render.presence_key != presence_key:
+        render.present_names, render.present_sids = _present_names(room_id, room_data, active_players_dict, game_npcs)
+        render.presence_key = presence_key; rebuilt += 1
+
+    objects_key = room_state.OBJECT_VERSIONS.get(room_id, 0)
+    if render.objects_key != objects_key:
+        render.items_summary = _items_summary(room_data, game_items); render.objects_key = objects_key; rebuilt += 1
+
+    if rebuilt: tick_profiler.TICK_PROFILER.increment(COUNTER_RENDER_REBUILDS, rebuilt)
+    else: tick_profiler.TICK_PROFILER.increment(COUNTER_RENDERS_CACHED)
+    return render
+
+def presence_summary(render, viewer):
+    """The "ALSO HERE" line as `viewer` sees it: the cached list without the viewer themselves."""
+    all_present_names = render.present_names
+    if getattr(viewer, 'sid', None) in render.present_sids:
+        position = bisect_left(all_present_names, viewer.name)
+        all_present_names = all_present_names[:position] + all_present_names[position + 1:]
+    return "ALSO HERE: " + ", ".join(all_present_names) + "." if all_present_names else ""
+
+def invalidate(room_id=None):
+    """Drops one room's cached render, or every room's (world reload)."""
+    if room_id is None: RENDER_CACHE.clear()
+    else: RENDER_CACHE.pop(room_state.normalize_room_id(room_id), None)
+
+if config.DEBUG_MODE: print("game_logic.room_render loaded.")
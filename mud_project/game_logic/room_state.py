@@ -0,0 +1,129 @@
+# mud_project/game_logic/room_state.py
+try:
+    import config
+except ImportError:
+    class MockConfigRoomState:
+        DEBUG_MODE = True
+        DISPOSITION_PASSIVE = "passive"; DISPOSITION_NEUTRAL = "neutral"; DISPOSITION_THREATENING = "threatening"
+        DISPOSITION_AGGRESSIVE = "aggressive"; DISPOSITION_HOSTILE_GENERAL = "hostile"
+    config = MockConfigRoomState()
+
+# Bound by main.py after game data is loaded (same pattern as loot_handler.GAME_LOOT_TABLES)
+GAME_ROOMS = {}
+GAME_NPCS = {}
+GAME_MONSTER_TEMPLATES = {}
+
+# --- Module-level state for room occupancy ---
+ROOM_OCCUPANTS = {} # room_id -> set of player SIDs currently in that room
+PLAYER_ROOMS = {}   # sid -> room_id the SID is indexed under
+ACTIVE_ROOMS = set() # rooms with at least one player AND at least one entity that can turn hostile
+OCCUPANCY_LISTENERS = [] # callables(sid, old_room_id, new_room_id); None stands for "not in the world" (login / disconnect)
+# Per-room change counters that render caches (room_render) key on. A room missing from a dict is at version 0.
+ROOM_VERSIONS = {}      # room_id -> bumped when its NPC/monster lists change or one of them is defeated / revived
+OBJECT_VERSIONS = {}    # room_id -> bumped when its ground items, corpses or static items change
+OCCUPANCY_VERSIONS = {} # room_id -> bumped whenever a player enters or leaves it
+# --- End Module-level state ---
+
+def normalize_room_id(room_id):
+    if isinstance(room_id, int): return room_id
+    try: return int(room_id)
+    except (TypeError, ValueError): return room_id
+
+def bump_room_version(room_id):
+    room_id = normalize_room_id(room_id); ROOM_VERSIONS[room_id] = ROOM_VERSIONS.get(room_id, 0) + 1
+
+def bump_object_version(room_id):
+    room_id = normalize_room_id(room_id); OBJECT_VERSIONS[room_id] = OBJECT_VERSIONS.get(room_id, 0) + 1
+
+def _bump_occupancy_version(room_id):
+    if room_id is not None: OCCUPANCY_VERSIONS[room_id] = OCCUPANCY_VERSIONS.get(room_id, 0) + 1
+
+def register_player(player_object):
+    """Adds a logged-in player to the occupancy index under their current room."""
+    if not player_object or not getattr(player_object, 'sid', None): return
+    _index_sid(player_object.sid, normalize_room_id(getattr(player_object, 'current_room_id', None)))
+
+def unregister_player(sid):
+    """Drops a SID from the occupancy index (disconnect / logout)."""
+    room_id = PLAYER_ROOMS.pop(sid, None)
+    if room_id is None: return
+    occupants = ROOM_OCCUPANTS.get(room_id)
+    if occupants is not None:
+        occupants.discard(sid)
+        if not occupants: ROOM_OCCUPANTS.pop(room_id, None); ACTIVE_ROOMS.discard(room_id)
+    _bump_occupancy_version(room_id)
+    _notify_listeners(sid, room_id, None)
+
+def move_player(player_object, new_room_id):
+    """Sets a player's current_room_id and keeps the occupancy index in step with it.
+    Players that are not indexed yet (e.g. still in character creation) only get the attribute set."""
+    new_room_id = normalize_room_id(new_room_id)
+    player_object.current_room_id = new_room_id
+    sid = getattr(player_object, 'sid', None)
+    if sid in PLAYER_ROOMS and PLAYER_ROOMS[sid] != new_room_id: _index_sid(sid, new_room_id)
+
+def sync_player(player_object):
+    """Re-indexes a player whose current_room_id was assigned directly instead of through move_player."""
+    sid = getattr(player_object, 'sid', None)
+    if sid not in PLAYER_ROOMS: return
+    room_id = normalize_room_id(player_object.current_room_id)
+    if PLAYER_ROOMS[sid] != room_id: _index_sid(sid, room_id)
+
+def entity_may_aggro(entity_template, is_npc=False):
+    aggro_behavior = entity_template.get("aggression_behavior", {})
+    base_disposition = aggro_behavior.get("base_disposition", config.DISPOSITION_NEUTRAL)
+    if aggro_behavior.get("attacks_on_sight", False): return True
+    if base_disposition in (config.DISPOSITION_AGGRESSIVE, config.DISPOSITION_THREATENING, config.DISPOSITION_HOSTILE_GENERAL): return True
+    return is_npc and bool(entity_template.get("faction_id")) # NPCs can also turn on players with poor faction standing
+
+def room_has_hostiles(room_data):
+    if not room_data: return False
+    for monster_template_key in room_data.get("monsters", []):
+        monster_template = GAME_MONSTER_TEMPLATES.get(monster_template_key)
+        if monster_template and entity_may_aggro(monster_template): return True
+    for npc_key in room_data.get("npcs", []):
+        npc_template = GAME_NPCS.get(npc_key)
+        if npc_template and entity_may_aggro(npc_template, is_npc=True): return True
+    return False
+
+def refresh_room_activity(room_id):
+    """Re-evaluates whether a room belongs in ACTIVE_ROOMS. Call after occupancy or the room's npcs/monsters lists change."""
+    room_id = normalize_room_id(room_id)
+    if ROOM_OCCUPANTS.get(room_id) and room_has_hostiles(GAME_ROOMS.get(room_id)): ACTIVE_ROOMS.add(room_id)
+    else: ACTIVE_ROOMS.discard(room_id)
+
+def rebuild_active_rooms():
+    ACTIVE_ROOMS.clear()
+    for room_id in list(ROOM_OCCUPANTS.keys()): refresh_room_activity(room_id)
+
+def get_sids_in_room(room_id):
+    return ROOM_OCCUPANTS.get(normalize_room_id(room_id), ())
+
+def get_players_in_room(room_id, active_players_dict, exclude_sid=None):
+    players_in_room = []
+    for sid in list(get_sids_in_room(room_id)):
+        if sid == exclude_sid: continue
+        player_obj = active_players_dict.get(sid)
+        if player_obj: players_in_room.append(player_obj)
+    return players_in_room
+
+def _index_sid(sid, room_id):
+    old_room_id = PLAYER_ROOMS.get(sid)
+    if old_room_id is not None:
+        old_occupants = ROOM_OCCUPANTS.get(old_room_id)
+        if old_occupants is not None:
+            old_occupants.discard(sid)
+            if not old_occupants: ROOM_OCCUPANTS.pop(old_room_id, None); ACTIVE_ROOMS.discard(old_room_id)
+    PLAYER_ROOMS[sid] = room_id
+    occupants = ROOM_OCCUPANTS.setdefault(room_id, set())
+    occupants.add(sid)
+    if len(occupants) == 1: refresh_room_activity(room_id)
+    _bump_occupancy_version(old_room_id); _bump_occupancy_version(room_id)
+    _notify_listeners(sid, old_room_id, room_id)
+
+def _notify_listeners(sid, old_room_id, new_room_id):
+    for listener in OCCUPANCY_LISTENERS:
+        try: listener(sid, old_room_id, new_room_id)
+        except Exception as e_listener: print(f"ERROR (room_state): occupancy listener {getattr(listener, '__name__', listener)} failed for {sid}: {e_listener}")
+
+if config.DEBUG_MODE: print("game_logic.room_state loaded.")
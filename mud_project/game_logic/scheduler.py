@@ -0,0 +1,184 @@
+# mud_project/game_logic/scheduler.py
+import heapq
+import itertools
+import threading
+
+try:
+    import config
+except ImportError:
+    class MockConfigScheduler:
+        DEBUG_MODE = True
+    config = MockConfigScheduler()
+
+# --- Timer lanes ---
+# Each lane is its own min-heap and keeps deadlines in its own clock: the respawn, corpse decay and
+# entity combat lanes use wall-clock seconds (time.time()), the threat lane uses game tick numbers.
+LANE_RESPAWN = "respawn"
+LANE_CORPSE_DECAY = "corpse_decay"
+LANE_THREAT = "threat"
+LANE_ENTITY_COMBAT = "entity_combat"
+
+class TimerHandle:
+    """Returned by TimerScheduler.schedule(); call cancel() to stop the callback from running."""
+    __slots__ = ("due_at", "lane", "callback", "args", "cancelled", "fired", "_scheduler")
+
+    def __init__(self, scheduler, lane, due_at, callback, args):
+        self._scheduler = scheduler; self.lane = lane; self.due_at = due_at
+        self.callback = callback; self.args = args
+        self.cancelled = False; self.fired = False
+
+    def cancel(self):
+        if self.cancelled or self.fired: return False
+        self.cancelled = True
+        self._scheduler._note_cancelled(self.lane)
+        return True
+
+    @property
+    def pending(self):
+        return not (self.cancelled or self.fired)
+
+class TimerScheduler:
+    """Heap-backed deadline scheduler. Polling loops register deadlines here and each tick only
+    touches the events that are actually due; cancelled handles are dropped lazily when popped."""
+
+    def __init__(self):
+        self._lanes = {}       # lane -> heap of (due_at, seq, handle)
+        self._cancelled = {}   # lane -> count of cancelled handles still sitting in the heap
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeups = {}     # lane -> threading.Event set whenever that lane gets a new deadline
+
+    def schedule(self, lane, due_at, callback, *args) -> TimerHandle:
+        handle = TimerHandle(self, lane, due_at, callback, args)
+        with self._lock:
+            heapq.heappush(self._lanes.setdefault(lane, []), (due_at, next(self._seq), handle))
+            wakeup = self._wakeups.get(lane)
+        if wakeup is not None: wakeup.set()
+        return handle
+
+    def pop_due(self, lane, now) -> list:
+        due_handles = []
+        with self._lock:
+            heap = self._lanes.get(lane)
+            while heap and heap[0][0] <= now:
+                handle = heapq.heappop(heap)[2]
+                if handle.cancelled:
+                    self._cancelled[lane] = max(0, self._cancelled.get(lane, 0) - 1); continue
+                handle.fired = True
+                due_handles.append(handle)
+        return due_handles
+
+    def _run_handles(self, lane, due_handles, extra_args=()):
+        for handle in due_handles:
+            try: handle.callback(*handle.args, *extra_args)
+            except Exception as e_timer:
+                print(f"!!! ERROR in scheduled '{lane}' callback {getattr(handle.callback, '__name__', handle.callback)}{handle.args}: {e_timer}")
+                if config.DEBUG_MODE:
+                    import traceback; traceback.print_exc()
+
+    def run_due(self, lane, now, *extra_args) -> int:
+        """Runs every pending callback in `lane` whose deadline is <= now. Returns how many ran."""
+        due_handles = self.pop_due(lane, now)
+        self._run_handles(lane, due_handles, extra_args)
+        return len(due_handles)
+
+    def run_due_batched(self, lane, now, batch_callback, min_batch_size) -> int:
+        """Like run_due, but when at least min_batch_size handles are due they go to batch_callback(handles) in one call
+        instead of their own callbacks (which the batch callback stands in for). Returns how many were due.
+        If batch_callback raises, the handles run one by one through their own callbacks instead, so the batch callback
+        must catch per-handle failures itself once it has started applying any handle's work."""
+        due_handles = self.pop_due(lane, now)
+        if len(due_handles) < max(1, min_batch_size): self._run_handles(lane, due_handles); return len(due_handles)
+        try: batch_callback(due_handles)
+        except Exception as e_batch:
+            print(f"!!! ERROR in scheduled '{lane}' batch callback {getattr(batch_callback, '__name__', batch_callback)} ({len(due_handles)} handles), running them singly: {e_batch}")
+            if config.DEBUG_MODE:
+                import traceback; traceback.print_exc()
+            self._run_handles(lane, due_handles)
+        return len(due_handles)
+
+    def next_due(self, lane):
+        with self._lock:
+            heap = self._lanes.get(lane)
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap); self._cancelled[lane] = max(0, self._cancelled.get(lane, 0) - 1)
+            return heap[0][0] if heap else None
+
+    def attach_wakeup(self, lane, event):
+        """Uses an existing threading.Event as the lane's wakeup, so one waiter can watch this lane and other work sources."""
+        with self._lock: self._wakeups[lane] = event
+
+    def wait_for_due(self, lane, now, max_wait):
+        """Blocks until the earliest deadline in `lane` (measured against `now`) or max_wait seconds pass.
+        A new deadline scheduled in the lane while waiting wakes the caller early so it can re-check."""
+        with self._lock: wakeup = self._wakeups.setdefault(lane, threading.Event())
+        wakeup.clear()
+        next_due_at = self.next_due(lane)
+        wait_seconds = max_wait if next_due_at is None else min(max_wait, next_due_at - now)
+        if wait_seconds > 0: wakeup.wait(wait_seconds)
+
+    def pending_count(self, lane=None) -> int:
+        with self._lock:
+            lanes = [lane] if lane is not None else list(self._lanes.keys())
+            return sum(len(self._lanes.get(l, [])) - self._cancelled.get(l, 0) for l in lanes)
+
+    def clear(self):
+        with self._lock:
+            self._lanes.clear(); self._cancelled.clear()
+
+    def _note_cancelled(self, lane):
+        with self._lock:
+            self._cancelled[lane] = self._cancelled.get(lane, 0) + 1
+            heap = self._lanes.get(lane)
+            # Rebuild the heap once most of it is dead weight so cancel-heavy lanes stay small
+            if heap and self._cancelled[lane] > 64 and self._cancelled[lane] * 2 > len(heap):
+                self._lanes[lane] = [entry for entry in heap if not entry[2].cancelled]
+                heapq.heapify(self._lanes[lane]); self._cancelled[lane] = 0
+
+# --- Game tick pacing ---
+TICK_CATCHUP_SKIP = "skip"         # drop missed ticks; the tick counter jumps forward so game time stays on real time
+TICK_CATCHUP_COMPRESS = "compress" # run every missed tick back-to-back until the loop is on schedule again
+TICK_CATCHUP_BUDGETED = "budgeted" # run up to max_catchup_ticks back-to-back, then skip whatever is still missed
+
+def interval_elapsed(tick_number, interval, ticks_elapsed=1):
+    """True if a multiple of `interval` falls in (tick_number - ticks_elapsed, tick_number].
+    With ticks_elapsed=1 this is `tick_number % interval == 0`; larger values cover ticks that were skipped."""
+    if interval <= 0: return False
+    return tick_number // interval != (tick_number - max(1, ticks_elapsed)) // interval
+
+class TickDeadlineClock:
+    """Paces the game tick against absolute monotonic deadlines (start + n * interval) rather than
+    sleeping `interval - processing_time`, so overruns do not push every later tick back."""
+
+    def __init__(self, interval, policy=TICK_CATCHUP_BUDGETED, max_catchup_ticks=3, max_lag_seconds=None):
+        self.interval = float(interval); self.policy = policy
+        self.max_catchup_ticks = max(0, int(max_catchup_ticks))
+        self.max_lag_seconds = max_lag_seconds if max_lag_seconds is not None else self.interval * 10
+        self.next_deadline = None; self.last_tick_start = None; self.catchup_streak = 0
+        self.last_lag = 0.0; self.last_jitter = 0.0
+
+    def begin_tick(self, now):
+        """Call as a tick starts. Records how late it started (lag) and how far the spacing since the previous tick strayed from the interval (jitter)."""
+        if self.next_deadline is None: self.next_deadline = now
+        self.last_lag = max(0.0, now - self.next_deadline)
+        self.last_jitter = abs((now - self.last_tick_start) - self.interval) if self.last_tick_start is not None else 0.0
+        self.last_tick_start = now
+        return self.last_lag
+
+    def end_tick(self, now):
+        """Call once a tick's work is done. Returns (sleep_seconds, ticks_skipped) for the next tick."""
+        self.next_deadline += self.interval
+        if now < self.next_deadline:
+            self.catchup_streak = 0
+            return self.next_deadline - now, 0
+        missed_ticks = int((now - self.next_deadline) // self.interval) # whole ticks behind beyond the one due now
+        if now - self.next_deadline > self.max_lag_seconds or self.policy == TICK_CATCHUP_SKIP or \
+                (self.policy == TICK_CATCHUP_BUDGETED and self.catchup_streak >= self.max_catchup_ticks):
+            self.next_deadline += missed_ticks * self.interval; self.catchup_streak = 0
+            return 0.0, missed_ticks
+        self.catchup_streak += 1
+        return 0.0, 0
+
+GAME_TIMERS = TimerScheduler()
+
+if config.DEBUG_MODE: print("game_logic.scheduler loaded.")
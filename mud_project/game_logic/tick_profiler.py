@@ -0,0 +1,131 @@
+# mud_project/game_logic/tick_profiler.py
+import time
+import threading
+from collections import deque
+
+try:
+    import config
+except ImportError:
+    class MockConfigTickProfiler:
+        DEBUG_MODE = True
+        TICK_PROFILER_WINDOW = 200
+    config = MockConfigTickProfiler()
+
+# --- Phase names, in the order the game tick runs them ---
+PHASE_ENVIRONMENT = "environment"
+PHASE_RESPAWN = "respawn"
+PHASE_CORPSE_DECAY = "corpse_decay"
+PHASE_ENTITY_STATE = "entity_state"
+PHASE_AGGRO = "aggro"
+PHASE_THREAT_TIMERS = "threat_timers"
+PHASE_ENTITY_COMBAT = "entity_combat"
+PHASE_XP_ABSORPTION = "xp_absorption"
+PHASE_MESSAGE_FLUSH = "message_flush"
+PHASE_TICK_TOTAL = "tick_total"
+METRIC_TICK_LAG = "tick_lag"       # how late each tick started relative to its deadline
+METRIC_TICK_JITTER = "tick_jitter" # |spacing between tick starts - TICK_INTERVAL_SECONDS|
+TICK_PHASES = [PHASE_ENVIRONMENT, PHASE_RESPAWN, PHASE_CORPSE_DECAY, PHASE_ENTITY_STATE, PHASE_AGGRO, PHASE_THREAT_TIMERS,
+               PHASE_ENTITY_COMBAT, PHASE_XP_ABSORPTION, PHASE_MESSAGE_FLUSH, PHASE_TICK_TOTAL, METRIC_TICK_LAG, METRIC_TICK_JITTER]
+
+# --- Counter names ---
+COUNTER_TICKS = "ticks"
+COUNTER_TICK_OVERRUNS = "tick_overruns"
+COUNTER_TICKS_SKIPPED = "ticks_skipped"
+COUNTER_TICKS_CAUGHT_UP = "ticks_caught_up"
+COUNTER_ENTITIES_PROCESSED = "entities_processed"
+COUNTER_ENTITY_ATTACKS = "entity_attacks"
+COUNTER_PLAYERS_PROCESSED = "players_processed"
+COUNTER_MESSAGES_EMITTED = "messages_emitted"
+
+class RollingHistogram:
+    """Keeps the last `window` samples (seconds) and answers percentile queries over them."""
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=max(1, int(window)))
+        self.count = 0; self.total = 0.0; self.max_seen = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1; self.total += value
+        if value > self.max_seen: self.max_seen = value
+
+    def percentile(self, pct, ordered=None):
+        ordered = ordered if ordered is not None else sorted(self.samples)
+        if not ordered: return 0.0
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {"count": self.count, "window": len(ordered),
+                "last_ms": round(self.samples[-1] * 1000.0, 3) if self.samples else 0.0,
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000.0, 3) if ordered else 0.0,
+                "p50_ms": round(self.percentile(50, ordered) * 1000.0, 3),
+                "p95_ms": round(self.percentile(95, ordered) * 1000.0, 3),
+                "p99_ms": round(self.percentile(99, ordered) * 1000.0, 3),
+                "max_ms": round(self.max_seen * 1000.0, 3)}
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "phase_name", "started_at")
+
+    def __init__(self, profiler, phase_name):
+        self.profiler = profiler; self.phase_name = phase_name; self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter(); return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.profiler.record(self.phase_name, time.perf_counter() - self.started_at)
+        return False
+
+class TickProfiler:
+    """Per-phase timing histograms and monotonically increasing counters for the game loops."""
+
+    def __init__(self, window=None):
+        self.window = window if window is not None else getattr(config, 'TICK_PROFILER_WINDOW', 200)
+        self.enabled = getattr(config, 'TICK_PROFILER_ENABLED', True)
+        self.phases = {}; self.counters = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def phase(self, phase_name):
+        """Context manager: `with TICK_PROFILER.phase(PHASE_AGGRO): ...`"""
+        return _PhaseTimer(self, phase_name)
+
+    def record(self, phase_name, seconds):
+        if not self.enabled: return
+        with self._lock:
+            histogram = self.phases.get(phase_name)
+            if histogram is None: histogram = self.phases[phase_name] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def increment(self, counter_name, amount=1):
+        if not self.enabled or not amount: return
+        with self._lock: self.counters[counter_name] = self.counters.get(counter_name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.phases.clear(); self.counters.clear(); self.started_at = time.time()
+
+    def snapshot(self):
+        """Machine-readable view (plain dicts/numbers, JSON serialisable)."""
+        with self._lock:
+            ordered_names = [name for name in TICK_PHASES if name in self.phases] + sorted(name for name in self.phases if name not in TICK_PHASES)
+            return {"generated_at": time.time(), "uptime_seconds": round(time.time() - self.started_at, 3),
+                    "window": self.window, "phases": {name: self.phases[name].summary() for name in ordered_names},
+                    "counters": dict(self.counters)}
+
+    def format_report(self):
+        """Human-readable lines for the in-game admin command."""
+        data = self.snapshot()
+        lines = [f"Tick profile over the last {data['window']} samples per phase (uptime {data['uptime_seconds']:.0f}s):",
+                 f"{'phase':<16}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}{'count':>9}"]
+        for name, stats in data["phases"].items():
+            lines.append(f"{name:<16}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}{stats['count']:>9}")
+        if not data["phases"]: lines.append("(no samples yet)")
+        if data["counters"]: lines.append("Counters: " + ", ".join(f"{k}={v}" for k, v in sorted(data["counters"].items())))
+        return lines
+
+TICK_PROFILER = TickProfiler()
+
+if config.DEBUG_MODE: print("game_logic.tick_profiler loaded.")
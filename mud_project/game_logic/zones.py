@@ -0,0 +1,122 @@
+# mud_project/game_logic/zones.py
+# Zone partition of the world and its shard assignment. Shards are a profiling split, not workers: the tick runs each
+# shard's aggro pass in turn on the simulation thread and times it separately (aggro_shard_N), and zone crossings are
+# counted for the admin dump, to show which zones would pay off moving out of process.
+try:
+    import config
+except ImportError:
+    class MockConfigZones:
+        DEBUG_MODE = True
+        ZONE_TAGS = ["oakhaven"]
+        ZONE_SHARD_COUNT = 1
+    config = MockConfigZones()
+
+from . import room_state
+
+# --- Module-level state for the zone partition (rebuilt by build_zone_map) ---
+ROOM_ZONES = {}      # room_id -> zone name
+ZONE_ROOMS = {}      # zone name -> set of room_ids
+ZONE_SHARDS = {}     # zone name -> shard index the zone is assigned to
+BOUNDARY_EXITS = {}  # (room_id, exit_key) -> (from_zone, to_zone) for exits that leave a zone
+ZONE_HANDOFFS = {}   # (from_zone, to_zone) -> number of player crossings seen
+# --- End Module-level state ---
+
+def resolve_room_zone(room_data):
+    """A room's explicit "zone" key wins; otherwise its first tag that appears in config.ZONE_TAGS. None if neither."""
+    if not room_data: return None
+    if room_data.get("zone"): return room_data["zone"]
+    zone_tags = getattr(config, 'ZONE_TAGS', [])
+    for tag in room_data.get("tags", []):
+        if tag in zone_tags: return tag
+    return None
+
+def _room_sort_key(room_id):
+    return (0, room_id, "") if isinstance(room_id, int) else (1, 0, str(room_id))
+
+def _room_links(room_data):
+    """Exit keys and destination room ids, including object actions that move the player (e.g. 'climb rope down')."""
+    for exit_key, destination in room_data.get("exits", {}).items(): yield exit_key, destination
+    for obj_data in room_data.get("objects", {}).values():
+        if isinstance(obj_data, dict) and isinstance(obj_data.get("actions"), dict):
+            for action_phrase, action_result in obj_data["actions"].items():
+                if isinstance(action_result, int): yield action_phrase, action_result
+
+def build_zone_map(game_rooms_dict, shard_count=None):
+    """Partitions the world into zones and assigns zones to shards.
+    Rooms with no zone are grouped with the untagged rooms they connect to and named after the lowest room id in the group."""
+    ROOM_ZONES.clear(); ZONE_ROOMS.clear(); ZONE_SHARDS.clear(); BOUNDARY_EXITS.clear()
+    unzoned_room_ids = []
+    for room_id, room_data in game_rooms_dict.items():
+        zone_name = resolve_room_zone(room_data)
+        if zone_name: ROOM_ZONES[room_id] = zone_name
+        else: unzoned_room_ids.append(room_id)
+
+    # Flood-fill the untagged rooms into connected groups (exits are treated as two-way for grouping)
+    unzoned_neighbours = {room_id: set() for room_id in unzoned_room_ids}
+    for room_id in unzoned_room_ids:
+        for _, destination in _room_links(game_rooms_dict[room_id]):
+            destination = room_state.normalize_room_id(destination)
+            if destination in unzoned_neighbours: unzoned_neighbours[room_id].add(destination); unzoned_neighbours[destination].add(room_id)
+    for start_room_id in sorted(unzoned_room_ids, key=_room_sort_key):
+        if start_room_id in ROOM_ZONES: continue
+        group = [start_room_id]; seen = {start_room_id}; index = 0
+        while index < len(group):
+            for neighbour in unzoned_neighbours[group[index]]:
+                if neighbour not in seen: seen.add(neighbour); group.append(neighbour)
+            index += 1
+        zone_name = f"wilds_{min(group, key=_room_sort_key)}"
+        for room_id in group: ROOM_ZONES[room_id] = zone_name
+
+    for room_id, zone_name in ROOM_ZONES.items(): ZONE_ROOMS.setdefault(zone_name, set()).add(room_id)
+    for room_id, room_data in game_rooms_dict.items():
+        for exit_key, destination in _room_links(room_data):
+            to_zone = ROOM_ZONES.get(room_state.normalize_room_id(destination))
+            if to_zone and to_zone != ROOM_ZONES[room_id]: BOUNDARY_EXITS[(room_id, exit_key)] = (ROOM_ZONES[room_id], to_zone)
+    assign_shards(shard_count)
+    if config.DEBUG_MODE: print(f"ZONES: {len(ZONE_ROOMS)} zones, {len(BOUNDARY_EXITS)} boundary exits, {len(set(ZONE_SHARDS.values()))} shard(s).")
+    return ZONE_ROOMS
+
+def assign_shards(shard_count=None):
+    """Greedy largest-zone-first assignment so each shard owns roughly the same number of rooms."""
+    shard_count = max(1, int(shard_count if shard_count is not None else getattr(config, 'ZONE_SHARD_COUNT', 1)))
+    shard_loads = [0] * shard_count
+    for zone_name in sorted(ZONE_ROOMS, key=lambda z: (-len(ZONE_ROOMS[z]), z)):
+        lightest_shard = shard_loads.index(min(shard_loads))
+        ZONE_SHARDS[zone_name] = lightest_shard; shard_loads[lightest_shard] += len(ZONE_ROOMS[zone_name])
+    return ZONE_SHARDS
+
+def zone_of(room_id):
+    return ROOM_ZONES.get(room_state.normalize_room_id(room_id))
+
+def shard_of_room(room_id):
+    return ZONE_SHARDS.get(zone_of(room_id), 0)
+
+def is_boundary_exit(room_id, exit_key):
+    return (room_state.normalize_room_id(room_id), exit_key) in BOUNDARY_EXITS
+
+def group_rooms_by_shard(room_ids):
+    """Splits a room id collection (e.g. room_state.ACTIVE_ROOMS) into {shard_index: [room_ids]}."""
+    rooms_by_shard = {}
+    for room_id in room_ids: rooms_by_shard.setdefault(shard_of_room(room_id), []).append(room_id)
+    return rooms_by_shard
+
+def _on_player_room_change(sid, old_room_id, new_room_id):
+    if old_room_id is None or new_room_id is None: return
+    from_zone = ROOM_ZONES.get(old_room_id); to_zone = ROOM_ZONES.get(new_room_id)
+    if from_zone == to_zone or from_zone is None or to_zone is None: return
+    ZONE_HANDOFFS[(from_zone, to_zone)] = ZONE_HANDOFFS.get((from_zone, to_zone), 0) + 1
+
+def describe_shards():
+    """JSON-friendly summary of the partition, for the admin dump."""
+    shards = {}
+    for zone_name, shard_index in ZONE_SHARDS.items():
+        shard_info = shards.setdefault(shard_index, {"zones": [], "rooms": 0, "occupied_rooms": 0, "active_rooms": 0})
+        shard_info["zones"].append(zone_name); shard_info["rooms"] += len(ZONE_ROOMS.get(zone_name, ()))
+    for room_id in room_state.ROOM_OCCUPANTS: shards.setdefault(shard_of_room(room_id), {"zones": [], "rooms": 0, "occupied_rooms": 0, "active_rooms": 0})["occupied_rooms"] += 1
+    for room_id in room_state.ACTIVE_ROOMS: shards.setdefault(shard_of_room(room_id), {"zones": [], "rooms": 0, "occupied_rooms": 0, "active_rooms": 0})["active_rooms"] += 1
+    return {"shards": {str(k): v for k, v in sorted(shards.items())}, "boundary_exits": len(BOUNDARY_EXITS),
+            "handoffs": {f"{from_zone}->{to_zone}": count for (from_zone, to_zone), count in ZONE_HANDOFFS.items()}}
+
+room_state.OCCUPANCY_LISTENERS.append(_on_player_room_change)
+
+if config.DEBUG_MODE: print("game_logic.zones loaded.")
@@ -0,0 +1,17 @@
+# mud_project/tests/test_async_player_handler.py
+# The prefetched player document cache stays bounded and lets go of saved documents once they are written.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from database import async_player_handler
+
+def test_prefetched_documents_are_evicted_least_recently_stored_first(monkeypatch):
+    monkeypatch.setattr(config, "ASYNC_PREFETCH_CACHE_MAX_ENTRIES", 2, raising=False)
+    monkeypatch.setattr(async_player_handler, "PREFETCHED_PLAYER_DOCS", async_player_handler.OrderedDict())
+    for name_lower in ("alice", "bob", "alice", "carol"): async_player_handler._remember_doc(name_lower, {"name_lower": name_lower})
+    assert list(async_player_handler.PREFETCHED_PLAYER_DOCS) == ["alice", "carol"]
+    assert async_player_handler._take_doc("alice") == {"name_lower": "alice"}
+    assert async_player_handler._take_doc("alice") is async_player_handler._MISSING
@@ -0,0 +1,48 @@
+# mud_project/tests/test_outbox.py
+# Delivery order of game_logic.outbox.ClientOutbox: SID frames, room broadcasts and channel moves interleaved.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_logic import outbox
+
+def _message(text): return {"text": text, "type": "info"}
+
+def _flush(client_outbox):
+    sent = []; moves = []
+    client_outbox.flush(lambda event_name, payload, room, skip_sid=None: sent.append((room, [m["text"] for m in payload["messages"]], skip_sid)),
+                        lambda sid, leave_channel, join_channel: moves.append((sid, leave_channel, join_channel)))
+    return sent, moves
+
+def test_messages_after_a_broadcast_go_out_after_it():
+    client_outbox = outbox.ClientOutbox(window_seconds=1.0)
+    client_outbox.queue("game_messages", {"messages": [_message("msg1")]}, "Y")
+    client_outbox.queue_broadcast("room:1", [_message("msg2")], ["X"])
+    client_outbox.queue("game_messages", {"messages": [_message("msg3")]}, "Y")
+    sent, _ = _flush(client_outbox)
+    assert sent == [("Y", ["msg1"], None), ("room:1", ["msg2"], ["X"]), ("Y", ["msg3"], None)]
+
+def test_frames_coalesce_until_a_broadcast_and_back_to_back_broadcasts_merge():
+    client_outbox = outbox.ClientOutbox(window_seconds=1.0)
+    client_outbox.queue("game_messages", {"messages": [_message("a1")]}, "A")
+    client_outbox.queue("game_messages", {"messages": [_message("b1")]}, "B")
+    client_outbox.queue("game_messages", {"messages": [_message("a2")]}, "A")
+    client_outbox.queue_broadcast("room:1", [_message("r1")])
+    client_outbox.queue_broadcast("room:1", [_message("r2")])
+    client_outbox.queue("game_messages", {"messages": [_message("a3")]}, "A")
+    client_outbox.queue_broadcast("room:1", [_message("r3")])
+    sent, _ = _flush(client_outbox)
+    assert sent == [("A", ["a1", "a2"], None), ("B", ["b1"], None), ("room:1", ["r1", "r2"], None), ("A", ["a3"], None), ("room:1", ["r3"], None)]
+
+def test_channel_moves_keep_their_place_and_discard_drops_every_frame_of_a_sid():
+    client_outbox = outbox.ClientOutbox(window_seconds=1.0)
+    client_outbox.queue("game_messages", {"messages": [_message("y1")]}, "Y")
+    client_outbox.queue_channel_move("Y", "room:1", "room:2")
+    client_outbox.queue("game_messages", {"messages": [_message("y2")]}, "Y")
+    client_outbox.queue_broadcast("room:2", [_message("r")])
+    client_outbox.queue("game_messages", {"messages": [_message("z1")]}, "Z")
+    client_outbox.discard("Y")
+    sent, moves = _flush(client_outbox)
+    assert sent == [("room:2", ["r"], None), ("Z", ["z1"], None)]
+    assert moves == [("Y", "room:1", "room:2")]
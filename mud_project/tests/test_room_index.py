@@ -0,0 +1,18 @@
+# mud_project/tests/test_room_index.py
+# Static items in a room's keyword index answer to the same words the original find_object_in_room matched.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes import templates
+from game_logic import room_index
+
+def test_static_items_are_indexed_by_full_name_keywords_and_id_only(monkeypatch):
+    game_templates = templates.GameTemplates()
+    game_templates.items["old_well"] = templates.ItemTemplate("old_well", {"name": "Old Stone Well", "keywords": ["Well"]})
+    monkeypatch.setattr(room_index, "GAME_TEMPLATES", game_templates)
+    index = room_index.build_room_index({"items": ["old_well"]})
+    assert sorted(index.items) == ["old stone well", "old_well", "well"]
+    index.remove_static_item("old_well")
+    assert index.items == {}
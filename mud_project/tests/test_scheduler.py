@@ -0,0 +1,24 @@
+# mud_project/tests/test_scheduler.py
+# TimerScheduler.run_due_batched: batches above the threshold, single callbacks below it and when the batch fails.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_logic import scheduler
+
+def _schedule_swings(timer_scheduler, ran, count):
+    for entity_id in range(count): timer_scheduler.schedule("combat", 1.0, ran.append, entity_id)
+
+def test_due_handles_go_to_the_batch_callback_at_the_threshold():
+    timer_scheduler = scheduler.TimerScheduler(); ran = []; batches = []
+    _schedule_swings(timer_scheduler, ran, 3)
+    assert timer_scheduler.run_due_batched("combat", 1.0, lambda handles: batches.append([h.args[0] for h in handles]), 3) == 3
+    assert batches == [[0, 1, 2]] and ran == []
+
+def test_a_failed_batch_runs_every_due_handle_singly():
+    timer_scheduler = scheduler.TimerScheduler(); ran = []
+    _schedule_swings(timer_scheduler, ran, 3)
+    def failing_batch(handles): raise RuntimeError("resolve failed")
+    assert timer_scheduler.run_due_batched("combat", 1.0, failing_batch, 2) == 3
+    assert ran == [0, 1, 2] and timer_scheduler.pending_count("combat") == 0
@@ -0,0 +1,324 @@
+# mud_project/tools/load_generator.py
+# Headless load test: opens N concurrent Socket.IO clients ("bots") against a running server. Each bot logs in
+# (creating its character on the first run), then plays a weighted mix of commands - moving through the room's
+# exits, look, attack, search, get and inventory - and measures how long each command takes to come back.
+# At the end it reports round-trip latency percentiles, messages per second and the server's tick overruns.
+#
+#   python tools/load_generator.py --bots 500 --duration 120 --spawn-server
+#       starts a local server on an in-memory database (config.DATABASE_BACKEND = 'memory') and runs 500 bots for 2 minutes
+#   python tools/load_generator.py --url http://127.0.0.1:8024 --bots 50 --admin-token <ADMIN_API_TOKEN>
+#       drives an already running server; tick overruns are read from /admin/tick_profile when the token is given
+#
+# Needs python-socketio's asyncio client (pip install "python-socketio[asyncio_client]").
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+try:
+    import socketio as python_socketio
+except ImportError:
+    python_socketio = None
+
+try:
+    import config
+    from game_logic import tick_profiler
+except ImportError as e:
+    print(f"ERROR (load_generator): Critical module import failed: {e}")
+    sys.exit(1)
+
+DEFAULT_COMMAND_WEIGHTS = {"move": 35, "look": 20, "attack": 15, "search": 10, "get": 10, "inventory": 10}
+CREATION_SCRIPT = ["yes", "female", "human", "quick", "finalize"] # answers to character_creation's prompts, in order
+LATENCY_WINDOW = 1000000 # keep every sample of a run for the final percentiles
+SERVER_COUNTERS_REPORTED = [tick_profiler.COUNTER_TICKS, tick_profiler.COUNTER_TICK_OVERRUNS, tick_profiler.COUNTER_TICKS_SKIPPED,
+                            tick_profiler.COUNTER_TICKS_CAUGHT_UP, "commands_run", "commands_rejected", "commands_expired"]
+
+def bot_name(prefix, index):
+    """Character names may only contain letters, so the bot number is spelled with a-z."""
+    letters = ""
+    for _ in range(4): index, remainder = divmod(index, 26); letters = chr(ord('a') + remainder) + letters
+    return f"{prefix}{letters}".title()
+
+def parse_room_update(room_message):
+    """(exit keys, attackable creature keywords, ground item keywords) from a 'room_data_update' message."""
+    exits_text = room_message.get("exits", "None")
+    exits = [] if exits_text == "None" else [exit_key.strip().lower() for exit_key in exits_text.split(",") if exit_key.strip()]
+    presence = room_message.get("presence_summary", "")
+    names = presence[len("ALSO HERE: "):].rstrip(".").split(", ") if presence.startswith("ALSO HERE: ") else []
+    attack_targets = [name.split()[-1].lower() for name in names if " " in name] # one-word names are players
+    items = room_message.get("items_summary", "")
+    item_names = items[len("YOU ALSO SEE: "):].rstrip(".").split(", ") if items.startswith("YOU ALSO SEE: ") and "(nothing)" not in items else []
+    ground_items = [item_name.split(" (x")[0].split()[-1].lower() for item_name in item_names if item_name]
+    return exits, attack_targets, ground_items
+
+def choose_bot_command(rng, weights, exits, attack_targets, ground_items):
+    """Picks a (command text, command kind) by weight; kinds with nothing to act on fall back to 'look'."""
+    kinds = list(weights); kind = rng.choices(kinds, weights=[weights[k] for k in kinds])[0]
+    if kind == "move" and exits: return rng.choice(exits), "move"
+    if kind == "attack" and attack_targets: return f"attack {rng.choice(attack_targets)}", "attack"
+    if kind == "get" and ground_items: return f"get {rng.choice(ground_items)}", "get"
+    if kind == "search": return "search", "search"
+    if kind == "inventory": return "inventory", "inventory"
+    return "look", "look"
+
+def roundtime_in(messages):
+    """Seconds of the 'Wait Xs.' roundtime refusal in a reply, or None."""
+    for message in messages or []:
+        if not isinstance(message, dict): continue
+        text = message.get("text", "")
+        if message.get("type") == "error_rt" and text.startswith("Wait ") and text.endswith("s."):
+            try: return float(text[5:-2])
+            except ValueError: return None
+    return None
+
+class LoadStats:
+    """Shared by every bot of a run (all bots run on one event loop, so no locking)."""
+
+    def __init__(self):
+        self.latency_by_command = {}; self.all_latencies = tick_profiler.RollingHistogram(LATENCY_WINDOW)
+        self.counters = {"bots_connected": 0, "bots_in_game": 0, "connect_failures": 0, "commands_sent": 0, "replies": 0,
+                         "reply_timeouts": 0, "roundtime_waits": 0, "events_received": 0, "messages_received": 0}
+        self.started_at = time.monotonic(); self.finished_at = None
+
+    def increment(self, counter_name, amount=1):
+        self.counters[counter_name] = self.counters.get(counter_name, 0) + amount
+
+    def record_latency(self, command_kind, seconds):
+        self.all_latencies.add(seconds)
+        histogram = self.latency_by_command.get(command_kind)
+        if histogram is None: histogram = self.latency_by_command[command_kind] = tick_profiler.RollingHistogram(LATENCY_WINDOW)
+        histogram.add(seconds)
+
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+class LoadBot:
+    def __init__(self, index, options, stats, rng):
+        self.index = index; self.options = options; self.stats = stats; self.rng = rng
+        self.name = bot_name(options.name_prefix, index)
+        self.sio = python_socketio.AsyncClient(reconnection=False)
+        self.sio.on('game_messages', self._on_game_messages); self.sio.on('stats_update', self._on_other_event)
+        self.in_game = False; self.exits = []; self.attack_targets = []; self.ground_items = []
+        self._reply_future = None; self._awaiting_echo = None
+
+    # --- Incoming events ---
+    async def _on_other_event(self, data=None):
+        self.stats.increment("events_received")
+
+    async def _on_game_messages(self, data):
+        messages = (data or {}).get('messages', [])
+        self.stats.increment("events_received"); self.stats.increment("messages_received", len(messages))
+        for message in messages:
+            if isinstance(message, dict) and message.get("type") == "room_data_update": self._read_room(message)
+        if self._reply_future is None or self._reply_future.done(): return
+        if self._awaiting_echo is not None and not any(isinstance(m, dict) and m.get("type") == "echo" and m.get("text") == self._awaiting_echo for m in messages): return
+        self._reply_future.set_result(messages)
+
+    def _read_room(self, room_message):
+        self.exits, self.attack_targets, self.ground_items = parse_room_update(room_message)
+
+    # --- Outgoing commands ---
+    async def send_command(self, command_text, command_kind):
+        """Sends one command and waits for its reply. In game the reply is the batch that echoes the command back;
+        before that (login, character creation) it is simply the next batch. Returns the reply messages or None on timeout."""
+        self._reply_future = asyncio.get_running_loop().create_future()
+        self._awaiting_echo = f"> {command_text}" if self.in_game else None
+        sent_at = time.monotonic(); self.stats.increment("commands_sent")
+        await self.sio.emit('player_command', {'command': command_text})
+        try: messages = await asyncio.wait_for(self._reply_future, timeout=self.options.reply_timeout)
+        except asyncio.TimeoutError:
+            self.stats.increment("reply_timeouts"); return None
+        finally: self._reply_future = None
+        self.stats.increment("replies"); self.stats.record_latency(command_kind, time.monotonic() - sent_at)
+        return messages
+
+    def choose_command(self):
+        return choose_bot_command(self.rng, self.options.weights, self.exits, self.attack_targets, self.ground_items)
+
+    async def enter_game(self):
+        welcome = asyncio.get_running_loop().create_future(); self._reply_future = welcome; self._awaiting_echo = None
+        await self.sio.connect(self.options.url, transports=['websocket'], wait_timeout=self.options.reply_timeout)
+        self.stats.increment("bots_connected")
+        try: await asyncio.wait_for(welcome, timeout=self.options.reply_timeout)
+        except asyncio.TimeoutError: return False
+        reply = await self.send_command(f"login {self.name}", "login")
+        if reply is not None and any(isinstance(m, dict) and m.get("type") == "room_data_update" for m in reply):
+            self.in_game = True
+        else:
+            reply = await self.send_command(f"create {self.name}", "create")
+            for answer in CREATION_SCRIPT:
+                if reply is None: return False
+                reply = await self.send_command(answer, "create")
+            self.in_game = reply is not None and any(isinstance(m, dict) and m.get("type") == "room_data_update" for m in reply)
+        if self.in_game: self.stats.increment("bots_in_game")
+        return self.in_game
+
+    async def run(self, stop_at):
+        try:
+            await asyncio.sleep(self.rng.uniform(0, self.options.ramp_up)) # spread the logins out
+            if not await self.enter_game(): return
+            while time.monotonic() < stop_at and self.sio.connected:
+                command_text, command_kind = self.choose_command()
+                reply = await self.send_command(command_text, command_kind)
+                roundtime = roundtime_in(reply)
+                if roundtime: self.stats.increment("roundtime_waits")
+                await asyncio.sleep((roundtime or 0.0) + self.rng.uniform(self.options.think_min, self.options.think_max))
+        except Exception as e_bot:
+            self.stats.increment("connect_failures")
+            if config.DEBUG_MODE: print(f"LOADGEN: bot {self.name} stopped: {e_bot}")
+        finally:
+            if self.sio.connected:
+                try: await self.sio.disconnect()
+                except Exception: pass
+
+# --- Server side numbers (/admin/tick_profile) ---
+def fetch_tick_profile(url, admin_token):
+    if not admin_token: return None
+    request = urllib.request.Request(url.rstrip("/") + "/admin/tick_profile", headers={"X-Admin-Token": admin_token})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response: return json.loads(response.read().decode("utf-8"))
+    except Exception as e_fetch:
+        print(f"LOADGEN: could not read /admin/tick_profile: {e_fetch}"); return None
+
+def _counter_deltas(profile_before, profile_after):
+    if not profile_after: return {}
+    counters_before = (profile_before or {}).get("counters", {}); counters_after = profile_after.get("counters", {})
+    return {name: counters_after.get(name, 0) - counters_before.get(name, 0) for name in SERVER_COUNTERS_REPORTED}
+
+def build_report(stats, profile_before, profile_after, options):
+    elapsed = max(stats.elapsed(), 1e-9)
+    report = {"bots": options.bots, "duration_seconds": round(elapsed, 3), "counters": dict(stats.counters),
+              "messages_per_second": round(stats.counters["messages_received"] / elapsed, 2),
+              "events_per_second": round(stats.counters["events_received"] / elapsed, 2),
+              "commands_per_second": round(stats.counters["replies"] / elapsed, 2),
+              "latency": stats.all_latencies.summary(),
+              "latency_by_command": {kind: histogram.summary() for kind, histogram in sorted(stats.latency_by_command.items())},
+              "server": None}
+    if profile_after:
+        report["server"] = {"counters": _counter_deltas(profile_before, profile_after),
+                            "phases": {name: profile_after.get("phases", {}).get(name) for name in (tick_profiler.PHASE_TICK_TOTAL, tick_profiler.METRIC_TICK_LAG, "command_wait")}}
+    return report
+
+def format_report(report):
+    lines = [f"Load test: {report['bots']} bots for {report['duration_seconds']:.1f}s",
+             f"  bots connected {report['counters']['bots_connected']}, in game {report['counters']['bots_in_game']}, failures {report['counters']['connect_failures']}",
+             f"  commands {report['counters']['replies']} answered / {report['counters']['commands_sent']} sent, {report['counters']['reply_timeouts']} timed out ({report['commands_per_second']}/s)",
+             f"  messages received {report['counters']['messages_received']} ({report['messages_per_second']}/s) in {report['counters']['events_received']} events ({report['events_per_second']}/s)",
+             f"{'command':<12}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}{'count':>9}"]
+    for kind, stats in list(report["latency_by_command"].items()) + [("ALL", report["latency"])]:
+        lines.append(f"{kind:<12}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}{stats['count']:>9}")
+    if report["server"]:
+        server_counters = report["server"]["counters"]
+        lines.append(f"  server: {server_counters.get('ticks', 0)} ticks, {server_counters.get('tick_overruns', 0)} overruns, {server_counters.get('ticks_skipped', 0)} skipped, "
+                     f"{server_counters.get('commands_rejected', 0)} commands rejected, {server_counters.get('commands_expired', 0)} expired")
+        for name, stats in report["server"]["phases"].items():
+            if stats: lines.append(f"  server {name}: p50 {stats['p50_ms']:.2f}ms p95 {stats['p95_ms']:.2f}ms p99 {stats['p99_ms']:.2f}ms max {stats['max_ms']:.2f}ms")
+    else: lines.append("  server: tick overruns unavailable (pass --admin-token, or use --spawn-server)")
+    return lines
+
+# --- Local server for capacity runs ---
+def serve_local(port, admin_token, async_mode):
+    """Child-process entry point: the normal server, bound to localhost, on the in-memory database with debug output off."""
+    config.DATABASE_BACKEND = 'memory'; config.HOST = '127.0.0.1'; config.PORT = port; config.ADMIN_API_TOKEN = admin_token
+    for setting_name in dir(config):
+        if setting_name == "DEBUG_MODE" or setting_name.startswith("DEBUG_"):
+            if isinstance(getattr(config, setting_name), bool): setattr(config, setting_name, False)
+    config.SEND_CLIENT_TICK_MARKERS = False; config.ALLOW_UNSAFE_WERKZEUG = True # bound to localhost, and stdin is not a terminal here
+    os.chdir(PROJECT_DIR)
+    if async_mode == 'asgi':
+        import asgi_server; asgi_server.run_server()
+    else:
+        config.SOCKETIO_ASYNC_MODE = async_mode
+        import runpy; runpy.run_path(os.path.join(PROJECT_DIR, "main.py"), run_name="__main__")
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0)); return probe.getsockname()[1]
+
+def spawn_local_server(options):
+    port = options.port or _free_port(); admin_token = options.admin_token or f"loadgen-{random.getrandbits(64):016x}"
+    child_args = [sys.executable, os.path.abspath(__file__), "--serve-local", "--port", str(port), "--admin-token", admin_token]
+    if options.async_mode: child_args += ["--async-mode", options.async_mode]
+    server_process = subprocess.Popen(child_args, cwd=PROJECT_DIR, stdout=None if options.server_output else subprocess.DEVNULL, stderr=None if options.server_output else subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"; deadline = time.monotonic() + options.server_start_timeout
+    while time.monotonic() < deadline:
+        if server_process.poll() is not None: raise RuntimeError(f"local server exited with code {server_process.returncode} (rerun with --server-output)")
+        try:
+            with urllib.request.urlopen(url + "/", timeout=1): return server_process, url, admin_token
+        except Exception: time.sleep(0.25)
+    server_process.terminate(); raise RuntimeError(f"local server did not answer on {url} within {options.server_start_timeout}s")
+
+async def run_load(options):
+    stats = LoadStats(); seed_rng = random.Random(options.seed)
+    bots = [LoadBot(index, options, stats, random.Random(seed_rng.getrandbits(64))) for index in range(options.bots)]
+    stop_at = time.monotonic() + options.ramp_up + options.duration
+    await asyncio.gather(*(bot.run(stop_at) for bot in bots))
+    stats.finished_at = time.monotonic()
+    return stats
+
+def parse_weights(weights_text):
+    weights = dict(DEFAULT_COMMAND_WEIGHTS)
+    for pair in (weights_text or "").split(","):
+        if "=" not in pair: continue
+        kind, weight = pair.split("=", 1)
+        if kind.strip() not in DEFAULT_COMMAND_WEIGHTS: raise argparse.ArgumentTypeError(f"unknown command kind '{kind.strip()}' (use {', '.join(DEFAULT_COMMAND_WEIGHTS)})")
+        weights[kind.strip()] = float(weight)
+    return weights
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Scripted Socket.IO bot players for load testing the MUD server.")
+    parser.add_argument("--url", default=None, help="server to drive (default: http://127.0.0.1:<config.PORT>)")
+    parser.add_argument("--spawn-server", action="store_true", help="start a local server on the in-memory database for the run")
+    parser.add_argument("--async-mode", default=None, help="server mode for --spawn-server: threading (default) or asgi")
+    parser.add_argument("--port", type=int, default=0, help="port for --spawn-server (default: any free port)")
+    parser.add_argument("--admin-token", default=None, help="server's ADMIN_API_TOKEN, to read tick overruns from /admin/tick_profile")
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of play after the ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="bots log in at random times within this many seconds")
+    parser.add_argument("--think-min", type=float, default=0.5, help="minimum pause between a bot's commands (seconds)")
+    parser.add_argument("--think-max", type=float, default=2.0, help="maximum pause between a bot's commands (seconds)")
+    parser.add_argument("--reply-timeout", type=float, default=10.0)
+    parser.add_argument("--weights", type=parse_weights, default=dict(DEFAULT_COMMAND_WEIGHTS), help="e.g. move=50,attack=5 (kinds: " + ", ".join(DEFAULT_COMMAND_WEIGHTS) + ")")
+    parser.add_argument("--name-prefix", default="Loadbot", help="letters only; bot characters are named <prefix><aaaa..>")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the bots' choices")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report as JSON to this file")
+    parser.add_argument("--server-output", action="store_true", help="show the spawned server's output")
+    parser.add_argument("--server-start-timeout", type=float, default=30.0)
+    parser.add_argument("--serve-local", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    options = build_arg_parser().parse_args(argv)
+    if options.serve_local: return serve_local(options.port, options.admin_token, options.async_mode)
+    if python_socketio is None or not hasattr(python_socketio, 'AsyncClient'):
+        print("ERROR: The load generator needs python-socketio's asyncio client (pip install \"python-socketio[asyncio_client]\")."); return 1
+    if not options.name_prefix.isalpha(): print("ERROR: --name-prefix may only contain letters."); return 1
+    server_process = None
+    try:
+        if options.spawn_server: server_process, options.url, options.admin_token = spawn_local_server(options)
+        options.url = options.url or f"http://127.0.0.1:{getattr(config, 'PORT', 8024)}"
+        print(f"LOADGEN: {options.bots} bots against {options.url} for {options.duration:.0f}s (+{options.ramp_up:.0f}s ramp-up)...")
+        profile_before = fetch_tick_profile(options.url, options.admin_token)
+        stats = asyncio.run(run_load(options))
+        report = build_report(stats, profile_before, fetch_tick_profile(options.url, options.admin_token), options)
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            try: server_process.wait(timeout=15)
+            except subprocess.TimeoutExpired: server_process.kill()
+    for line in format_report(report): print(line)
+    if options.json_path:
+        with open(options.json_path, "w") as f: json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
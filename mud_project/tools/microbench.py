@@ -0,0 +1,238 @@
+# mud_project/tools/microbench.py
+# Microbenchmarks for the functions the game calls thousands of times a minute, at several world/occupancy sizes,
+# with a stored baseline to compare against so an optimization can be shown and a regression caught.
+#
+#   python tools/microbench.py                        run every case at every tier, compare with benchmarks/baseline.json
+#   python tools/microbench.py --save-baseline        ...and then store this run as the new baseline
+#   python tools/microbench.py --tiers small --cases find_combat_target,tick --repeat 9
+#   python tools/microbench.py --fail-on-regression   exit 1 when a case is slower than the baseline by more than --threshold
+#
+# Every tier runs in its own fresh process (a synthetic world from game_data/world_generator.py, seeded RNG streams,
+# a virtual clock and a no-op client emitter), so tiers don't share state and results don't depend on run order.
+# Each case runs --repeat batches, each long enough (>= --min-batch-ms) to swamp timer resolution; the median and the
+# best per-call time are reported and the best is what gets compared (it is the least disturbed by other load). Baselines are only meaningful on the machine (and Python) that recorded them.
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE_PATH = os.path.join(PROJECT_DIR, "benchmarks", "baseline.json")
+BENCH_SEED = 11
+BENCH_START_AT = 1700000000.0
+
+# tier name -> world size and how crowded the benchmark room is
+TIERS = {
+    "small":  {"rooms": 1000,  "players_total": 10,  "players_in_room": 2,  "monsters_in_room": 2,  "objects_in_room": 2},
+    "medium": {"rooms": 10000, "players_total": 100, "players_in_room": 10, "monsters_in_room": 10, "objects_in_room": 10},
+    "large":  {"rooms": 50000, "players_total": 500, "players_in_room": 50, "monsters_in_room": 40, "objects_in_room": 40},
+}
+TIER_ORDER = ["small", "medium", "large"]
+CASE_ORDER = ["find_combat_target", "find_object", "send_room_description", "broadcast_to_room", "calculate_attack_strength",
+              "calculate_defense_strength", "handle_player_attack", "create_corpse_object_data", "player_get_client_data",
+              "player_stats_update", "tick"]
+
+def format_us(seconds):
+    return f"{seconds * 1e6:10.2f}"
+
+# --- Tier worker (runs in a child process) ---
+def _setup_tier(tier):
+    """Builds the world for one tier and returns the objects the cases need."""
+    import sim_harness # quiets config and imports main before anything else loads
+    import pytz
+    from classes import player as player_class
+    game = sim_harness.game; combat = sim_harness.combat; determinism = sim_harness.determinism
+    from game_logic import loot_handler, room_state, room_index
+    from classes import monster as monster_registry
+    from game_data import world_generator
+
+    determinism.seed_streams(BENCH_SEED); determinism.use_virtual_clock(BENCH_START_AT)
+    game.load_game_world(sim_harness.data_loader.build_game_data(world_generator.generate_world(room_count=tier["rooms"], seed=BENCH_SEED)))
+    game.CLIENT_EMITTER = lambda event_name, payload, room=None, skip_sid=None: None; game.CLIENT_CHANNEL_MOVER = lambda sid, leave_channel, join_channel: None
+    bench_room_id = world_generator.FIRST_GENERATED_ROOM_ID; bench_room = game.GAME_ROOMS[bench_room_id]
+
+    monster_keys = sorted(key for key in game.GAME_MONSTER_TEMPLATES if key.startswith("synthetic_"))[:4]
+    bench_room["monsters"] = [monster_keys[index % len(monster_keys)] for index in range(tier["monsters_in_room"])]
+    bench_instances = monster_registry.populate_room(bench_room_id, bench_room, game.GAME_MONSTER_TEMPLATES)
+    bench_room["objects"] = {}
+    for index in range(tier["objects_in_room"]):
+        if index % 2: game.add_item_object_to_room(bench_room, "rusty_sword" if index % 4 == 1 else "goblin_ear", game.GAME_ITEMS)
+        else:
+            corpse_template = game.GAME_MONSTER_TEMPLATES[monster_keys[index % len(monster_keys)]]
+            corpse = loot_handler.create_corpse_object_data(corpse_template, f"{bench_room_id}_{corpse_template['_id']}_corpse{index}", game.GAME_ITEMS, game.GAME_EQUIPMENT_TABLES)
+            bench_room["objects"][corpse["id"]] = corpse
+    room_state.rebuild_active_rooms(); room_index.invalidate_room(bench_room) # its lists were replaced wholesale
+
+    def make_player(index, room_id):
+        player = player_class.Player(f"bench{index:05d}", f"Bench{index:05d}")
+        player.race = "human"; player.creation_phase = None
+        player.equipped_items["mainhand"] = "rusty_sword"
+        player.calculate_derived_stats(game.GAME_RACES, game.GAME_ITEMS); player.hp = player.max_hp
+        player.current_room_id = room_id; game.active_players[player.sid] = player; room_state.register_player(player)
+        return player
+    other_room_ids = [room_id for room_id in game.GAME_ROOMS if isinstance(room_id, int) and room_id > bench_room_id]
+    players = [make_player(index, bench_room_id) for index in range(tier["players_in_room"])]
+    players += [make_player(index, other_room_ids[(index * 7919) % len(other_room_ids)]) for index in range(tier["players_in_room"], tier["players_total"])]
+
+    last_monster_key = bench_room["monsters"][-1]; last_monster_name = game.GAME_MONSTER_TEMPLATES[last_monster_key]["name"]
+    target_query = f"{last_monster_name.split()[-1].lower()} {bench_room['monsters'].count(last_monster_key)}" # the last instance: the full scan
+    attack_target = dict(game.GAME_MONSTER_TEMPLATES[monster_keys[0]], max_hp=10 ** 9, hp=10 ** 9)
+    attack_runtime_id = bench_instances[0].instance_id
+    weapon_data = game.GAME_TEMPLATES.items["rusty_sword"]; armor_data = next((item for item in game.GAME_TEMPLATES.items.values() if item.is_armor), None) # compiled, as combat uses them
+    shield_data = next((item for item in game.GAME_TEMPLATES.items.values() if item.is_shield), None)
+    tick_clock = game.make_tick_clock()
+    return {"game": game, "combat": combat, "loot_handler": loot_handler, "determinism": determinism, "pytz": pytz, "players": players,
+            "bench_room_id": bench_room_id, "bench_room": bench_room, "target_query": target_query, "object_query": "mithril chalice", # matches nothing: the full scan
+            "attack_target": attack_target, "attack_runtime_id": attack_runtime_id, "weapon_data": weapon_data, "armor_data": armor_data,
+            "shield_data": shield_data, "corpse_template": game.GAME_MONSTER_TEMPLATES[monster_keys[0]], "tick_clock": tick_clock}
+
+def _clear_messages(env):
+    for player in env["players"]: player._queued_messages.clear()
+    env["game"].flush_client_outbox(force=True) # room broadcasts and frames queued by the batch
+
+def build_cases(env):
+    """case name -> (callable run once per iteration, callable run between batches or None)."""
+    game = env["game"]; combat = env["combat"]; player = env["players"][0]; room = env["bench_room"]; pytz = env["pytz"]
+    def tick_once():
+        game.run_game_tick(env["tick_clock"], 1, pytz.utc); game.game_tick_counter += 1 # the virtual clock stays put: time of day/weather don't drift between batches
+    def attack_once():
+        combat.set_entity_hp(env["attack_runtime_id"], 10 ** 9)
+        combat.handle_player_attack(player, env["attack_target"], "monster", env["target_query"], game.GAME_ITEMS, monster_runtime_id=env["attack_runtime_id"])
+    def stats_update_once(): # what send_player_stats_update builds after a typical command: one field changed
+        player.hp = player.hp - 1 if player.hp > 1 else player.max_hp
+        player.get_client_stats_update(game.GAME_RACES, game.GAME_ITEMS)
+    clear = lambda: _clear_messages(env)
+    return {
+        "find_combat_target": (lambda: game.find_combat_target_in_room(player, env["target_query"], room), None),
+        "find_object": (lambda: game.find_object_in_room(player, env["object_query"], room), None),
+        "send_room_description": (lambda: game.send_room_description(player), clear),
+        "broadcast_to_room": (lambda: game.broadcast_to_room(env["bench_room_id"], "Someone waves.", exclude_sids=[player.sid]), clear),
+        "calculate_attack_strength": (lambda: combat.calculate_attack_strength(player.name, player.stats, player.skills, env["weapon_data"], "chain"), None),
+        "calculate_defense_strength": (lambda: combat.calculate_defense_strength(player.name, player.stats, player.skills, env["armor_data"], env["shield_data"]), None),
+        "handle_player_attack": (attack_once, clear),
+        "create_corpse_object_data": (lambda: env["loot_handler"].create_corpse_object_data(env["corpse_template"], env["attack_runtime_id"], game.GAME_ITEMS, game.GAME_EQUIPMENT_TABLES), None),
+        "player_get_client_data": (lambda: player.get_client_data(game.GAME_RACES, game.GAME_ITEMS), None),
+        "player_stats_update": (stats_update_once, None),
+        "tick": (tick_once, clear),
+    }
+
+def time_case(operation, between_batches, repeat, min_batch_seconds):
+    """Median and best per-call seconds over `repeat` batches, the batch size chosen so one batch takes >= min_batch_seconds."""
+    calls = 1
+    while True:
+        if between_batches: between_batches()
+        started_at = time.perf_counter()
+        for _ in range(calls): operation()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_batch_seconds or calls >= 1_000_000: break
+        calls = min(1_000_000, max(calls * 2, int(calls * min_batch_seconds / max(elapsed, 1e-9) * 1.2)))
+    per_call = []
+    for _ in range(repeat):
+        if between_batches: between_batches()
+        started_at = time.perf_counter()
+        for _ in range(calls): operation()
+        per_call.append((time.perf_counter() - started_at) / calls)
+    per_call.sort()
+    return {"median_s": per_call[len(per_call) // 2], "min_s": per_call[0], "calls_per_batch": calls}
+
+def run_tier_worker(tier_name, case_names, repeat, min_batch_seconds):
+    env = _setup_tier(TIERS[tier_name]); cases = build_cases(env)
+    for case_name in case_names: time_case(*cases[case_name], repeat=1, min_batch_seconds=min_batch_seconds) # warm-up pass (caches, CPU clocks), discarded
+    results = {}
+    for case_name in case_names:
+        operation, between_batches = cases[case_name]
+        results[case_name] = time_case(operation, between_batches, repeat, min_batch_seconds)
+    return results
+
+# --- Driver ---
+def run_tiers(tier_names, case_names, repeat, min_batch_ms):
+    results = {}
+    for tier_name in tier_names:
+        child_args = [sys.executable, os.path.abspath(__file__), "--tier-worker", tier_name, "--cases", ",".join(case_names),
+                      "--repeat", str(repeat), "--min-batch-ms", str(min_batch_ms)]
+        print(f"BENCH: running tier '{tier_name}' ({TIERS[tier_name]['rooms']} rooms)...", flush=True)
+        completed = subprocess.run(child_args, cwd=PROJECT_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONHASHSEED="0"))
+        if completed.returncode != 0:
+            print(completed.stdout[-4000:] + completed.stderr[-4000:]); raise SystemExit(f"BENCH: tier '{tier_name}' failed.")
+        for case_name, case_result in json.loads(completed.stdout.strip().splitlines()[-1]).items(): results[f"{case_name}[{tier_name}]"] = case_result
+    return results
+
+def load_baseline(path):
+    if not os.path.exists(path): return None
+    with open(path) as f: baseline = json.load(f)
+    if baseline.get("baseline_version") != BASELINE_VERSION:
+        print(f"BENCH: {path} is not a version {BASELINE_VERSION} baseline; ignoring it."); return None
+    return baseline
+
+def save_baseline(path, results, options):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {"baseline_version": BASELINE_VERSION, "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                "machine": platform.machine(), "repeat": options.repeat, "min_batch_ms": options.min_batch_ms, "results": results}
+    with open(path, "w") as f: json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"BENCH: baseline saved to {path}")
+
+def compare(results, baseline, threshold):
+    """Report lines plus the names of cases slower than the baseline by more than `threshold` (a fraction)."""
+    baseline_results = (baseline or {}).get("results", {}); regressions = []
+    lines = [f"{'case':<42} {'median us':>10} {'best us':>10} {'base best':>10} {'change':>9}"]
+    for case_key, case_result in results.items():
+        line = f"{case_key:<42} {format_us(case_result['median_s'])} {format_us(case_result['min_s'])}"
+        previous = baseline_results.get(case_key)
+        if previous:
+            ratio = case_result["min_s"] / previous["min_s"] if previous["min_s"] else 1.0
+            verdict = "  SLOWER" if ratio > 1 + threshold else ("  faster" if ratio < 1 - threshold else "")
+            if ratio > 1 + threshold: regressions.append(case_key)
+            line += f" {format_us(previous['min_s'])} {(ratio - 1) * 100:+8.1f}%{verdict}"
+        else: line += f" {'-':>10} {'new':>9}"
+        lines.append(line)
+    return lines, regressions
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the hot game functions, compared against a stored baseline.")
+    parser.add_argument("--tiers", default=",".join(TIER_ORDER), help=f"comma-separated subset of {TIER_ORDER}")
+    parser.add_argument("--cases", default=",".join(CASE_ORDER), help=f"comma-separated subset of {CASE_ORDER}")
+    parser.add_argument("--repeat", type=int, default=9, help="timed batches per case")
+    parser.add_argument("--min-batch-ms", type=float, default=20.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline after comparing")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change reported as faster/SLOWER (0.15 = 15%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write this run's results as JSON")
+    parser.add_argument("--tier-worker", default=None, help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    options = build_arg_parser().parse_args(argv)
+    case_names = [name for name in options.cases.split(",") if name]
+    unknown_cases = [name for name in case_names if name not in CASE_ORDER]
+    if unknown_cases: raise SystemExit(f"Unknown case(s) {unknown_cases}; choose from {CASE_ORDER}.")
+    if options.tier_worker:
+        import io, contextlib
+        with contextlib.redirect_stdout(io.StringIO()): results = run_tier_worker(options.tier_worker, case_names, options.repeat, options.min_batch_ms / 1000.0)
+        print(json.dumps(results)); return 0
+    tier_names = [name for name in options.tiers.split(",") if name]
+    unknown_tiers = [name for name in tier_names if name not in TIERS]
+    if unknown_tiers: raise SystemExit(f"Unknown tier(s) {unknown_tiers}; choose from {TIER_ORDER}.")
+    results = run_tiers(tier_names, case_names, options.repeat, options.min_batch_ms)
+    baseline = load_baseline(options.baseline)
+    report_lines, regressions = compare(results, baseline, options.threshold)
+    if baseline: print(f"BENCH: comparing with {options.baseline} (recorded {baseline.get('recorded_at')}, Python {baseline.get('python')})")
+    else: print(f"BENCH: no baseline at {options.baseline}; run with --save-baseline to record one.")
+    for report_line in report_lines: print(report_line)
+    if regressions: print(f"BENCH: {len(regressions)} case(s) slower than the baseline by more than {options.threshold:.0%}: {', '.join(regressions)}")
+    if options.json_path:
+        with open(options.json_path, "w") as f: json.dump({"results": results, "regressions": regressions}, f, indent=2)
+    if options.save_baseline:
+        merged = dict((baseline or {}).get("results", {})); merged.update(results) # a partial run only replaces the cases it measured
+        save_baseline(options.baseline, merged, options)
+    return 1 if (regressions and options.fail_on_regression) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
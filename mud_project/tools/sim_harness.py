@@ -0,0 +1,324 @@
+# mud_project/tools/sim_harness.py
+# Headless, deterministic simulation for replayable benchmarks. No network and no real waiting: the game tick,
+# the command handler and the sub-tick entity attacks are driven on a virtual clock (game_logic.determinism),
+# every subsystem draws from its own seeded RNG stream, and the world lives on the in-memory database.
+# The same trace + seed therefore does the same work every run; the fingerprint printed at the end (a hash of
+# every message sent to clients plus the final world state) proves it.
+#
+#   python tools/sim_harness.py generate --players 100 --duration 600 --seed 7 --out trace.jsonl
+#       scripted players (same command mix as tools/load_generator.py) play for 10 virtual minutes; their
+#       commands are recorded to trace.jsonl together with the run's fingerprint
+#   python tools/sim_harness.py replay trace.jsonl [--verify 3] [--profile] [--json report.json]
+#       replays the recorded commands and checks the fingerprint; --verify runs it N times in fresh processes
+#   python tools/sim_harness.py generate --world-rooms 20000 ... plays in a synthetic world (game_data/world_generator.py);
+#       the world parameters go into the trace header so replays rebuild the same world
+#
+# A trace is JSON lines: a header {"trace_version", "seed", "start_at", ...}, one {"at", "sid", "op", "command"}
+# per input (op = connect / command / disconnect, "at" in virtual epoch seconds) and a closing {"summary": {...}}.
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TRACE_VERSION = 1
+DEFAULT_START_AT = 1700000000.0 # virtual epoch the clock starts from (fixed so log prefixes and corpse ids repeat too)
+HASH_SEED = "0" # set strings hash the same way in every run (room occupancy sets hold SIDs)
+
+OP_CONNECT = "connect"
+OP_COMMAND = "command"
+OP_DISCONNECT = "disconnect"
+
+def _quiet_config(config):
+    config.DATABASE_BACKEND = 'memory'
+    for setting_name in dir(config):
+        if setting_name == "DEBUG_MODE" or setting_name.startswith("DEBUG_"):
+            if isinstance(getattr(config, setting_name), bool): setattr(config, setting_name, False)
+    config.SEND_CLIENT_TICK_MARKERS = False
+
+import config
+_quiet_config(config) # before main and the game_logic modules are imported, so their load-time output stays off
+import pytz
+import main as game
+from database import connection as db_connection
+from database import data_loader
+from game_logic import determinism
+from game_logic import tick_profiler
+from game_logic import scheduler as timer_system
+from game_logic import combat
+from game_logic import environment as environment_system
+from classes import monster as monster_registry
+from game_data import world_generator
+import load_generator
+
+class TranscriptRecorder:
+    """Stands in for main.CLIENT_EMITTER and CLIENT_CHANNEL_MOVER: hashes every emit in order and hands each SID's
+    messages (its own and the room broadcasts it is in on) to its watcher."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256(); self.emits = 0; self.messages = 0
+        self.watchers = {} # sid -> callable(messages)
+        self.channels = {} # room channel -> {sid}, as Socket.IO's rooms would hold them
+
+    def move_channel(self, sid, leave_channel, join_channel):
+        if leave_channel: self.channels.get(leave_channel, set()).discard(sid)
+        if join_channel: self.channels.setdefault(join_channel, set()).add(sid)
+
+    def emit(self, event_name, payload, room=None, skip_sid=None):
+        self.emits += 1
+        self.digest.update(json.dumps([event_name, room, payload] + ([skip_sid] if skip_sid else []), sort_keys=True, default=str).encode("utf-8"))
+        if event_name == 'game_messages':
+            messages = payload.get('messages', [])
+            recipients = sorted(self.channels[room].difference(skip_sid or ())) if room in self.channels else [room]
+            for sid in recipients:
+                self.messages += len(messages); watcher = self.watchers.get(sid)
+                if watcher: watcher(messages)
+
+def world_state_digest():
+    """Hash of the state a run leaves behind (players, entity HP, monster instances, defeated entities, weather, tick counter)."""
+    players = sorted((dict(player.to_dict(), sid=None, db_id=None) for player in game.active_players.values()), key=lambda p: p["name"])
+    monsters = [(instance.instance_id, instance.hp, instance.defeated) for instance in monster_registry.MONSTER_INSTANCES.values() if instance.hp is not None or instance.defeated]
+    state = {"players": players, "entity_hp": combat.RUNTIME_ENTITY_HP, "monsters": monsters, "defeated": sorted(game.TRACKED_DEFEATED_ENTITIES, key=str),
+             "weather": environment_system.current_weather, "time_of_day": environment_system.current_time_of_day,
+             "tick": game.game_tick_counter, "room_objects": {str(room_id): sorted(room.get("objects", {})) for room_id, room in game.GAME_ROOMS.items() if room.get("objects")}}
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class HeadlessSimulation:
+    """The simulation thread's schedule (main.game_tick_loop / run_simulation_pass) on a virtual clock."""
+
+    def __init__(self, seed, start_at=DEFAULT_START_AT, world_parameters=None):
+        self.seed = seed; self.start_at = start_at; self.world_parameters = world_parameters
+        self.recorder = TranscriptRecorder(); self.inputs_run = 0
+        determinism.seed_streams(seed); determinism.use_virtual_clock(start_at)
+        db_connection.connect_to_mongo()
+        if world_parameters: game.load_game_world(data_loader.build_game_data(world_generator.generate_world(**world_parameters))) # synthetic world, built in memory
+        else: data_loader.initialize_database_with_defaults(); game.load_game_world(data_loader.load_all_game_data())
+        game.CLIENT_EMITTER = self.recorder.emit; game.CLIENT_CHANNEL_MOVER = self.recorder.move_channel; game.game_tick_counter = 0
+        game.COMMAND_QUEUE.max_latency_seconds = None # nothing expires: how long a drain takes in real time must not change the outcome
+        tick_profiler.TICK_PROFILER.reset()
+        self.tick_clock = game.make_tick_clock(); self.tick_interval = self.tick_clock.interval
+        self.next_tick_at = start_at; self.ticks_run = 0
+
+    def submit(self, sid, op, command=None):
+        if op == OP_CONNECT: game.COMMAND_QUEUE.submit(sid, game.process_connect, sid, force=True)
+        elif op == OP_DISCONNECT: game.COMMAND_QUEUE.submit(sid, game.process_disconnect, sid, force=True)
+        else: game.COMMAND_QUEUE.submit(sid, game.process_player_command, sid, command, force=True)
+        self.inputs_run += 1
+
+    def next_wakeup(self, next_input_at):
+        candidates = [self.next_tick_at]
+        if next_input_at is not None: candidates.append(next_input_at)
+        if getattr(config, 'COMBAT_SCHEDULER_ENABLED', True):
+            next_attack_at = timer_system.GAME_TIMERS.next_due(timer_system.LANE_ENTITY_COMBAT)
+            if next_attack_at is not None: candidates.append(next_attack_at)
+        outbox_due_at = game.CLIENT_OUTBOX.due_at()
+        if outbox_due_at is not None: candidates.append(outbox_due_at)
+        return min(candidates)
+
+    def step(self, source):
+        """Moves the clock to the next thing that is due and runs it: the tick, then inputs, then entity attacks, then the outbox flush."""
+        now = determinism.set_clock(self.next_wakeup(source.next_input_at()))
+        if now >= self.next_tick_at:
+            game.run_game_tick(self.tick_clock, 1, pytz.utc); game.game_tick_counter += 1
+            self.ticks_run += 1; self.next_tick_at += self.tick_interval
+        for sid, op, command in source.pop_due(now): self.submit(sid, op, command)
+        if game.COMMAND_QUEUE.pending(): game.COMMAND_QUEUE.drain()
+        if getattr(config, 'COMBAT_SCHEDULER_ENABLED', True): game.run_due_entity_attacks()
+        game.flush_client_outbox()
+        return now
+
+    def run(self, source, until_at):
+        wall_started_at = time.perf_counter()
+        while determinism.now() < until_at: self.step(source)
+        return time.perf_counter() - wall_started_at
+
+    def fingerprint(self):
+        return hashlib.sha256((self.recorder.digest.hexdigest() + world_state_digest()).encode("utf-8")).hexdigest()
+
+class TraceSource:
+    """Inputs read from a recorded trace."""
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda entry: entry["at"]); self.index = 0
+
+    def next_input_at(self):
+        return self.entries[self.index]["at"] if self.index < len(self.entries) else None
+
+    def pop_due(self, now):
+        while self.index < len(self.entries) and self.entries[self.index]["at"] <= now:
+            entry = self.entries[self.index]; self.index += 1
+            yield entry["sid"], entry["op"], entry.get("command")
+
+class ScriptedPlayer:
+    """One generated player: connects, creates its character, then plays the load generator's weighted command mix."""
+
+    def __init__(self, index, sid, name, rng, options, first_at):
+        self.index = index; self.sid = sid; self.name = name; self.rng = rng; self.options = options
+        self.next_at = first_at; self.pending = [(OP_CONNECT, None), (OP_COMMAND, f"create {name}")] + [(OP_COMMAND, answer) for answer in load_generator.CREATION_SCRIPT]
+        self.exits = []; self.attack_targets = []; self.ground_items = []; self.last_roundtime = None
+
+    def observe(self, messages):
+        for message in messages:
+            if isinstance(message, dict) and message.get("type") == "room_data_update": self.exits, self.attack_targets, self.ground_items = load_generator.parse_room_update(message)
+        roundtime = load_generator.roundtime_in(messages)
+        if roundtime: self.last_roundtime = roundtime
+
+    def next_input(self):
+        if self.pending: return self.pending.pop(0)
+        command_text, _ = load_generator.choose_bot_command(self.rng, self.options.weights, self.exits, self.attack_targets, self.ground_items)
+        return OP_COMMAND, command_text
+
+    def schedule_next(self, now):
+        think_ms = self.rng.randint(int(self.options.think_min * 1000), int(self.options.think_max * 1000))
+        self.next_at = now + (self.last_roundtime or 0.0) + think_ms / 1000.0; self.last_roundtime = None
+
+class ScriptedSource:
+    """Generates inputs from scripted players as the simulation runs, recording each one for the trace."""
+
+    def __init__(self, options, recorder, start_at):
+        self.options = options; self.recorded = []
+        players_rng = random.Random(f"{options.seed}:players")
+        self.players = []
+        for index in range(options.players):
+            sid = f"sim{index:05d}"; first_at = start_at + players_rng.randint(0, int(options.ramp_up * 1000)) / 1000.0
+            player = ScriptedPlayer(index, sid, load_generator.bot_name(options.name_prefix, index), random.Random(players_rng.getrandbits(64)), options, first_at)
+            recorder.watchers[sid] = player.observe; self.players.append(player)
+        self.stop_at = start_at + options.ramp_up + options.duration
+
+    def next_input_at(self):
+        due_times = [player.next_at for player in self.players if player.next_at is not None]
+        return min(due_times) if due_times else None
+
+    def pop_due(self, now):
+        for player in self.players:
+            if player.next_at is None or player.next_at > now: continue
+            if now >= self.stop_at:
+                op, command = OP_DISCONNECT, None; player.next_at = None
+            else:
+                op, command = player.next_input(); player.schedule_next(now)
+                if player.next_at > self.stop_at: player.next_at = self.stop_at # everyone disconnects at stop_at
+            self.recorded.append({"at": now, "sid": player.sid, "op": op, "command": command})
+            yield player.sid, op, command
+
+def build_summary(simulation, wall_seconds):
+    return {"fingerprint": simulation.fingerprint(), "ticks": simulation.ticks_run, "inputs": simulation.inputs_run,
+            "emits": simulation.recorder.emits, "messages": simulation.recorder.messages,
+            "virtual_seconds": round(determinism.now() - simulation.start_at, 3), "wall_seconds": round(wall_seconds, 3)}
+
+def read_trace(path):
+    header = None; entries = []; summary = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip(): continue
+            record = json.loads(line)
+            if "trace_version" in record: header = record
+            elif "summary" in record: summary = record["summary"]
+            else: entries.append(record)
+    if not header or header.get("trace_version") != TRACE_VERSION: raise ValueError(f"{path} is not a version {TRACE_VERSION} simulation trace.")
+    return header, entries, summary
+
+def write_trace(path, header, entries, summary):
+    with open(path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for entry in entries: f.write(json.dumps(entry) + "\n")
+        f.write(json.dumps({"summary": summary}) + "\n")
+
+def print_summary(summary, options):
+    print(f"SIM: {summary['ticks']} ticks, {summary['inputs']} inputs, {summary['emits']} emits ({summary['messages']} messages) "
+          f"over {summary['virtual_seconds']:.0f} virtual seconds in {summary['wall_seconds']:.3f}s wall time")
+    print(f"SIM: fingerprint {summary['fingerprint']}")
+    if options.profile:
+        for report_line in tick_profiler.TICK_PROFILER.format_report(): print(report_line)
+
+def command_generate(options):
+    start_at = options.start_at
+    world_parameters = {"room_count": options.world_rooms, "seed": options.world_seed} if options.world_rooms else None
+    simulation = HeadlessSimulation(options.seed, start_at, world_parameters)
+    source = ScriptedSource(options, simulation.recorder, start_at)
+    wall_seconds = simulation.run(source, source.stop_at + simulation.tick_interval)
+    summary = build_summary(simulation, wall_seconds)
+    header = {"trace_version": TRACE_VERSION, "seed": options.seed, "start_at": start_at, "until_at": determinism.now(),
+              "players": options.players, "tick_interval": simulation.tick_interval}
+    if world_parameters: header["world"] = world_parameters
+    write_trace(options.out, header, source.recorded, summary)
+    print(f"SIM: wrote {len(source.recorded)} inputs to {options.out}")
+    print_summary(summary, options)
+    return summary
+
+def command_replay(options):
+    header, entries, recorded_summary = read_trace(options.trace)
+    if header.get("tick_interval") != float(getattr(config, 'TICK_INTERVAL_SECONDS', 6.0)): print(f"SIM: WARNING - trace was recorded with TICK_INTERVAL_SECONDS={header.get('tick_interval')}, config has {getattr(config, 'TICK_INTERVAL_SECONDS', 6.0)}.")
+    seed = options.seed if options.seed is not None else header["seed"]
+    simulation = HeadlessSimulation(seed, header["start_at"], header.get("world"))
+    wall_seconds = simulation.run(TraceSource(entries), header["until_at"])
+    summary = build_summary(simulation, wall_seconds)
+    print_summary(summary, options)
+    if recorded_summary and seed == header["seed"]:
+        print(f"SIM: fingerprint {'MATCHES' if recorded_summary['fingerprint'] == summary['fingerprint'] else 'DIFFERS FROM'} the recorded run.")
+    if options.json_path:
+        with open(options.json_path, "w") as f: json.dump(dict(summary, profile=tick_profiler.TICK_PROFILER.snapshot()), f, indent=2)
+    return summary
+
+def command_verify(options):
+    """Replays the trace in `options.verify` fresh processes and compares their fingerprints."""
+    child_args = [sys.executable, os.path.abspath(__file__), "replay", options.trace, "--summary-only"]
+    if options.seed is not None: child_args += ["--seed", str(options.seed)]
+    fingerprints = []
+    for run_index in range(options.verify):
+        completed = subprocess.run(child_args, cwd=PROJECT_DIR, capture_output=True, text=True)
+        if completed.returncode != 0: print(completed.stdout + completed.stderr); return 1
+        summary = json.loads(completed.stdout.strip().splitlines()[-1])
+        fingerprints.append(summary["fingerprint"])
+        print(f"SIM: run {run_index + 1}: {summary['fingerprint']} ({summary['wall_seconds']:.3f}s wall)")
+    identical = len(set(fingerprints)) == 1
+    print(f"SIM: {options.verify} runs {'are bit-for-bit identical' if identical else 'DIVERGED'}.")
+    return 0 if identical else 1
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Deterministic headless simulation runs from recorded command traces.")
+    subparsers = parser.add_subparsers(dest="subcommand", required=True)
+    generate = subparsers.add_parser("generate", help="play scripted players and record their commands as a trace")
+    generate.add_argument("--out", required=True)
+    generate.add_argument("--players", type=int, default=50)
+    generate.add_argument("--duration", type=float, default=300.0, help="virtual seconds of play after the ramp-up")
+    generate.add_argument("--ramp-up", type=float, default=30.0)
+    generate.add_argument("--think-min", type=float, default=0.5)
+    generate.add_argument("--think-max", type=float, default=3.0)
+    generate.add_argument("--weights", type=load_generator.parse_weights, default=dict(load_generator.DEFAULT_COMMAND_WEIGHTS))
+    generate.add_argument("--name-prefix", default="Simbot")
+    generate.add_argument("--seed", type=int, default=1)
+    generate.add_argument("--start-at", type=float, default=DEFAULT_START_AT)
+    generate.add_argument("--profile", action="store_true", help="print the tick profiler report")
+    generate.add_argument("--world-rooms", type=int, default=0, help="play in a synthetic world of this many generated rooms (game_data/world_generator.py)")
+    generate.add_argument("--world-seed", type=int, default=1)
+    replay = subparsers.add_parser("replay", help="replay a trace and report its fingerprint")
+    replay.add_argument("trace")
+    replay.add_argument("--seed", type=int, default=None, help="override the trace's seed")
+    replay.add_argument("--verify", type=int, default=0, help="replay N times in fresh processes and compare fingerprints")
+    replay.add_argument("--profile", action="store_true", help="print the tick profiler report")
+    replay.add_argument("--json", dest="json_path", default=None, help="write the summary and tick profile as JSON")
+    replay.add_argument("--summary-only", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    options = build_arg_parser().parse_args(argv)
+    if options.subcommand == "replay" and options.verify: return command_verify(options)
+    if options.subcommand == "replay" and options.summary_only:
+        import io, contextlib
+        with contextlib.redirect_stdout(io.StringIO()): summary = command_replay(options)
+        print(json.dumps(summary)); return 0
+    if options.subcommand == "generate": command_generate(options)
+    else: command_replay(options)
+    return 0
+
+if __name__ == '__main__':
+    if os.environ.get("PYTHONHASHSEED") != HASH_SEED: # re-run with fixed string hashing, or set iteration order would differ between runs
+        os.execve(sys.executable, [sys.executable] + sys.argv, dict(os.environ, PYTHONHASHSEED=HASH_SEED))
+    sys.exit(main())